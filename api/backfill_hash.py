@@ -0,0 +1,56 @@
+"""
+Backfill do payload_hash (ver api/payload_hash.py) nas tabelas Bronze.
+
+Usado uma única vez após o deploy da coluna: calcula o hash das linhas antigas em lotes,
+percorrendo a tabela pela chave (keyset), e marca `payload_alterado_em` com a ingestão.
+"""
+
+import logging
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+from api.payload_hash import calcular_hash
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_payload_hash(engine, tabela, chave="id", tamanho_lote=1000):
+    """
+    Calcula payload_hash das linhas de `tabela` que ainda não o têm, em lotes por `chave`.
+
+    Returns: quantidade de linhas atualizadas
+    """
+    Session = sessionmaker(bind=engine)
+    total = 0
+    ultima_chave = None
+
+    while True:
+        session = Session()
+        try:
+            filtro_chave = f"AND {chave} > :ultima_chave" if ultima_chave is not None else ""
+            linhas = session.execute(text(f"""
+                SELECT {chave}, payload FROM {tabela}
+                WHERE payload_hash IS NULL {filtro_chave}
+                ORDER BY {chave}
+                LIMIT :limite
+            """), {"ultima_chave": ultima_chave, "limite": tamanho_lote}).fetchall()
+            if not linhas:
+                break
+
+            session.execute(text(f"""
+                UPDATE {tabela}
+                SET payload_hash = :hash,
+                    payload_alterado_em = COALESCE(payload_alterado_em, ingested_at)
+                WHERE {chave} = :chave
+            """), [{"chave": r[0], "hash": calcular_hash(r[1])} for r in linhas])
+            session.commit()
+
+            ultima_chave = linhas[-1][0]
+            total += len(linhas)
+            logger.info(f"🔑 Backfill payload_hash ({tabela}): {total} linhas atualizadas")
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    return total
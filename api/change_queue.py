@@ -0,0 +1,106 @@
+"""
+Fila de mudanças (CDC) do Bronze para o Silver.
+
+O crawler e o coletor de itens enfileiram o id Bronze de cada linha inserida ou com
+payload realmente alterado (no mesmo comando do merge, então fila e Bronze nunca
+divergem). O Silver consome a fila em vez de varrer `status_processamento` nas tabelas
+Bronze: o custo passa a acompanhar as mudanças do dia, não o tamanho do histórico.
+
+Cada fila é uma tabela estreita (só `bronze_id`); o consumo remove as linhas na mesma
+transação que grava o Silver e, quando a fila esvazia, ela é truncada.
+
+As filas só existem e só recebem ids com SILVER_FONTE=fila; com "status" (padrão nesta
+versão) o Silver varre `status_processamento` e nada é enfileirado. Ver scripts/README.md
+para trocar de fonte.
+"""
+
+import os
+import logging
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+# De onde o Silver tira o trabalho (lido também pelos merges do crawler/coletor):
+# "status": varredura de status_processamento = 'PENDING' nas tabelas Bronze (marcando PROCESSED)
+# "fila": filas de mudanças alimentadas pelos merges; o status do Bronze não é atualizado
+FONTE = os.getenv("SILVER_FONTE", "status").lower()
+
+# Tabela Bronze -> fila
+FILAS = {
+    "bronze_pncp_licitacoes": "fila_silver_licitacoes",
+    "bronze_pncp_itens": "fila_silver_itens",
+}
+
+
+def fila_ativa():
+    """True se o Silver consome as filas (SILVER_FONTE=fila)."""
+    return FONTE == "fila"
+
+
+def cte_enfileirar(tabela_bronze, origem):
+    """
+    CTE (com a vírgula que a separa da anterior) que enfileira os ids devolvidos pela CTE
+    `origem` de um merge. Vazia quando a fonte do Silver não é a fila.
+    """
+    if not fila_ativa():
+        return ""
+    return f""",
+            -- Inseridos e alterados entram na fila do Silver (api/change_queue.py)
+            enfileirados AS (
+                INSERT INTO {FILAS[tabela_bronze]} (bronze_id)
+                SELECT id FROM {origem}
+                ON CONFLICT DO NOTHING
+            )"""
+
+
+def remover_da_fila(session, tabela_bronze, ids):
+    """Retira da fila os ids Bronze já gravados no Silver lidos sem consumir (na transação da sessão)."""
+    session.execute(text(f"DELETE FROM {FILAS[tabela_bronze]} WHERE bronze_id = ANY(:ids)"), {"ids": ids})
+
+
+def criar_fila(conn, tabela_bronze):
+    """
+    Cria a fila de `tabela_bronze` (chamado pelas migrações do crawler/coletor e pelo Silver,
+    só com a fila ativa).
+    Na criação, enfileira o que já está PENDING no Bronze para o Silver não perder o backlog.
+    Se a tabela Bronze ainda não existe, não faz nada: a migração do dono cria a fila depois.
+    """
+    fila = FILAS[tabela_bronze]
+    if conn.execute(text("SELECT to_regclass(:fila)"), {"fila": fila}).scalar():
+        return
+    if not conn.execute(text("SELECT to_regclass(:tabela)"), {"tabela": tabela_bronze}).scalar():
+        return
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {fila} (bronze_id bigint PRIMARY KEY)"))
+    total = conn.execute(text(f"""
+        INSERT INTO {fila} (bronze_id)
+        SELECT id FROM {tabela_bronze} WHERE status_processamento = 'PENDING'
+        ON CONFLICT DO NOTHING
+    """)).rowcount
+    logger.info(f"🔧 Fila {fila} criada com {total} pendentes do Bronze")
+
+
+def tamanho_fila(engine, tabela_bronze):
+    """Quantidade de ids Bronze aguardando o Silver."""
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {FILAS[tabela_bronze]}")).scalar()
+
+
+def truncar_se_vazia(engine, tabela_bronze):
+    """
+    TRUNCATE da fila se ela estiver vazia (descarta as versões mortas deixadas pelo consumo).
+    Não espera: se houver escrita em andamento, fica para a próxima execução.
+
+    Returns: True se truncou
+    """
+    fila = FILAS[tabela_bronze]
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"LOCK TABLE {fila} IN ACCESS EXCLUSIVE MODE NOWAIT"))
+            if conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {fila})")).scalar():
+                return False
+            conn.execute(text(f"TRUNCATE {fila}"))
+    except OperationalError:
+        logger.info(f"⏭️ Fila {fila} em uso, truncate adiado")
+        return False
+    return True
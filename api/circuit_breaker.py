@@ -0,0 +1,100 @@
+"""
+Circuit breaker por chave (ex.: CNPJ do órgão) para endpoints do PNCP que falham.
+
+Depois de N falhas consecutivas de uma chave o circuito abre e as chamadas dessa chave
+são recusadas até o fim do tempo de resfriamento; então uma única chamada de teste é
+liberada (meio-aberto): sucesso fecha o circuito, falha reabre com o tempo dobrado.
+Assim um órgão com endpoint quebrado não ocupa workers nem o orçamento do limitador.
+"""
+
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURAÇÕES ---
+LIMITE_FALHAS = int(os.getenv("PNCP_DISJUNTOR_FALHAS", "5"))  # falhas consecutivas até abrir
+RESFRIAMENTO = float(os.getenv("PNCP_DISJUNTOR_RESFRIAMENTO", "300"))  # segundos aberto
+RESFRIAMENTO_MAXIMO = 3600.0
+
+FECHADO = "fechado"
+ABERTO = "aberto"
+MEIO_ABERTO = "meio_aberto"
+
+
+class _Circuito:
+    __slots__ = ("estado", "falhas", "aberto_ate", "resfriamento", "teste_em_andamento")
+
+    def __init__(self, resfriamento):
+        self.estado = FECHADO
+        self.falhas = 0
+        self.aberto_ate = 0.0
+        self.resfriamento = resfriamento
+        self.teste_em_andamento = False
+
+
+class DisjuntorPorChave:
+    """Conjunto thread-safe de circuit breakers, um por chave."""
+
+    def __init__(self, limite_falhas=LIMITE_FALHAS, resfriamento=RESFRIAMENTO, resfriamento_maximo=RESFRIAMENTO_MAXIMO):
+        self.limite_falhas = limite_falhas
+        self.resfriamento = resfriamento
+        self.resfriamento_maximo = resfriamento_maximo
+        self._circuitos = {}
+        self._lock = threading.Lock()
+
+    def _circuito(self, chave):
+        circuito = self._circuitos.get(chave)
+        if circuito is None:
+            circuito = _Circuito(self.resfriamento)
+            self._circuitos[chave] = circuito
+        return circuito
+
+    def permitir(self, chave):
+        """True se a chamada para `chave` pode seguir (fechado ou chamada de teste do meio-aberto)."""
+        with self._lock:
+            circuito = self._circuitos.get(chave)
+            if circuito is None or circuito.estado == FECHADO:
+                return True
+            if circuito.estado == ABERTO and time.monotonic() >= circuito.aberto_ate:
+                circuito.estado = MEIO_ABERTO
+            if circuito.estado == MEIO_ABERTO and not circuito.teste_em_andamento:
+                circuito.teste_em_andamento = True
+                return True
+            return False
+
+    def segundos_para_liberar(self, chave):
+        """Tempo até o circuito de `chave` aceitar uma chamada de teste (0 se já aceita)."""
+        with self._lock:
+            circuito = self._circuitos.get(chave)
+            if circuito is None or circuito.estado != ABERTO:
+                return 0.0
+            return max(0.0, circuito.aberto_ate - time.monotonic())
+
+    def registrar_sucesso(self, chave):
+        with self._lock:
+            circuito = self._circuitos.pop(chave, None)
+        if circuito is not None and circuito.estado != FECHADO:
+            logger.info(f"🟢 Circuito fechado para {chave}")
+
+    def registrar_falha(self, chave):
+        with self._lock:
+            circuito = self._circuito(chave)
+            circuito.falhas += 1
+            circuito.teste_em_andamento = False
+            if circuito.estado == MEIO_ABERTO:
+                # Teste falhou: reabre com resfriamento dobrado
+                circuito.resfriamento = min(circuito.resfriamento * 2, self.resfriamento_maximo)
+            elif circuito.falhas < self.limite_falhas:
+                return
+            circuito.estado = ABERTO
+            circuito.aberto_ate = time.monotonic() + circuito.resfriamento
+            resfriamento = circuito.resfriamento
+        logger.warning(f"🔴 Circuito aberto para {chave} por {resfriamento:.0f}s")
+
+    def abertos(self):
+        """Chaves com circuito aberto ou meio-aberto."""
+        with self._lock:
+            return [chave for chave, circuito in self._circuitos.items() if circuito.estado != FECHADO]
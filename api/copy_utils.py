@@ -0,0 +1,47 @@
+"""
+Utilitários para carga em massa via COPY (formato texto do PostgreSQL).
+
+Usados pelos caminhos de escrita em lote do Bronze: as linhas são copiadas para uma
+tabela temporária de staging e depois mescladas com um único INSERT ... SELECT.
+"""
+
+import io
+
+_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r',
+})
+
+
+def formatar_valor(valor):
+    """Converte um valor Python para o formato texto do COPY (None vira \\N)."""
+    if valor is None:
+        return '\\N'
+    return str(valor).translate(_ESCAPES)
+
+
+def formatar_linha(valores):
+    return '\t'.join(formatar_valor(v) for v in valores) + '\n'
+
+
+def copiar_linhas(session, tabela, colunas, linhas):
+    """
+    Executa COPY ... FROM STDIN na conexão da sessão (mesma transação).
+
+    Args:
+        session: sessão SQLAlchemy (psycopg2)
+        tabela: nome da tabela de destino (normalmente temporária)
+        colunas: lista de nomes de colunas
+        linhas: iterável de tuplas na ordem de `colunas`
+    """
+    buffer = io.StringIO()
+    for linha in linhas:
+        buffer.write(formatar_linha(linha))
+    buffer.seek(0)
+
+    # Conexão DBAPI (psycopg2) por trás da sessão, na transação corrente
+    dbapi_conn = session.connection().connection
+    with dbapi_conn.cursor() as cursor:
+        cursor.copy_expert(f"COPY {tabela} ({', '.join(colunas)}) FROM STDIN", buffer)
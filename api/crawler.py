@@ -1,17 +1,25 @@
-import requests
-import time
 import os
+import time
+import queue
+import asyncio
 import logging
-import json
-from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+from datetime import datetime, date, timedelta
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, func, text
+from sqlalchemy import Column, Integer, String, Date, DateTime, func, text
 from sqlalchemy.orm import declarative_base, sessionmaker
 from sqlalchemy.exc import IntegrityError
 from flask import Flask, jsonify
 from pathlib import Path
 from dotenv import load_dotenv
+from api import http_client, json_codec
+from api.metrics import registro, Cronometro
+from api.database import get_engine, criar_schema
+from api.copy_utils import copiar_linhas
+from api.payload_hash import calcular_hash
+from api.backfill_hash import backfill_payload_hash
+from api.change_queue import criar_fila, cte_enfileirar, fila_ativa
 
 # --- CARREGAMENTO DE CONFIGURAÇÕES ----
 base_dir = Path(__file__).resolve().parent
@@ -47,9 +55,32 @@ MODALIDADES = {
 }
 
 MAX_WORKERS = 15  # Aumentado de 3 para 15 para mais paralelização
+# Tamanho (em dias) de cada shard de datas; cada shard tem seu próprio checkpoint
+SHARD_DIAS = int(os.getenv("CRAWLER_SHARD_DIAS", "1"))
+# Modo assíncrono: páginas em andamento (corrotinas aiohttp), compartilhadas por todas as
+# modalidades; as requisições em voo de fato são ditadas pelo limitador adaptativo
+CONCORRENCIA_ASYNC = int(os.getenv("CRAWLER_CONCORRENCIA", "100"))
+# Downloads e gravação desacoplados por uma fila limitada (nos dois modos)
+ESCRITORES = int(os.getenv("CRAWLER_ESCRITORES", "2"))  # workers de banco (1 conexão cada)
+PAGINAS_POR_TRANSACAO = int(os.getenv("CRAWLER_PAGINAS_POR_TRANSACAO", "10"))
+TAMANHO_FILA_ESCRITA = int(os.getenv("CRAWLER_FILA_ESCRITA", "50"))  # páginas baixadas aguardando gravação
+# "threads" (padrão) ou "async" (requer aiohttp)
+MODO_CRAWLER = os.getenv("CRAWLER_MODO", "threads")
 # Mude para None para baixar TODAS as páginas (Local) ou um número baixo como 2 (Vercel)
 LIMITE_PAGINAS_POR_MODALIDADE = None
 
+# --- MÉTRICAS (ver api/metrics.py) ---
+PAGINAS_GRAVADAS = registro.contador("pncp_crawler_paginas_total", "Páginas gravadas no Bronze por modalidade")
+LINHAS_GRAVADAS = registro.contador("pncp_crawler_linhas_total", "Licitações recebidas da API e gravadas por modalidade")
+RESULTADO_UPSERT = registro.contador("pncp_crawler_upsert_total", "Resultado do upsert no Bronze (inseridos/atualizados/inalterados)")
+SHARDS_PROCESSADOS = registro.contador("pncp_crawler_shards_total", "Shards processados por status de checkpoint")
+VAZAO_PAGINAS = registro.gauge("pncp_crawler_paginas_por_segundo", "Páginas/s por modalidade na última execução")
+VAZAO_LINHAS = registro.gauge("pncp_crawler_linhas_por_segundo", "Licitações/s por modalidade na última execução")
+DURACAO_EXECUCAO = registro.gauge("pncp_crawler_duracao_segundos", "Duração da última execução do crawler")
+PROFUNDIDADE_FILA = registro.gauge("pncp_crawler_fila_profundidade_max", "Maior profundidade observada das filas de download/escrita")
+OCUPACAO_WORKERS = registro.contador("pncp_crawler_worker_ocupado_segundos_total", "Tempo ocupado somado dos workers por papel")
+UTILIZACAO_WORKERS = registro.gauge("pncp_crawler_worker_utilizacao", "Fração do tempo em que os workers de cada papel estiveram ocupados")
+
 Base = declarative_base()
 
 # --- MODELOS ---
@@ -60,6 +91,8 @@ class BronzeLicitacao(Base):
     data_publicacao = Column(DateTime, nullable=False, index=True)
     codigo_modalidade = Column(Integer, nullable=False, index=True) 
     payload = Column(JSONB, nullable=False) 
+    payload_hash = Column(String(64))  # SHA-256 do payload canonicalizado (ver api/payload_hash.py)
+    payload_alterado_em = Column(DateTime, index=True)  # Última inserção/mudança real do payload
     status_processamento = Column(String, default='PENDING', index=True)
     ingested_at = Column(DateTime, server_default=func.now())
 
@@ -69,12 +102,35 @@ class ProgressoColeta(Base):
     ultima_data_publicacao = Column(DateTime)
     data_atualizacao = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
+class ProgressoShard(Base):
+    """Checkpoint de cada janela de datas (shard) de uma modalidade."""
+    __tablename__ = 'progresso_coleta_shards'
+    codigo_modalidade = Column(Integer, primary_key=True)
+    data_inicio = Column(Date, primary_key=True)
+    data_fim = Column(Date, primary_key=True)
+    status = Column(String, nullable=False, default='PENDING')  # COMPLETED, PARTIAL (dia corrente) ou FAILED
+    paginas = Column(Integer, default=0)
+    data_atualizacao = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+# --- MIGRAÇÕES ---
+def migrar_schema(engine):
+    """Adiciona colunas novas em tabelas já existentes (create_all só cria tabelas)."""
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE bronze_pncp_licitacoes ADD COLUMN IF NOT EXISTS payload_hash varchar(64)"))
+        conn.execute(text("ALTER TABLE bronze_pncp_licitacoes ADD COLUMN IF NOT EXISTS payload_alterado_em timestamp"))
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_bronze_pncp_licitacoes_payload_alterado_em
+            ON bronze_pncp_licitacoes (payload_alterado_em)
+        """))
+        if fila_ativa():
+            criar_fila(conn, "bronze_pncp_licitacoes")
+
 # --- CORE DO CRAWLER ---
 class PNCPCrawler:
     def __init__(self, db_string):
-        # Otimizado: pool maior para suportar mais workers
-        self.engine = create_engine(db_string, pool_size=10, max_overflow=20)
-        Base.metadata.create_all(self.engine)
+        # Engine compartilhado pelo processo; schema criado/migrado uma vez
+        self.engine = get_engine(db_string)
+        criar_schema(Base, self.engine, migrar_schema)
         self.Session = sessionmaker(bind=self.engine)
         self.session = self.Session()
         self.base_url = "https://pncp.gov.br/api/consulta/v1/contratacoes/atualizacao"
@@ -100,83 +156,104 @@ class PNCPCrawler:
         except Exception:
             self.session.rollback()
 
-    def salvar_lote_bronze(self, lista_licitacoes, codigo_modalidade):
-        data_maxima_lote = None
-        processados_contagem = 0
-
-        # Usar INSERT ... ON CONFLICT para evitar race conditions
-        sql_insert_update = text("""
-            INSERT INTO bronze_pncp_licitacoes (
-                identificador_pncp, data_publicacao, codigo_modalidade, payload, status_processamento
-            ) VALUES (
-                :identificador_pncp, :data_publicacao, :codigo_modalidade, :payload, 'PENDING'
+    def shards_pendentes(self, codigo_modalidade, data_inicio, data_fim):
+        """Shards de [data_inicio, data_fim] que ainda não têm checkpoint COMPLETED."""
+        concluidos = {
+            (r.data_inicio, r.data_fim)
+            for r in self.session.query(ProgressoShard).filter(
+                ProgressoShard.codigo_modalidade == codigo_modalidade,
+                ProgressoShard.status == 'COMPLETED',
+                ProgressoShard.data_inicio >= data_inicio,
             )
-            ON CONFLICT (identificador_pncp)
-            DO UPDATE SET
-                payload = EXCLUDED.payload,
-                data_publicacao = EXCLUDED.data_publicacao
-            WHERE bronze_pncp_licitacoes.payload::text != EXCLUDED.payload::text
-        """)
-
-        for item in lista_licitacoes:
-            chave_unica = item.get('numeroControlePNCP')
-            data_pub_item = datetime.strptime(item['dataPublicacaoPncp'], "%Y-%m-%dT%H:%M:%S")
-
-            if data_maxima_lote is None or data_pub_item > data_maxima_lote:
-                data_maxima_lote = data_pub_item
-
-            try:
-                # Executar INSERT com ON CONFLICT
-                result = self.session.execute(sql_insert_update, {
-                    'identificador_pncp': chave_unica,
-                    'data_publicacao': data_pub_item,
-                    'codigo_modalidade': codigo_modalidade,
-                    'payload': json.dumps(item)  # Converter dict para JSON string
-                })
-
-                # Verificar se foi insert (1 linha afetada) ou update (1 linha afetada)
-                # ON CONFLICT sempre retorna 1 linha afetada
-                processados_contagem += 1
-
-            except Exception as e:
-                logger.error(f"Erro ao processar {chave_unica}: {e}")
-                self.session.rollback()
-                continue
-
-        # Commit final
+        }
+        return [shard for shard in gerar_shards(data_inicio, data_fim) if shard not in concluidos]
+
+    def podar_shards(self, modalidades):
+        """
+        Remove os checkpoints COMPLETED anteriores à última data coletada de `modalidades`:
+        a coleta incremental já começa depois deles, então só fariam a tabela crescer.
+        Shards que terminam depois do shard não concluído (FAILED/PARTIAL) mais antigo da
+        modalidade são mantidos, para um backfill interrompido retomar só o que falta.
+
+        Returns: quantidade de shards removidos
+        """
+        if not modalidades:
+            return 0
+        session = self.Session()
         try:
-            self.session.commit()
+            removidos = session.execute(text("""
+                DELETE FROM progresso_coleta_shards s
+                USING progresso_coleta p
+                WHERE s.codigo_modalidade = p.codigo_modalidade
+                  AND s.codigo_modalidade = ANY(:modalidades)
+                  AND s.status = 'COMPLETED'
+                  AND s.data_fim < CAST(p.ultima_data_publicacao AS date)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM progresso_coleta_shards u
+                      WHERE u.codigo_modalidade = s.codigo_modalidade
+                        AND u.status <> 'COMPLETED'
+                        AND u.data_inicio <= s.data_fim
+                  )
+            """), {"modalidades": list(modalidades)}).rowcount
+            session.commit()
         except Exception as e:
-            self.session.rollback()
-            logger.error(f"Erro no commit final: {e}")
+            session.rollback()
+            logger.error(f"Erro ao podar checkpoints de shards: {e}")
+            return 0
+        finally:
+            session.close()
+        if removidos:
+            logger.info(f"🧹 {removidos} checkpoint(s) de shards antigos removidos")
+        return removidos
+
+    def marcar_shard(self, codigo_modalidade, data_inicio, data_fim, sucesso, paginas):
+        """
+        Grava o checkpoint de um shard (sessão própria, seguro entre threads).
+        Shards que incluem o dia de hoje ficam PARTIAL: a API ainda recebe atualizações.
+        """
+        if not sucesso:
+            status = 'FAILED'
+        elif data_fim >= date.today():
+            status = 'PARTIAL'
+        else:
+            status = 'COMPLETED'
+        SHARDS_PROCESSADOS.inc(status=status)
 
-        logger.info(f"📦 Processados: {processados_contagem} registros")
-        return data_maxima_lote, processados_contagem
+        session = self.Session()
+        try:
+            session.execute(text("""
+                INSERT INTO progresso_coleta_shards (codigo_modalidade, data_inicio, data_fim, status, paginas, data_atualizacao)
+                VALUES (:mod, :ini, :fim, :status, :paginas, now())
+                ON CONFLICT (codigo_modalidade, data_inicio, data_fim)
+                DO UPDATE SET status = EXCLUDED.status, paginas = EXCLUDED.paginas, data_atualizacao = now()
+            """), {"mod": codigo_modalidade, "ini": data_inicio, "fim": data_fim, "status": status, "paginas": paginas})
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Erro ao gravar checkpoint do shard {codigo_modalidade} {data_inicio}: {e}")
+        finally:
+            session.close()
 
-    def buscar_dados(self, data_inicial, data_final, codigo_modalidade):
-        max_data_encontrada = None
-        headers = {'User-Agent': 'Crawler-SaaS/1.0', 'Accept': 'application/json'}
+    def buscar_dados(self, data_inicial, data_final, codigo_modalidade, escrita):
+        """
+        Baixa todas as páginas de [data_inicial, data_final] para uma modalidade e as entrega
+        a `escrita` (_EscritaEmLote); só volta depois que todas foram gravadas.
 
-        # FASE 1: Apenas 1 request para descobrir total de páginas e processar página 1
-        logger.info(f"🔍 Mod {codigo_modalidade}: Descobrindo total de páginas...")
-
-        pagina = 1
-        params = {
-            "dataInicial": data_inicial, "dataFinal": data_final,
-            'codigoModalidadeContratacao': codigo_modalidade,
-            "pagina": pagina, "tamanhoPagina": 50
-        }
+        Returns:
+            (sucesso, max_data_encontrada, paginas_gravadas); sucesso é False se alguma página falhou
+        """
+        # FASE 1: Apenas 1 request para descobrir total de páginas e entregar a página 1
+        logger.info(f"🔍 Mod {codigo_modalidade} [{data_inicial}-{data_final}]: Descobrindo total de páginas...")
 
         try:
-            response = requests.get(self.base_url, params=params, headers=headers, timeout=30)
-            if response.status_code == 204:
+            dados = self.requisitar_pagina(data_inicial, data_final, codigo_modalidade, 1)
+            if dados is None:
+                logger.error(f"❌ Erro na API para modalidade {codigo_modalidade}")
+                return False, None, 0
+            if not dados:
                 logger.info(f"📭 Mod {codigo_modalidade}: Nenhuma licitação encontrada")
-                return
-            if response.status_code != 200:
-                logger.error(f"❌ Erro na API (status {response.status_code}) para modalidade {codigo_modalidade}")
-                return
+                return True, None, 0
 
-            dados = response.json()
             total_paginas = dados.get('totalPaginas', 1)
             resultados = dados.get('data', [])
 
@@ -184,20 +261,15 @@ class PNCPCrawler:
 
             if not resultados:
                 logger.info(f"📭 Mod {codigo_modalidade}: Página 1 vazia")
-                return
-
-            # Processar página 1
-            data_max_lote, qtd = self.salvar_lote_bronze(resultados, codigo_modalidade)
-            logger.info(f"📦 Mod {codigo_modalidade} | Pág {pagina}/{total_paginas} | Novos: {qtd}")
-
-            if data_max_lote and (max_data_encontrada is None or data_max_lote > max_data_encontrada):
-                max_data_encontrada = data_max_lote
+                return True, None, 0
 
+            gravacoes = [escrita.enviar(codigo_modalidade, resultados)]
         except Exception as e:
             logger.error(f"Erro crítico na descoberta de páginas: {e}")
-            return
+            return False, None, 0
 
-        # FASE 2: Processar páginas restantes em paralelo (se houver)
+        # FASE 2: Baixar páginas restantes em paralelo (se houver); a gravação fica com os escritores
+        sucesso = True
         if total_paginas > 1:
             paginas_para_processar = list(range(2, total_paginas + 1))  # Páginas 2 até total_paginas
 
@@ -206,141 +278,653 @@ class PNCPCrawler:
                 paginas_para_processar = paginas_para_processar[:LIMITE_PAGINAS_POR_MODALIDADE - 1]
 
             if paginas_para_processar:
-                logger.info(f"⚡ Mod {codigo_modalidade}: Processando {len(paginas_para_processar)} páginas restantes em paralelo...")
+                logger.info(f"⚡ Mod {codigo_modalidade}: Baixando {len(paginas_para_processar)} páginas restantes em paralelo...")
 
-                # Usar ThreadPoolExecutor para processar páginas em paralelo
+                # Usar ThreadPoolExecutor para baixar páginas em paralelo
                 with ThreadPoolExecutor(max_workers=min(len(paginas_para_processar), 5)) as executor:  # Máximo 5 workers por modalidade
                     futures = []
                     for pag in paginas_para_processar:
-                        futures.append(executor.submit(self.processar_pagina, data_inicial, data_final, codigo_modalidade, pag))
+                        futures.append(executor.submit(self.processar_pagina, data_inicial, data_final, codigo_modalidade, pag, escrita))
 
-                    # Aguardar todas as páginas serem processadas
                     for future in as_completed(futures):
                         try:
-                            data_max_pagina = future.result()
-                            if data_max_pagina and (max_data_encontrada is None or data_max_pagina > max_data_encontrada):
-                                max_data_encontrada = data_max_pagina
+                            gravacao = future.result()
+                            if gravacao:
+                                gravacoes.append(gravacao)
                         except Exception as e:
+                            sucesso = False
                             logger.error(f"Erro ao processar página em paralelo: {e}")
 
-        if max_data_encontrada:
-            self.atualizar_progresso(codigo_modalidade, max_data_encontrada)
+        # O checkpoint do shard só pode ser gravado depois das páginas
+        max_data_encontrada = None
+        paginas_gravadas = 0
+        for gravacao in gravacoes:
+            try:
+                data_max_pagina = gravacao.result()
+            except Exception:
+                sucesso = False  # já registrado pelo escritor
+                continue
+            paginas_gravadas += 1
+            if data_max_pagina and (max_data_encontrada is None or data_max_pagina > max_data_encontrada):
+                max_data_encontrada = data_max_pagina
 
-    def processar_pagina(self, data_inicial, data_final, codigo_modalidade, pagina):
-        """Processa uma página específica em paralelo."""
-        headers = {'User-Agent': 'Crawler-SaaS/1.0', 'Accept': 'application/json'}
+        return sucesso, max_data_encontrada, paginas_gravadas
 
-        params = {
+    def _params_pagina(self, data_inicial, data_final, codigo_modalidade, pagina):
+        return {
             "dataInicial": data_inicial, "dataFinal": data_final,
             'codigoModalidadeContratacao': codigo_modalidade,
             "pagina": pagina, "tamanhoPagina": 50
         }
 
-        # Criar sessão independente para este worker
-        session = self.Session()
+    def _ler_pagina(self, response, codigo_modalidade, pagina):
+        """Retorna o JSON da página, {} se não houver conteúdo ou None em caso de erro."""
+        if response.status_code == 204:
+            return {}
+        if response.status_code != 200:
+            logger.warning(f"Status {response.status_code} na página {pagina} (Mod {codigo_modalidade})")
+            return None
 
-        try:
-            response = requests.get(self.base_url, params=params, headers=headers, timeout=30)
-            if response.status_code == 204:
-                return None
-            if response.status_code != 200:
-                logger.warning(f"Status {response.status_code} na página {pagina}")
-                return None
+        return json_codec.loads(response.content)
 
-            dados = response.json()
-            resultados = dados.get('data', [])
+    def requisitar_pagina(self, data_inicial, data_final, codigo_modalidade, pagina):
+        """Baixa uma página da API. Retorna o JSON, {} se não houver conteúdo ou None em caso de erro."""
+        params = self._params_pagina(data_inicial, data_final, codigo_modalidade, pagina)
+        response = http_client.get(self.base_url, params=params, timeout=30)
+        return self._ler_pagina(response, codigo_modalidade, pagina)
+
+    async def requisitar_pagina_async(self, data_inicial, data_final, codigo_modalidade, pagina):
+        """Versão assíncrona de requisitar_pagina (http_client.get_async)."""
+        params = self._params_pagina(data_inicial, data_final, codigo_modalidade, pagina)
+        response = await http_client.get_async(self.base_url, params=params, timeout=30)
+        return self._ler_pagina(response, codigo_modalidade, pagina)
 
+    def processar_pagina(self, data_inicial, data_final, codigo_modalidade, pagina, escrita):
+        """
+        Baixa uma página específica e a entrega a `escrita` (sem abrir sessão de banco).
+
+        Returns:
+            Future da gravação (resolve com a data máxima da página), ou None se a página veio vazia
+        """
+        try:
+            dados = self.requisitar_pagina(data_inicial, data_final, codigo_modalidade, pagina)
+            if dados is None:
+                raise RuntimeError(f"Falha ao baixar a página {pagina} (Mod {codigo_modalidade})")
+
+            resultados = dados.get('data', []) if dados else []
             if not resultados:
                 return None
 
-            # Usar método próprio para salvar com sessão independente
-            data_max_lote, qtd = self.salvar_lote_bronze_worker(session, resultados, codigo_modalidade)
-            logger.info(f"📦 Mod {codigo_modalidade} | Pág {pagina} | Novos: {qtd}")
-
-            return data_max_lote
+            return escrita.enviar(codigo_modalidade, resultados)
 
         except Exception as e:
+            # Propaga para buscar_dados não marcar o shard como concluído
             logger.error(f"Erro na página {pagina}: {e}")
-            return None
-        finally:
-            session.close()
+            raise
 
-    def salvar_lote_bronze_worker(self, session, lista_licitacoes, codigo_modalidade):
-        """Versão do salvar_lote_bronze para workers paralelos com sessão própria."""
-        data_maxima_lote = None
-        processados_contagem = 0
-
-        # Usar INSERT ... ON CONFLICT para evitar race conditions
-        sql_insert_update = text("""
-            INSERT INTO bronze_pncp_licitacoes (
-                identificador_pncp, data_publicacao, codigo_modalidade, payload, status_processamento
-            ) VALUES (
-                :identificador_pncp, :data_publicacao, :codigo_modalidade, :payload, 'PENDING'
-            )
-            ON CONFLICT (identificador_pncp)
-            DO UPDATE SET
-                payload = EXCLUDED.payload,
-                data_publicacao = EXCLUDED.data_publicacao
-            WHERE bronze_pncp_licitacoes.payload::text != EXCLUDED.payload::text
-        """)
+    def salvar_paginas_bronze(self, session, paginas):
+        """
+        Caminho de escrita em lote: grava uma ou mais páginas em uma única transação.
 
-        for item in lista_licitacoes:
-            chave_unica = item.get('numeroControlePNCP')
-            data_pub_item = datetime.strptime(item['dataPublicacaoPncp'], "%Y-%m-%dT%H:%M:%S")
+        As linhas vão por COPY para uma tabela temporária e são mescladas no Bronze com
+        um único INSERT ... SELECT ... ON CONFLICT. Se o caminho em lote falhar, cai para
+        o upsert linha a linha (com savepoints) para não perder a página inteira.
 
-            if data_maxima_lote is None or data_pub_item > data_maxima_lote:
-                data_maxima_lote = data_pub_item
+        Args:
+            session: sessão SQLAlchemy própria do chamador
+            paginas: lista de tuplas (codigo_modalidade, lista_licitacoes)
 
-            try:
-                # Executar INSERT com ON CONFLICT
-                result = session.execute(sql_insert_update, {
-                    'identificador_pncp': chave_unica,
-                    'data_publicacao': data_pub_item,
-                    'codigo_modalidade': codigo_modalidade,
-                    'payload': json.dumps(item)  # Converter dict para JSON string
-                })
+        Returns:
+            (data_maxima_lote, contagem) onde contagem tem inseridos/atualizados/inalterados
+        """
+        data_maxima_lote = None
+        linhas = []
+
+        for codigo_modalidade, lista_licitacoes in paginas:
+            for item in lista_licitacoes:
+                data_pub_item = datetime.strptime(item['dataPublicacaoPncp'], "%Y-%m-%dT%H:%M:%S")
+                if data_maxima_lote is None or data_pub_item > data_maxima_lote:
+                    data_maxima_lote = data_pub_item
+
+                linhas.append((
+                    len(linhas),
+                    item.get('numeroControlePNCP'),
+                    data_pub_item.isoformat(),
+                    codigo_modalidade,
+                    json_codec.dumps(item),
+                    calcular_hash(item)
+                ))
+
+        contagem = {"inseridos": 0, "atualizados": 0, "inalterados": 0}
+        if not linhas:
+            return data_maxima_lote, contagem
+
+        try:
+            contagem = self._merge_bronze_copy(session, linhas)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"⚠️ Escrita em lote falhou ({e}), usando upsert linha a linha")
+            contagem = self._merge_bronze_linha_a_linha(session, linhas)
+
+        for codigo_modalidade, lista_licitacoes in paginas:
+            PAGINAS_GRAVADAS.inc(modalidade=codigo_modalidade)
+            LINHAS_GRAVADAS.inc(len(lista_licitacoes), modalidade=codigo_modalidade)
+        for resultado, quantidade in contagem.items():
+            RESULTADO_UPSERT.inc(quantidade, resultado=resultado)
+
+        return data_maxima_lote, contagem
+
+    def _merge_bronze_copy(self, session, linhas):
+        # ON COMMIT DROP: a staging vive só nesta transação (compatível com poolers em modo transação)
+        session.execute(text("""
+            CREATE TEMP TABLE tmp_bronze_licitacoes (
+                ordem integer,
+                identificador_pncp text,
+                data_publicacao timestamp,
+                codigo_modalidade integer,
+                payload jsonb,
+                payload_hash varchar(64)
+            ) ON COMMIT DROP
+        """))
+        copiar_linhas(
+            session, "tmp_bronze_licitacoes",
+            ["ordem", "identificador_pncp", "data_publicacao", "codigo_modalidade", "payload", "payload_hash"],
+            linhas
+        )
+
+        # DISTINCT ON: se a mesma licitação vier repetida no lote, vale a última ocorrência
+        resultado = session.execute(text(f"""
+            WITH mesclados AS (
+                INSERT INTO bronze_pncp_licitacoes (
+                    identificador_pncp, data_publicacao, codigo_modalidade, payload,
+                    payload_hash, payload_alterado_em, status_processamento
+                )
+                SELECT DISTINCT ON (identificador_pncp)
+                    identificador_pncp, data_publicacao, codigo_modalidade, payload,
+                    payload_hash, now(), 'PENDING'
+                FROM tmp_bronze_licitacoes
+                ORDER BY identificador_pncp, ordem DESC
+                ON CONFLICT (identificador_pncp)
+                DO UPDATE SET
+                    payload = EXCLUDED.payload,
+                    payload_hash = EXCLUDED.payload_hash,
+                    payload_alterado_em = EXCLUDED.payload_alterado_em,
+                    data_publicacao = EXCLUDED.data_publicacao,
+                    status_processamento = 'PENDING'
+                WHERE bronze_pncp_licitacoes.payload_hash IS DISTINCT FROM EXCLUDED.payload_hash
+                RETURNING id, (xmax = 0) AS inserido
+            ){cte_enfileirar("bronze_pncp_licitacoes", "mesclados")}
+            SELECT
+                (SELECT COUNT(DISTINCT identificador_pncp) FROM tmp_bronze_licitacoes) AS total,
+                COUNT(*) FILTER (WHERE inserido) AS inseridos,
+                COUNT(*) FILTER (WHERE NOT inserido) AS atualizados
+            FROM mesclados
+        """)).fetchone()
+
+        total, inseridos, atualizados = resultado
+        return {
+            "inseridos": inseridos,
+            "atualizados": atualizados,
+            "inalterados": total - inseridos - atualizados,
+        }
 
-                processados_contagem += 1
+    def _merge_bronze_linha_a_linha(self, session, linhas):
+        sql_insert_update = text(f"""
+            WITH mesclado AS (
+                INSERT INTO bronze_pncp_licitacoes (
+                    identificador_pncp, data_publicacao, codigo_modalidade, payload,
+                    payload_hash, payload_alterado_em, status_processamento
+                ) VALUES (
+                    :identificador_pncp, :data_publicacao, :codigo_modalidade, :payload,
+                    :payload_hash, now(), 'PENDING'
+                )
+                ON CONFLICT (identificador_pncp)
+                DO UPDATE SET
+                    payload = EXCLUDED.payload,
+                    payload_hash = EXCLUDED.payload_hash,
+                    payload_alterado_em = EXCLUDED.payload_alterado_em,
+                    data_publicacao = EXCLUDED.data_publicacao,
+                    status_processamento = 'PENDING'
+                WHERE bronze_pncp_licitacoes.payload_hash IS DISTINCT FROM EXCLUDED.payload_hash
+                RETURNING id, (xmax = 0) AS inserido
+            ){cte_enfileirar("bronze_pncp_licitacoes", "mesclado")}
+            SELECT inserido FROM mesclado
+        """)
 
+        contagem = {"inseridos": 0, "atualizados": 0, "inalterados": 0}
+        for _, chave_unica, data_pub, codigo_modalidade, payload, payload_hash in linhas:
+            try:
+                # Savepoint por linha: um registro ruim não desfaz os anteriores
+                with session.begin_nested():
+                    inserido = session.execute(sql_insert_update, {
+                        'identificador_pncp': chave_unica,
+                        'data_publicacao': data_pub,
+                        'codigo_modalidade': codigo_modalidade,
+                        'payload': payload,
+                        'payload_hash': payload_hash
+                    }).scalar()
             except Exception as e:
                 logger.error(f"Erro ao processar {chave_unica}: {e}")
-                session.rollback()
                 continue
 
-        # Commit final
+            if inserido is None:
+                contagem["inalterados"] += 1
+            elif inserido:
+                contagem["inseridos"] += 1
+            else:
+                contagem["atualizados"] += 1
+
         try:
             session.commit()
         except Exception as e:
             session.rollback()
             logger.error(f"Erro no commit final: {e}")
 
-        logger.info(f"📦 Processados: {processados_contagem} registros")
-        return data_maxima_lote, processados_contagem
-
-
-def run_process(db_url):
-    logger.info("🚀 Iniciando processamento paralelo de modalidades.")
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = []
-        for c, n in MODALIDADES.items():
-            crawler = PNCPCrawler(db_url)
-            agora = datetime.now()
+        return contagem
+
+
+def licitacoes_alteradas_desde(session, desde):
+    """
+    Licitações inseridas ou com mudança real de payload desde `desde`
+    (ex.: o horário de início de uma execução do crawler), sem ler os payloads.
+
+    Returns:
+        Lista de tuplas (id, identificador_pncp, payload_hash)
+    """
+    return session.execute(text("""
+        SELECT id, identificador_pncp, payload_hash
+        FROM bronze_pncp_licitacoes
+        WHERE payload_alterado_em >= :desde
+        ORDER BY id
+    """), {"desde": desde}).fetchall()
+
+
+def gerar_shards(data_inicio, data_fim, dias=None):
+    """Divide [data_inicio, data_fim] (datas, inclusivo) em janelas de `dias` dias."""
+    dias = dias or SHARD_DIAS
+    shards = []
+    atual = data_inicio
+    while atual <= data_fim:
+        fim = min(atual + timedelta(days=dias - 1), data_fim)
+        shards.append((atual, fim))
+        atual = fim + timedelta(days=1)
+    return shards
+
+def planejar_shards(crawler, data_inicial=None):
+    """
+    Monta a lista de shards pendentes de todas as modalidades.
+
+    Sem `data_inicial`, cada modalidade começa na última data coletada (ou 7 dias atrás);
+    com ela (backfill), todas começam na data informada.
+
+    Returns:
+        Lista de tuplas (codigo_modalidade, data_inicio, data_fim)
+    """
+    hoje = date.today()
+    shards = []
+    for c in MODALIDADES:
+        if data_inicial:
+            inicio = data_inicial
+        else:
             ultima_data = crawler.obter_ultima_data_banco(c)
-            data_ini = ultima_data if ultima_data else (agora - timedelta(days=7))
+            inicio = ultima_data.date() if ultima_data else (hoje - timedelta(days=7))
+        for data_ini, data_fim in crawler.shards_pendentes(c, inicio, hoje):
+            shards.append((c, data_ini, data_fim))
+    return shards
+
+def consolidar_progresso(crawler, resumo_por_modalidade):
+    """
+    Avança o ProgressoColeta das modalidades cujos shards terminaram todos com sucesso e
+    descarta os checkpoints que ficaram para trás. Modalidades com falha mantêm progresso
+    e checkpoints: a próxima execução refaz só os shards não concluídos.
+    """
+    concluidas = []
+    for c, resumo in resumo_por_modalidade.items():
+        if resumo["falhas"]:
+            logger.warning(f"⚠️ Mod {c}: {resumo['falhas']} shard(s) com falha, progresso e checkpoints mantidos")
+            continue
+        concluidas.append(c)
+        if resumo["data_max"]:
+            crawler.atualizar_progresso(c, resumo["data_max"])
+    crawler.podar_shards(concluidas)
+
+def registrar_vazao(duracao, workers_por_papel=None):
+    """Converte os contadores da execução em taxas (páginas/s, linhas/s, utilização dos workers)."""
+    DURACAO_EXECUCAO.definir(round(duracao, 2))
+    if duracao <= 0:
+        return
+    for chave, paginas in PAGINAS_GRAVADAS.snapshot().items():
+        VAZAO_PAGINAS.definir(round(paginas / duracao, 3), **dict(chave))
+    for chave, linhas in LINHAS_GRAVADAS.snapshot().items():
+        VAZAO_LINHAS.definir(round(linhas / duracao, 3), **dict(chave))
+    for papel, quantidade in (workers_por_papel or {}).items():
+        ocupado = OCUPACAO_WORKERS.valor(papel=papel)
+        UTILIZACAO_WORKERS.definir(round(ocupado / (quantidade * duracao), 3), papel=papel)
+
+def data_maxima_publicacao(lista_licitacoes):
+    """Maior dataPublicacaoPncp de uma página (usada no checkpoint por shard)."""
+    datas = [item['dataPublicacaoPncp'] for item in lista_licitacoes if item.get('dataPublicacaoPncp')]
+    return datetime.strptime(max(datas), "%Y-%m-%dT%H:%M:%S") if datas else None
+
+def formatar_contagem(contagem):
+    return f"Novos: {contagem['inseridos']} | Atualizados: {contagem['atualizados']} | Inalterados: {contagem['inalterados']}"
+
+
+def processar_shard(crawler, escrita, codigo_modalidade, data_inicio, data_fim):
+    """Baixa um shard, espera a gravação das páginas e grava seu checkpoint."""
+    sucesso, data_max, paginas = crawler.buscar_dados(
+        data_inicio.strftime("%Y%m%d"), data_fim.strftime("%Y%m%d"), codigo_modalidade, escrita
+    )
+    crawler.marcar_shard(codigo_modalidade, data_inicio, data_fim, sucesso, paginas)
+    return sucesso, data_max
+
+def run_process(db_url, data_inicial=None):
+    logger.info("🚀 Iniciando processamento paralelo de modalidades.")
+    # Até 5 páginas simultâneas por shard (ver buscar_dados)
+    http_client.configurar_pool(MAX_WORKERS * 5)
+
+    inicio = time.monotonic()
+    crawler = PNCPCrawler(db_url)
+    try:
+        shards = planejar_shards(crawler, data_inicial)
+        logger.info(f"🧩 {len(shards)} shards pendentes ({SHARD_DIAS} dia(s) cada), {ESCRITORES} escritor(es)")
+
+        resumo = {c: {"data_max": None, "falhas": 0} for c in MODALIDADES}
+        with _EscritaEmLote(crawler, ESCRITORES) as escrita, ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {
+                executor.submit(processar_shard, crawler, escrita, c, data_ini, data_fim): c
+                for c, data_ini, data_fim in shards
+            }
+
+            for future in as_completed(futures):
+                c = futures[future]
+                try:
+                    sucesso, data_max = future.result()
+                except Exception as e:
+                    logger.error(f"Erro no shard da modalidade {c}: {e}")
+                    sucesso, data_max = False, None
+                if not sucesso:
+                    resumo[c]["falhas"] += 1
+                if data_max and (resumo[c]["data_max"] is None or data_max > resumo[c]["data_max"]):
+                    resumo[c]["data_max"] = data_max
+
+        consolidar_progresso(crawler, resumo)
+    finally:
+        crawler.fechar_sessao()
+        registrar_vazao(time.monotonic() - inicio, {"escrita": ESCRITORES})
+
+    logger.info(f"🚦 Taxa final da API: {http_client.taxa_atual():.1f} req/s")
+    logger.info("✅ Todas as modalidades processadas.")
 
-            futures.append(executor.submit(crawler.buscar_dados, data_ini.strftime("%Y%m%d"), agora.strftime("%Y%m%d"), c))
+# --- ESCRITA EM LOTE ---
+def _salvar_paginas(crawler, paginas):
+    """Grava várias páginas numa única transação (thread de escrita, fora do event loop no modo async)."""
+    session = crawler.Session()
+    try:
+        return crawler.salvar_paginas_bronze(session, paginas)
+    finally:
+        session.close()
+
+class _EscritaEmLote:
+    """
+    Gravação do modo threads: os workers de página só baixam e entregam as páginas a uma
+    fila limitada (TAMANHO_FILA_ESCRITA); `escritores` threads de banco a drenam gravando
+    até PAGINAS_POR_TRANSACAO páginas por transação. A fila cheia segura os downloads
+    quando o banco atrasa, como no _PipelineCrawl do modo async.
+    """
+
+    def __init__(self, crawler, escritores):
+        self.crawler = crawler
+        self.fila = queue.Queue(maxsize=TAMANHO_FILA_ESCRITA)
+        self.threads = [threading.Thread(target=self._worker, name=f"escritor-{i}", daemon=True) for i in range(escritores)]
+
+    def __enter__(self):
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *_):
+        # Um marcador de fim por escritor, depois das páginas já entregues
+        for _ in self.threads:
+            self.fila.put(None)
+        for thread in self.threads:
+            thread.join()
+
+    def enviar(self, codigo_modalidade, resultados):
+        """
+        Entrega uma página para gravação; bloqueia enquanto a fila estiver cheia.
+
+        Returns: Future que resolve com a data máxima da página quando ela for gravada
+        """
+        gravacao = Future()
+        self.fila.put((codigo_modalidade, resultados, gravacao))
+        PROFUNDIDADE_FILA.maximo(self.fila.qsize(), fila="escrita")
+        return gravacao
+
+    def _proximo_lote(self):
+        """Bloqueia pela primeira página e junta as que já estão na fila. Returns: (lote, fim)"""
+        primeira = self.fila.get()
+        if primeira is None:
+            return [], True
+        lote = [primeira]
+        while len(lote) < PAGINAS_POR_TRANSACAO:
+            try:
+                proxima = self.fila.get_nowait()
+            except queue.Empty:
+                break
+            if proxima is None:
+                return lote, True
+            lote.append(proxima)
+        return lote, False
+
+    def _worker(self):
+        fim = False
+        while not fim:
+            lote, fim = self._proximo_lote()
+            if not lote:
+                continue
+            try:
+                with Cronometro(OCUPACAO_WORKERS, papel="escrita"):
+                    _, contagem = _salvar_paginas(self.crawler, [(c, resultados) for c, resultados, _ in lote])
+                logger.info(f"📦 Lote de {len(lote)} página(s) gravado | {formatar_contagem(contagem)}")
+                for _, resultados, gravacao in lote:
+                    gravacao.set_result(data_maxima_publicacao(resultados))
+            except Exception as e:
+                logger.error(f"Erro ao gravar lote de {len(lote)} página(s): {e}")
+                for _, _, gravacao in lote:
+                    gravacao.set_exception(e)
+
+# --- MODO ASSÍNCRONO ---
+
+class _PipelineCrawl:
+    """
+    Pipeline do modo assíncrono:
+
+    - `concorrencia` workers de download (corrotinas sobre http_client.get_async, sem
+      thread por requisição; o ritmo vem do limitador adaptativo) consomem a fila de
+      unidades (shard, página) e empurram as páginas baixadas para uma fila de escrita limitada;
+    - `escritores` workers de banco drenam essa fila gravando até PAGINAS_POR_TRANSACAO
+      páginas por transação.
+
+    Os downloads não seguram conexões de banco, e a fila cheia segura os downloads quando
+    o banco atrasa. Cada shard grava seu checkpoint quando sua última página é gravada.
+    """
+
+    def __init__(self, crawler, shards, concorrencia, escritores):
+        self.crawler = crawler
+        self.concorrencia = concorrencia
+        self.escritores = escritores
+        self.fila_download = asyncio.Queue()
+        self.fila_escrita = asyncio.Queue(maxsize=TAMANHO_FILA_ESCRITA)
+        self.shards = shards
+        # "pendentes": páginas do shard ainda não baixadas e gravadas
+        self.estado = {shard: {"data_max": None, "falhas": 0, "paginas": 0, "pendentes": 1} for shard in shards}
+
+    async def _concluir_unidade(self, shard):
+        atual = self.estado[shard]
+        atual["pendentes"] -= 1
+        if atual["pendentes"] == 0:
+            await asyncio.to_thread(self.crawler.marcar_shard, *shard, atual["falhas"] == 0, atual["paginas"])
+
+    async def _baixar(self, shard, pagina):
+        """Baixa uma página; a página 1 enfileira as demais páginas do shard. Retorna os resultados."""
+        codigo_modalidade, data_ini, data_fim = shard
+        dados = await self.crawler.requisitar_pagina_async(
+            data_ini.strftime("%Y%m%d"), data_fim.strftime("%Y%m%d"), codigo_modalidade, pagina
+        )
+        if dados is None:
+            self.estado[shard]["falhas"] += 1
+            return None
+        if not dados:
+            if pagina == 1:
+                logger.info(f"📭 Mod {codigo_modalidade} [{data_ini}]: Nenhuma licitação encontrada")
+            return None
 
-        for future in as_completed(futures):
-            future.result() # Garante que esperamos o fim de cada modalidade
+        if pagina == 1:
+            total_paginas = dados.get('totalPaginas', 1)
+            ultima_pagina = total_paginas
+            if LIMITE_PAGINAS_POR_MODALIDADE:
+                ultima_pagina = min(total_paginas, LIMITE_PAGINAS_POR_MODALIDADE)
+            logger.info(f"📊 Mod {codigo_modalidade} [{data_ini}]: Encontradas {total_paginas} páginas totais")
+            for pag in range(2, ultima_pagina + 1):
+                self.estado[shard]["pendentes"] += 1
+                self.fila_download.put_nowait((shard, pag))
+            PROFUNDIDADE_FILA.maximo(self.fila_download.qsize(), fila="download")
+
+        return dados.get('data', [])
+
+    async def worker_download(self):
+        while True:
+            shard, pagina = await self.fila_download.get()
+            resultados = None
+            try:
+                with Cronometro(OCUPACAO_WORKERS, papel="download"):
+                    resultados = await self._baixar(shard, pagina)
+                if resultados:
+                    # Bloqueia quando a fila de escrita está cheia (backpressure do banco)
+                    await self.fila_escrita.put((shard, pagina, resultados))
+                    PROFUNDIDADE_FILA.maximo(self.fila_escrita.qsize(), fila="escrita")
+            except Exception as e:
+                self.estado[shard]["falhas"] += 1
+                logger.error(f"Erro na página {pagina} (Mod {shard[0]} [{shard[1]}]): {e}")
+            finally:
+                if not resultados:
+                    await self._concluir_unidade(shard)
+                self.fila_download.task_done()
+
+    async def worker_escrita(self):
+        while True:
+            lote = [await self.fila_escrita.get()]
+            while len(lote) < PAGINAS_POR_TRANSACAO and not self.fila_escrita.empty():
+                lote.append(self.fila_escrita.get_nowait())
 
+            try:
+                with Cronometro(OCUPACAO_WORKERS, papel="escrita"):
+                    _, contagem = await asyncio.to_thread(
+                        _salvar_paginas, self.crawler, [(shard[0], resultados) for shard, _, resultados in lote]
+                    )
+                logger.info(f"📦 Lote de {len(lote)} página(s) gravado | {formatar_contagem(contagem)}")
+                for shard, _, resultados in lote:
+                    atual = self.estado[shard]
+                    atual["paginas"] += 1
+                    data_max = data_maxima_publicacao(resultados)
+                    if data_max and (atual["data_max"] is None or data_max > atual["data_max"]):
+                        atual["data_max"] = data_max
+            except Exception as e:
+                logger.error(f"Erro ao gravar lote de {len(lote)} página(s): {e}")
+                for shard, _, _ in lote:
+                    self.estado[shard]["falhas"] += 1
+            finally:
+                for shard, _, _ in lote:
+                    await self._concluir_unidade(shard)
+                    self.fila_escrita.task_done()
+
+    async def executar(self):
+        # Só o banco roda em threads (escritores + checkpoints dos shards); o HTTP é assíncrono
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.escritores + 2))
+
+        for shard in self.shards:
+            self.fila_download.put_nowait((shard, 1))
+
+        async with http_client.sessao_async():
+            workers = [asyncio.create_task(self.worker_download()) for _ in range(self.concorrencia)]
+            workers += [asyncio.create_task(self.worker_escrita()) for _ in range(self.escritores)]
+            try:
+                # Downloads terminam primeiro (a página 1 só sai da fila depois de enfileirar as demais)
+                await self.fila_download.join()
+                await self.fila_escrita.join()
+            finally:
+                for w in workers:
+                    w.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+        return self.estado
+
+def run_process_async(db_url, concorrencia=None, data_inicial=None):
+    """Crawl de todos os shards em um único event loop com limite global de concorrência."""
+    concorrencia = concorrencia or CONCORRENCIA_ASYNC
+    logger.info(f"🚀 Iniciando processamento assíncrono de modalidades (concorrência: {concorrencia}, escritores: {ESCRITORES}).")
+
+    inicio = time.monotonic()
+    crawler = PNCPCrawler(db_url)
+    try:
+        shards = planejar_shards(crawler, data_inicial)
+        logger.info(f"🧩 {len(shards)} shards pendentes ({SHARD_DIAS} dia(s) cada)")
+
+        pipeline = _PipelineCrawl(crawler, shards, concorrencia, ESCRITORES)
+        estado = asyncio.run(pipeline.executar())
+
+        resumo = {c: {"data_max": None, "falhas": 0} for c in MODALIDADES}
+        for (c, _, _), atual in estado.items():
+            if atual["falhas"]:
+                resumo[c]["falhas"] += 1
+            if atual["data_max"] and (resumo[c]["data_max"] is None or atual["data_max"] > resumo[c]["data_max"]):
+                resumo[c]["data_max"] = atual["data_max"]
+
+        consolidar_progresso(crawler, resumo)
+    finally:
+        crawler.fechar_sessao()
+        registrar_vazao(time.monotonic() - inicio, {"download": concorrencia, "escrita": ESCRITORES})
+
+    logger.info(f"🚦 Taxa final da API: {http_client.taxa_atual():.1f} req/s")
     logger.info("✅ Todas as modalidades processadas.")
 
-def run_crawler_process():
-    """Executa o crawler sem retornar resposta Flask (para uso em scripts)."""
-    run_process(DB_CONNECTION_STRING)
-    return {"status": "success", "message": "Crawler finished"}
+def executar_crawler(db_url, data_inicial=None):
+    """Executa o crawler no modo configurado em CRAWLER_MODO."""
+    if MODO_CRAWLER == "async":
+        if http_client.async_disponivel():
+            run_process_async(db_url, data_inicial=data_inicial)
+            return
+        logger.warning("⚠️ CRAWLER_MODO=async requer aiohttp (pip install aiohttp); usando o modo threads")
+    run_process(db_url, data_inicial=data_inicial)
+
+def run_crawler_process(data_inicial=None):
+    """
+    Executa o crawler sem retornar resposta Flask (para uso em scripts).
+
+    Args:
+        data_inicial: date opcional para backfill (ignora o progresso salvo; shards já
+                      concluídos são pulados. Os checkpoints só são podados quando a
+                      modalidade termina sem falhas, então repetir um backfill interrompido
+                      baixa apenas os shards que faltaram)
+    """
+    # O início da execução serve de marco para licitacoes_alteradas_desde()
+    inicio = datetime.now()
+    executar_crawler(DB_CONNECTION_STRING, data_inicial)
+    return {"status": "success", "message": "Crawler finished", "inicio": inicio.isoformat()}
+
+def run_backfill_payload_hash():
+    """Preenche payload_hash das licitações antigas (para uso em scripts)."""
+    crawler = PNCPCrawler(DB_CONNECTION_STRING)
+    try:
+        total = backfill_payload_hash(crawler.engine, "bronze_pncp_licitacoes")
+    finally:
+        crawler.fechar_sessao()
+    return {"status": "success", "atualizadas": total}
 
 def handle_crawler():
     """Handler Flask para a API (mantido para compatibilidade)."""
-    run_process(DB_CONNECTION_STRING)
+    executar_crawler(DB_CONNECTION_STRING)
     return jsonify({"status": "success", "message": "Crawler finished"}), 200
@@ -0,0 +1,109 @@
+"""
+Registro único de engines SQLAlchemy por processo.
+
+Todos os módulos (crawler, coletor de itens, Silver, notificações) pegam o engine daqui,
+então o processo inteiro compartilha um só pool de conexões dimensionado pela
+configuração, em vez de um engine (e um pool) por classe/chamada. A criação de schema
+também acontece uma única vez por processo para cada `Base`.
+"""
+
+import os
+import logging
+import threading
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from dotenv import load_dotenv
+from api import json_codec
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURAÇÕES ---
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "120"))  # segundos esperando conexão livre (backpressure)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# "pgbouncer"/"supavisor": o pooler externo já reaproveita conexões, então não mantemos pool local.
+# Vazio = detecta pela porta 6543 (pooler em modo transação do Supabase).
+DB_POOLER = os.getenv("DB_POOLER", "").lower()
+
+_engines = {}
+_schemas_criados = set()
+_lock = threading.Lock()
+
+
+def normalizar_url(db_url):
+    """SQLAlchemy 2.0+ exige o prefixo postgresql:// (Supabase/Pooler usam postgres://)."""
+    if db_url and db_url.startswith("postgres://"):
+        db_url = db_url.replace("postgres://", "postgresql://", 1)
+    return db_url
+
+
+def _usa_pooler_externo(db_url):
+    if DB_POOLER:
+        return DB_POOLER not in ("0", "false", "none", "off")
+    return ":6543/" in db_url
+
+
+def get_engine(db_url=None):
+    """Retorna o engine do processo para `db_url` (padrão: DATABASE_URL), criando-o uma vez."""
+    db_url = normalizar_url(db_url or os.getenv("DATABASE_URL"))
+    if not db_url:
+        raise RuntimeError("DATABASE_URL não configurada")
+
+    with _lock:
+        engine = _engines.get(db_url)
+        if engine is None:
+            # Colunas JSON/JSONB do ORM serializam/decodificam com o codec rápido
+            codec = {"json_serializer": json_codec.dumps, "json_deserializer": json_codec.loads}
+            if _usa_pooler_externo(db_url):
+                engine = create_engine(db_url, poolclass=NullPool, **codec)
+                logger.info("🔌 Engine criado (pooler externo, sem pool local)")
+            else:
+                engine = create_engine(
+                    db_url,
+                    **codec,
+                    pool_size=DB_POOL_SIZE,
+                    max_overflow=DB_MAX_OVERFLOW,
+                    pool_timeout=DB_POOL_TIMEOUT,
+                    pool_recycle=DB_POOL_RECYCLE,
+                    pool_pre_ping=True,
+                )
+                logger.info(f"🔌 Engine criado (pool {DB_POOL_SIZE} + {DB_MAX_OVERFLOW} overflow)")
+            # JSONB lido em queries text() (ex.: Silver) também passa pelo codec
+            json_codec.registrar_jsonb(engine)
+            _engines[db_url] = engine
+        return engine
+
+
+def get_sessionmaker(db_url=None):
+    return sessionmaker(bind=get_engine(db_url))
+
+
+def criar_schema(base, engine, migracao=None):
+    """
+    Executa `base.metadata.create_all` (e a migração opcional) uma única vez por processo.
+
+    Args:
+        base: declarative_base do módulo
+        engine: engine retornado por get_engine()
+        migracao: função opcional migracao(engine) para ALTER TABLEs idempotentes
+    """
+    chave = (id(base.metadata), str(engine.url))
+    with _lock:
+        if chave in _schemas_criados:
+            return
+        base.metadata.create_all(engine)
+        if migracao:
+            migracao(engine)
+        _schemas_criados.add(chave)
+
+
+def dispose_all():
+    """Fecha todos os pools (fim de scripts)."""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
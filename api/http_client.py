@@ -0,0 +1,254 @@
+"""
+Cliente HTTP compartilhado para as chamadas à API do PNCP.
+
+Mantém uma única `requests.Session` por processo, com pool de conexões keep-alive
+dimensionado pelo número de workers, compressão gzip e retries com backoff + jitter
+em 429/5xx/timeouts. Cada tentativa passa pelo limitador adaptativo
+(api/rate_limiter.py), que é compartilhado pelo crawler e pelo coletor de itens.
+Com PNCP_CACHE_MODO=record/replay as respostas são gravadas/servidas do disco
+(api/response_cache.py).
+
+Os modos async usam get_async(): a mesma política (limitador, retries, cache) sobre
+aiohttp, com as requisições em voo como corrotinas em vez de threads. Assim quem limita
+a concorrência é o limitador adaptativo, não o tamanho de um pool de threads.
+"""
+
+import os
+import re
+import time
+import random
+import asyncio
+import logging
+import threading
+import contextlib
+import requests
+from requests.adapters import HTTPAdapter
+from api.rate_limiter import LimitadorAdaptativo
+from api import response_cache
+from api.metrics import registro
+
+try:
+    import aiohttp
+except ImportError:  # Dependência opcional (modos async do crawler e do coletor de itens)
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURAÇÕES ---
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "4"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))  # segundos (base exponencial)
+HTTP_BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER", "0.5"))  # segundos (máximo aleatório somado)
+HTTP_BACKOFF_MAXIMO = 60.0
+# Sockets simultâneos de get_async() (0 = sem limite: o ritmo vem do limitador adaptativo)
+HTTP_CONEXOES_ASYNC = int(os.getenv("HTTP_CONEXOES_ASYNC", "0"))
+
+STATUS_RETRY = (429, 500, 502, 503, 504)
+
+HEADERS_PADRAO = {
+    'User-Agent': 'Crawler-SaaS/1.0',
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+# Limitador único do processo (crawler + coletor de itens)
+limitador = LimitadorAdaptativo()
+
+LATENCIA_HTTP = registro.histograma("pncp_http_requisicao_segundos", "Latência das requisições ao PNCP por endpoint e status")
+TAXA_LIMITADOR = registro.gauge("pncp_http_taxa_limitador", "Taxa atual do limitador adaptativo (req/s)")
+
+_sessao = None
+_pool_atual = 0
+_lock = threading.Lock()
+_sessao_async = None
+
+
+def configurar_pool(pool_size):
+    """Garante que o pool comporte `pool_size` conexões simultâneas (chamado por quem cria os workers)."""
+    global _sessao, _pool_atual
+    with _lock:
+        if _sessao is None:
+            _sessao = requests.Session()
+            _sessao.headers.update(HEADERS_PADRAO)
+        if pool_size > _pool_atual:
+            # O adapter substituído é fechado para não deixar as conexões do pool antigo abertas
+            anteriores = {id(a): a for a in (_sessao.get_adapter("https://"), _sessao.get_adapter("http://"))}
+            # Sem retries no urllib3: as tentativas são feitas em get() para passar pelo limitador
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+            _sessao.mount("https://", adapter)
+            _sessao.mount("http://", adapter)
+            for anterior in anteriores.values():
+                anterior.close()
+            _pool_atual = pool_size
+        return _sessao
+
+
+def obter_sessao():
+    """Retorna a sessão HTTP do processo, criando-a com HTTP_POOL_SIZE se necessário."""
+    if _sessao is not None:
+        return _sessao
+    return configurar_pool(HTTP_POOL_SIZE)
+
+
+def _tempo_backoff(tentativa, response=None):
+    """Backoff exponencial com jitter; respeita Retry-After quando a API informa."""
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), HTTP_BACKOFF_MAXIMO)
+    backoff = min(HTTP_BACKOFF * (2 ** tentativa), HTTP_BACKOFF_MAXIMO)
+    return backoff + random.uniform(0, HTTP_BACKOFF_JITTER)
+
+
+def _montar_resposta(url, status_code, corpo, headers=None):
+    """requests.Response com corpo já lido (cache e get_async devolvem o mesmo tipo que get)."""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = corpo
+    response.url = url
+    response.headers.update(headers or {'Content-Type': 'application/json'})
+    response.encoding = 'utf-8'
+    return response
+
+
+def _resposta_gravada(url, params):
+    """Monta um requests.Response a partir do cache (modo replay)."""
+    status_code, corpo = response_cache.ler(url, params)
+    return _montar_resposta(url, status_code, corpo)
+
+
+def get(url, params=None, timeout=30):
+    """
+    GET via sessão compartilhada (keep-alive, gzip, limitador adaptativo e retries).
+
+    Retorna a última resposta mesmo quando o status continua de erro após os retries;
+    exceções de rede só sobem depois de esgotadas as tentativas.
+    """
+    if response_cache.reproduzindo():
+        return _resposta_gravada(url, params)
+
+    response = _get_rede(url, params, timeout)
+    if response_cache.deve_gravar(response.status_code):
+        response_cache.gravar(url, params, response.status_code, response.content)
+    return response
+
+
+def _endpoint(url):
+    """Caminho da URL com segmentos numéricos genéricos (cnpj/ano/sequencial), para label de métrica."""
+    caminho = url.split("://", 1)[-1].split("/", 1)[-1]
+    return "/" + re.sub(r"/\d+", "/{n}", "/" + caminho).lstrip("/")
+
+
+def _registrar(url, status, latencia):
+    limitador.registrar(status, latencia)
+    LATENCIA_HTTP.observar(latencia, endpoint=_endpoint(url), status=status if status is not None else "erro")
+    TAXA_LIMITADOR.definir(round(limitador.taxa, 2))
+
+
+def _get_rede(url, params, timeout):
+    sessao = obter_sessao()
+    tentativa = 0
+
+    while True:
+        limitador.adquirir()
+        inicio = time.monotonic()
+        try:
+            response = sessao.get(url, params=params, timeout=timeout)
+        except (requests.Timeout, requests.ConnectionError) as e:
+            _registrar(url, None, time.monotonic() - inicio)
+            if tentativa >= HTTP_MAX_RETRIES:
+                raise
+            espera = _tempo_backoff(tentativa)
+            logger.warning(f"🔁 {type(e).__name__} em {url} (tentativa {tentativa + 1}), nova tentativa em {espera:.1f}s")
+        else:
+            _registrar(url, response.status_code, time.monotonic() - inicio)
+            if response.status_code not in STATUS_RETRY or tentativa >= HTTP_MAX_RETRIES:
+                return response
+            espera = _tempo_backoff(tentativa, response)
+            logger.warning(f"🔁 Status {response.status_code} em {url} (tentativa {tentativa + 1}), nova tentativa em {espera:.1f}s")
+
+        tentativa += 1
+        time.sleep(espera)
+
+
+def async_disponivel():
+    """True se o cliente assíncrono (aiohttp) está instalado."""
+    return aiohttp is not None
+
+
+@contextlib.asynccontextmanager
+async def sessao_async(conexoes=None):
+    """
+    Abre a sessão aiohttp usada por get_async() enquanto o bloco roda (uma por event loop).
+
+    Args:
+        conexoes: limite de sockets simultâneos (padrão HTTP_CONEXOES_ASYNC; 0 = sem limite)
+    """
+    global _sessao_async
+    if aiohttp is None:
+        raise RuntimeError("Modo async requer aiohttp (pip install aiohttp)")
+    conector = aiohttp.TCPConnector(limit=HTTP_CONEXOES_ASYNC if conexoes is None else conexoes)
+    async with aiohttp.ClientSession(connector=conector, headers=HEADERS_PADRAO) as sessao:
+        _sessao_async = sessao
+        try:
+            yield sessao
+        finally:
+            _sessao_async = None
+
+
+async def get_async(url, params=None, timeout=30):
+    """
+    Versão assíncrona de get(): mesmo limitador, retries e cache, sem ocupar uma thread
+    por requisição. Exige uma sessao_async() aberta no event loop.
+    """
+    if response_cache.reproduzindo():
+        return await asyncio.to_thread(_resposta_gravada, url, params)
+
+    response = await _get_rede_async(url, params, timeout)
+    if response_cache.deve_gravar(response.status_code):
+        await asyncio.to_thread(response_cache.gravar, url, params, response.status_code, response.content)
+    return response
+
+
+async def _get_rede_async(url, params, timeout):
+    if _sessao_async is None:
+        raise RuntimeError("get_async() chamado fora de http_client.sessao_async()")
+    tentativa = 0
+
+    while True:
+        await limitador.adquirir_async()
+        inicio = time.monotonic()
+        try:
+            async with _sessao_async.get(url, params=params, timeout=aiohttp.ClientTimeout(total=timeout)) as resposta:
+                corpo = await resposta.read()
+                response = _montar_resposta(url, resposta.status, corpo, resposta.headers)
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            _registrar(url, None, time.monotonic() - inicio)
+            if tentativa >= HTTP_MAX_RETRIES:
+                raise
+            espera = _tempo_backoff(tentativa)
+            logger.warning(f"🔁 {type(e).__name__} em {url} (tentativa {tentativa + 1}), nova tentativa em {espera:.1f}s")
+        else:
+            _registrar(url, response.status_code, time.monotonic() - inicio)
+            if response.status_code not in STATUS_RETRY or tentativa >= HTTP_MAX_RETRIES:
+                return response
+            espera = _tempo_backoff(tentativa, response)
+            logger.warning(f"🔁 Status {response.status_code} em {url} (tentativa {tentativa + 1}), nova tentativa em {espera:.1f}s")
+
+        tentativa += 1
+        await asyncio.sleep(espera)
+
+
+def taxa_atual():
+    """Taxa atual (req/s) do limitador compartilhado."""
+    return limitador.taxa
+
+
+def fechar():
+    """Fecha as conexões do pool (útil ao final de scripts)."""
+    global _sessao, _pool_atual
+    with _lock:
+        if _sessao is not None:
+            _sessao.close()
+        _sessao = None
+        _pool_atual = 0
@@ -1,14 +1,26 @@
-import requests
 import os
-import logging
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed 
+import asyncio
+import uuid
+import socket
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, func, text
+from sqlalchemy import Column, Integer, String, DateTime, Float, Index, func, text
 from sqlalchemy.orm import declarative_base, sessionmaker
 from flask import Flask, jsonify
 from pathlib import Path
 from dotenv import load_dotenv
+from api import http_client, json_codec
+from api.database import get_engine, criar_schema
+from api.copy_utils import copiar_linhas
+from api.payload_hash import calcular_hash
+from api.backfill_hash import backfill_payload_hash
+from api.change_queue import criar_fila, cte_enfileirar, fila_ativa
+from api.item_scheduler import atualizar_prioridades
+from api.circuit_breaker import DisjuntorPorChave
 
 # --- CARREGAMENTO DE CONFIGURAÇÕES ---
 base_dir = Path(__file__).resolve().parent
@@ -26,6 +38,50 @@ logger = logging.getLogger(__name__)
 LIMIT_LOTE = 500
 MAX_WORKERS = 10
 
+# --- MODO DE EXECUÇÃO ---
+# "threads": MAX_WORKERS licitações em andamento; "async": milhares de licitações como
+# corrotinas, com as requisições em aiohttp (requer aiohttp; ritmo ditado pelo limitador)
+MODO_COLETOR = os.getenv("ITENS_MODO", "threads").lower()
+CONCORRENCIA_ASYNC = int(os.getenv("ITENS_CONCORRENCIA_ASYNC", "1000"))  # licitações em andamento
+ESCRITORES_ASYNC = int(os.getenv("ITENS_ESCRITORES", "2"))
+# Licitações gravadas por transação (COPY dos itens + status), nos dois modos
+LICITACOES_POR_TRANSACAO = int(os.getenv("ITENS_LICITACOES_POR_TRANSACAO", "50"))
+TAMANHO_FILA_ESCRITA = int(os.getenv("ITENS_FILA_ESCRITA", "200"))
+
+# --- MODO DRENAGEM ---
+# Continua reivindicando lotes até esvaziar a fila ou estourar o orçamento (0 = sem limite)
+DRENAR = os.getenv("ITENS_DRENAR", "0").lower() in ("1", "true", "sim")
+TEMPO_MAXIMO_SEGUNDOS = int(os.getenv("ITENS_TEMPO_MAXIMO", "0"))
+LIMITE_LICITACOES = int(os.getenv("ITENS_LIMITE_LICITACOES", "0"))
+# Lotes menores na drenagem: só o necessário para manter os workers ocupados fica sob lease
+LOTE_DRENAGEM = MAX_WORKERS * 5
+# Coleta em ordem de prioridade (prazo, demanda por UF, valor) - ver api/item_scheduler.py
+PRIORIZAR = os.getenv("ITENS_PRIORIZAR", "1").lower() in ("1", "true", "sim")
+
+# --- FALHAS (RETRY com backoff exponencial até FAILED) ---
+MAX_TENTATIVAS = int(os.getenv("ITENS_MAX_TENTATIVAS", "5"))
+BACKOFF_BASE_SEGUNDOS = int(os.getenv("ITENS_BACKOFF_BASE", "300"))
+BACKOFF_MAXIMO_SEGUNDOS = 86400
+
+# --- RECOLETA (itens de licitações já coletadas) ---
+RECOLETAR = os.getenv("ITENS_RECOLETAR", "0").lower() in ("1", "true", "sim")
+# Sonda de contagem (/itens/quantidade) para licitações abertas cujo payload não mudou
+MAX_SONDAS_RECOLETA = int(os.getenv("ITENS_RECOLETA_MAX_SONDAS", "500"))
+INTERVALO_SONDA_HORAS = int(os.getenv("ITENS_RECOLETA_INTERVALO_HORAS", "24"))
+
+# --- LEASE DA FILA (vários coletores em paralelo) ---
+# Licitações reivindicadas ficam RUNNING com dono e validade; leases vencidos (processo que caiu)
+# voltam a ser reivindicáveis automaticamente.
+LEASE_SEGUNDOS = int(os.getenv("ITENS_LEASE_SEGUNDOS", "600"))
+HEARTBEAT_SEGUNDOS = max(LEASE_SEGUNDOS // 3, 1)
+
+# --- PAGINAÇÃO DOS ITENS ---
+URL_ITENS = "https://pncp.gov.br/api/pncp/v1/orgaos/{cnpj}/compras/{ano}/{sequencial}/itens"
+# tamanhoPagina pedido à API; o tamanho efetivo é o que o servidor devolve (ver _observar_tamanho_pagina)
+TAMANHO_PAGINA_ITENS = int(os.getenv("ITENS_TAMANHO_PAGINA", "50"))
+# Pool compartilhado pelas páginas de todas as licitações (o ritmo real vem do limitador em http_client)
+CONCORRENCIA_PAGINAS = int(os.getenv("ITENS_CONCORRENCIA_PAGINAS", "20"))
+
 Base = declarative_base()
 
 # --- MODELOS ---
@@ -35,126 +91,959 @@ class BronzeLicitacao(Base):
     identificador_pncp = Column(String, unique=True, index=True)
     payload = Column(JSONB)
     status_itens = Column(String, default='PENDING')
+    itens_lease_dono = Column(String)
+    itens_lease_ate = Column(DateTime)
+    prioridade_itens = Column(Float)
+    itens_coletados_em = Column(DateTime)
+    itens_hash_coleta = Column(String(64))  # payload_hash da licitação na última coleta de itens
+    itens_quantidade = Column(Integer)
+    itens_sondado_em = Column(DateTime)
+    itens_tentativas = Column(Integer, nullable=False, default=0, server_default='0')
+    itens_proxima_tentativa = Column(DateTime)
+    itens_ultimo_erro = Column(String)
 
 class BronzeItem(Base):
     __tablename__ = 'bronze_pncp_itens'
+    __table_args__ = (
+        # Chave natural: recoletar uma licitação atualiza os itens em vez de duplicá-los
+        Index('uq_bronze_pncp_itens_chave', 'licitacao_identificador', 'numero_item', unique=True),
+    )
     id = Column(Integer, primary_key=True)
     licitacao_identificador = Column(String, index=True)
+    numero_item = Column(Integer)
     payload = Column(JSONB, nullable=False)
+    payload_hash = Column(String(64))
+    payload_alterado_em = Column(DateTime)
     status_processamento = Column(String, default='PENDING', index=True)
     ingested_at = Column(DateTime, server_default=func.now())
 
+def migrar_schema(engine):
+    """Adiciona colunas novas em tabelas já existentes (create_all só cria tabelas)."""
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE bronze_pncp_licitacoes ADD COLUMN IF NOT EXISTS itens_lease_dono varchar"))
+        conn.execute(text("ALTER TABLE bronze_pncp_licitacoes ADD COLUMN IF NOT EXISTS itens_lease_ate timestamp"))
+        conn.execute(text("ALTER TABLE bronze_pncp_licitacoes ADD COLUMN IF NOT EXISTS prioridade_itens double precision"))
+        conn.execute(text("ALTER TABLE bronze_pncp_licitacoes ADD COLUMN IF NOT EXISTS payload_hash varchar(64)"))
+        conn.execute(text("ALTER TABLE bronze_pncp_licitacoes ADD COLUMN IF NOT EXISTS itens_coletados_em timestamp"))
+        conn.execute(text("ALTER TABLE bronze_pncp_licitacoes ADD COLUMN IF NOT EXISTS itens_hash_coleta varchar(64)"))
+        conn.execute(text("ALTER TABLE bronze_pncp_licitacoes ADD COLUMN IF NOT EXISTS itens_quantidade integer"))
+        conn.execute(text("ALTER TABLE bronze_pncp_licitacoes ADD COLUMN IF NOT EXISTS itens_sondado_em timestamp"))
+        conn.execute(text("ALTER TABLE bronze_pncp_licitacoes ADD COLUMN IF NOT EXISTS itens_tentativas integer NOT NULL DEFAULT 0"))
+        conn.execute(text("ALTER TABLE bronze_pncp_licitacoes ADD COLUMN IF NOT EXISTS itens_proxima_tentativa timestamp"))
+        conn.execute(text("ALTER TABLE bronze_pncp_licitacoes ADD COLUMN IF NOT EXISTS itens_ultimo_erro varchar"))
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_bronze_pncp_licitacoes_retry_itens
+            ON bronze_pncp_licitacoes (itens_proxima_tentativa)
+            WHERE status_itens = 'RETRY'
+        """))
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_bronze_pncp_licitacoes_prioridade_itens
+            ON bronze_pncp_licitacoes (prioridade_itens DESC NULLS LAST)
+            WHERE status_itens = 'PENDING'
+        """))
+        conn.execute(text("ALTER TABLE bronze_pncp_itens ADD COLUMN IF NOT EXISTS numero_item integer"))
+        conn.execute(text("ALTER TABLE bronze_pncp_itens ADD COLUMN IF NOT EXISTS payload_hash varchar(64)"))
+        conn.execute(text("ALTER TABLE bronze_pncp_itens ADD COLUMN IF NOT EXISTS payload_alterado_em timestamp"))
+
+        chave_existe = conn.execute(text("SELECT to_regclass('uq_bronze_pncp_itens_chave')")).scalar()
+        if not chave_existe:
+            # Migração única: preenche a chave e remove duplicatas (mantém a coleta mais recente)
+            logger.info("🔧 Criando chave única de bronze_pncp_itens (deduplicando itens antigos)...")
+            conn.execute(text("""
+                UPDATE bronze_pncp_itens SET numero_item = (payload->>'numeroItem')::int
+                WHERE numero_item IS NULL AND payload ? 'numeroItem'
+            """))
+            removidos = conn.execute(text("""
+                DELETE FROM bronze_pncp_itens a
+                USING bronze_pncp_itens b
+                WHERE a.licitacao_identificador = b.licitacao_identificador
+                  AND a.numero_item = b.numero_item
+                  AND a.id < b.id
+            """)).rowcount
+            conn.execute(text("""
+                CREATE UNIQUE INDEX uq_bronze_pncp_itens_chave
+                ON bronze_pncp_itens (licitacao_identificador, numero_item)
+            """))
+            logger.info(f"🔧 {removidos} itens duplicados removidos")
+        # Fila do Silver: leitura em keyset (id > último) só sobre os itens pendentes
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_bronze_pncp_itens_pendentes
+            ON bronze_pncp_itens (id)
+            WHERE status_processamento = 'PENDING'
+        """))
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_bronze_pncp_licitacoes_fila_itens
+            ON bronze_pncp_licitacoes (status_itens, itens_lease_ate)
+            WHERE status_itens IN ('PENDING', 'RUNNING')
+        """))
+        if fila_ativa():
+            criar_fila(conn, "bronze_pncp_itens")
+
+# --- FILA COM LEASE ---
+
+def gerar_dono_lease():
+    """Identificador único deste processo coletor (host:pid:aleatório)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def reivindicar_lote(engine, dono, limite):
+    """
+    Reivindica até `limite` licitações pendentes (ou com lease vencido, ou RETRY cujo
+    backoff já passou) para `dono`, maiores prioridade_itens primeiro (sem nota, por último).
+
+    FOR UPDATE SKIP LOCKED garante que processos concorrentes peguem conjuntos disjuntos.
+    Returns: lista de (identificador_pncp, payload)
+    """
+    with engine.begin() as conn:
+        return conn.execute(text("""
+            WITH alvo AS (
+                SELECT id FROM bronze_pncp_licitacoes
+                WHERE status_itens = 'PENDING'
+                   OR (status_itens = 'RUNNING' AND itens_lease_ate < now())
+                   OR (status_itens = 'RETRY' AND itens_proxima_tentativa <= now())
+                ORDER BY prioridade_itens DESC NULLS LAST
+                LIMIT :limit
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE bronze_pncp_licitacoes b
+            SET status_itens = 'RUNNING',
+                itens_lease_dono = :dono,
+                itens_lease_ate = now() + make_interval(secs => :lease)
+            FROM alvo
+            WHERE b.id = alvo.id
+            RETURNING b.identificador_pncp, b.payload
+        """), {"limit": limite, "dono": dono, "lease": LEASE_SEGUNDOS}).fetchall()
+
+def renovar_leases(engine, dono):
+    """Heartbeat: estende a validade de todos os leases ativos de `dono`."""
+    with engine.begin() as conn:
+        return conn.execute(text("""
+            UPDATE bronze_pncp_licitacoes
+            SET itens_lease_ate = now() + make_interval(secs => :lease)
+            WHERE status_itens = 'RUNNING' AND itens_lease_dono = :dono
+        """), {"dono": dono, "lease": LEASE_SEGUNDOS}).rowcount
+
+def liberar_leases(engine, dono):
+    """Devolve para PENDING o que `dono` ainda segura (encerramento sem concluir tudo)."""
+    with engine.begin() as conn:
+        return conn.execute(text("""
+            UPDATE bronze_pncp_licitacoes
+            SET status_itens = 'PENDING', itens_lease_dono = NULL, itens_lease_ate = NULL
+            WHERE status_itens = 'RUNNING' AND itens_lease_dono = :dono
+        """), {"dono": dono}).rowcount
+
+class Heartbeat:
+    """Thread que renova os leases de `dono` a cada HEARTBEAT_SEGUNDOS enquanto o coletor roda."""
+
+    def __init__(self, engine, dono):
+        self.engine = engine
+        self.dono = dono
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name="itens-heartbeat", daemon=True)
+
+    def _executar(self):
+        while not self._parar.wait(HEARTBEAT_SEGUNDOS):
+            try:
+                renovar_leases(self.engine, self.dono)
+            except Exception as e:
+                logger.warning(f"⚠️ Falha ao renovar leases de {self.dono}: {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self._parar.set()
+        self._thread.join()
+
+def finalizar_licitacao(session, identificador_pncp, dono, status, quantidade=None):
+    """
+    Marca a licitação com o status final e solta o lease, desde que `dono` ainda o detenha.
+    Também registra o estado da coleta (hash do payload e quantidade de itens) usado pela recoleta.
+    Retorna False se o lease foi perdido (outro coletor reivindicou após expirar).
+    """
+    resultado = session.execute(text("""
+        UPDATE bronze_pncp_licitacoes
+        SET status_itens = :status, itens_lease_dono = NULL, itens_lease_ate = NULL,
+            itens_coletados_em = now(), itens_sondado_em = now(),
+            itens_hash_coleta = payload_hash, itens_quantidade = :quantidade,
+            itens_tentativas = 0, itens_proxima_tentativa = NULL, itens_ultimo_erro = NULL
+        WHERE identificador_pncp = :id AND status_itens = 'RUNNING' AND itens_lease_dono = :dono
+    """), {"id": identificador_pncp, "dono": dono, "status": status, "quantidade": quantidade})
+    return resultado.rowcount > 0
+
+def registrar_falha_licitacao(engine, identificador_pncp, dono, erro, contar=True, adiar_segundos=None, permanente=False):
+    """
+    Registra a falha no ledger da licitação e solta o lease: volta como RETRY com backoff
+    exponencial (BACKOFF_BASE_SEGUNDOS * 2^tentativas) ou vira FAILED ao atingir MAX_TENTATIVAS.
+
+    Args:
+        contar: False para adiamentos que não são falha da licitação (ex.: circuito aberto)
+        adiar_segundos: espera fixa no lugar do backoff
+        permanente: vai direto para FAILED (erro que nova tentativa não resolve)
+
+    Returns: (status, tentativas) ou None se o lease foi perdido
+    """
+    incremento = 1 if contar else 0
+    with engine.begin() as conn:
+        return conn.execute(text("""
+            UPDATE bronze_pncp_licitacoes
+            SET itens_tentativas = itens_tentativas + :inc,
+                status_itens = CASE WHEN CAST(:permanente AS boolean) OR itens_tentativas + :inc >= :max
+                                    THEN 'FAILED' ELSE 'RETRY' END,
+                itens_proxima_tentativa = now() + make_interval(secs => COALESCE(
+                    CAST(:adiar AS double precision),
+                    LEAST(:base * power(2, itens_tentativas), :maximo)
+                )),
+                itens_ultimo_erro = left(:erro, 500),
+                itens_lease_dono = NULL, itens_lease_ate = NULL
+            WHERE identificador_pncp = :id AND status_itens = 'RUNNING' AND itens_lease_dono = :dono
+            RETURNING status_itens, itens_tentativas
+        """), {
+            "id": identificador_pncp, "dono": dono, "erro": str(erro), "inc": incremento,
+            "max": MAX_TENTATIVAS, "adiar": adiar_segundos, "permanente": permanente,
+            "base": BACKOFF_BASE_SEGUNDOS, "maximo": BACKOFF_MAXIMO_SEGUNDOS,
+        }).fetchone()
+
+# --- RECOLETA ---
+
+def marcar_recoleta_por_hash(engine):
+    """
+    Sonda sem rede: licitações COMPLETED cujo payload mudou (payload_hash) desde a coleta
+    dos itens voltam para PENDING. Coletas anteriores ao controle (sem itens_hash_coleta)
+    apenas recebem o hash atual como referência.
+
+    Returns: quantidade marcada para recoleta
+    """
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE bronze_pncp_licitacoes SET itens_hash_coleta = payload_hash
+            WHERE status_itens = 'COMPLETED' AND itens_hash_coleta IS NULL AND payload_hash IS NOT NULL
+        """))
+        return conn.execute(text("""
+            UPDATE bronze_pncp_licitacoes SET status_itens = 'PENDING'
+            WHERE status_itens = 'COMPLETED'
+              AND payload_hash IS NOT NULL
+              AND itens_hash_coleta IS DISTINCT FROM payload_hash
+        """)).rowcount
+
+def marcar_recoleta_por_contagem(engine, limite=MAX_SONDAS_RECOLETA):
+    """
+    Sonda barata na API: para licitações ainda abertas (encerramento no futuro) sem sonda
+    recente, compara /itens/quantidade com a quantidade gravada na última coleta.
+
+    Returns: quantidade marcada para recoleta
+    """
+    if limite <= 0:
+        return 0
+
+    with engine.begin() as conn:
+        candidatas = conn.execute(text("""
+            SELECT id, payload->'orgaoEntidade'->>'cnpj', payload->>'anoCompra', payload->>'sequencialCompra', itens_quantidade
+            FROM bronze_pncp_licitacoes
+            WHERE status_itens = 'COMPLETED'
+              AND itens_quantidade IS NOT NULL
+              AND COALESCE(itens_sondado_em, itens_coletados_em) < now() - make_interval(hours => :horas)
+              AND CASE WHEN payload->>'dataEncerramentoProposta' ~ '^\\d{4}-\\d{2}-\\d{2}'
+                  THEN left(payload->>'dataEncerramentoProposta', 19)::timestamp > now()
+                  ELSE false END
+            ORDER BY COALESCE(itens_sondado_em, itens_coletados_em)
+            LIMIT :limite
+        """), {"horas": INTERVALO_SONDA_HORAS, "limite": limite}).fetchall()
+
+    if not candidatas:
+        return 0
+
+    futures = {
+        _executor_paginas.submit(consultar_quantidade_itens, cnpj, ano, seq): (id_, quantidade)
+        for id_, cnpj, ano, seq, quantidade in candidatas
+    }
+    sondadas, alteradas = [], []
+    for future in as_completed(futures):
+        id_, quantidade = futures[future]
+        total = future.result()
+        if total is None:
+            continue  # Sem resposta: tenta de novo na próxima execução
+        sondadas.append(id_)
+        if total != quantidade:
+            alteradas.append(id_)
+
+    with engine.begin() as conn:
+        if sondadas:
+            conn.execute(text("UPDATE bronze_pncp_licitacoes SET itens_sondado_em = now() WHERE id = ANY(:ids)"), {"ids": sondadas})
+        if alteradas:
+            conn.execute(text("""
+                UPDATE bronze_pncp_licitacoes SET status_itens = 'PENDING'
+                WHERE id = ANY(:ids) AND status_itens = 'COMPLETED'
+            """), {"ids": alteradas})
+
+    logger.info(f"🔎 Sonda de contagem: {len(sondadas)}/{len(candidatas)} respondidas, {len(alteradas)} com quantidade diferente")
+    return len(alteradas)
+
+def marcar_recoleta(engine):
+    """Marca para recoleta (PENDING) as licitações cujos itens provavelmente mudaram."""
+    por_hash = marcar_recoleta_por_hash(engine)
+    por_contagem = marcar_recoleta_por_contagem(engine)
+    logger.info(f"♻️ Recoleta: {por_hash} licitações com payload alterado, {por_contagem} com contagem de itens diferente")
+    return por_hash + por_contagem
+
 # --- FUNÇÕES AUXILIARES ---
 
+class ErroColetaItens(RuntimeError):
+    """Alguma página de itens falhou mesmo após os retries do http_client."""
+
+class ErroPermanenteItens(ErroColetaItens):
+    """Resposta 4xx (exceto 404 e 429): repetir não muda o resultado nem indica órgão fora do ar."""
+
+# Circuito por CNPJ do órgão (por processo): endpoints quebrados deixam de consumir workers e API
+disjuntor_orgaos = DisjuntorPorChave()
+
+_executor_paginas = ThreadPoolExecutor(max_workers=CONCORRENCIA_PAGINAS, thread_name_prefix="itens-pagina")
+
+def _ler_quantidade(response):
+    if response.status_code != 200:
+        return None
+    return int(json_codec.loads(response.content))
+
+def consultar_quantidade_itens(cnpj, ano, sequencial):
+    """Total de itens da contratação via endpoint /itens/quantidade (None se indisponível)."""
+    try:
+        return _ler_quantidade(http_client.get(URL_ITENS.format(cnpj=cnpj, ano=ano, sequencial=sequencial) + "/quantidade", timeout=20))
+    except Exception:
+        return None
+
+async def consultar_quantidade_itens_async(cnpj, ano, sequencial):
+    """Versão assíncrona de consultar_quantidade_itens (http_client.get_async)."""
+    try:
+        return _ler_quantidade(await http_client.get_async(URL_ITENS.format(cnpj=cnpj, ano=ano, sequencial=sequencial) + "/quantidade", timeout=20))
+    except Exception:
+        return None
+
+def _ler_pagina_itens(response):
+    if response.status_code in (204, 404):
+        # 404: contratação sem itens publicados (ou removida)
+        return []
+    if 400 <= response.status_code < 500 and response.status_code != 429:
+        raise ErroPermanenteItens(f"Status {response.status_code}")
+    if response.status_code != 200:
+        raise ErroColetaItens(f"Status {response.status_code}")
+
+    data = json_codec.loads(response.content)
+    return data if isinstance(data, list) else data.get('data', [])
+
+def baixar_pagina_itens(url, pagina, tamanho_pagina):
+    """
+    Baixa uma página de itens. Retorna a lista (vazia em 204/404/fim) ou levanta em erro:
+    ErroPermanenteItens para os demais 4xx, ErroColetaItens para 429/5xx que sobraram dos
+    retries do http_client (erros de rede propagam como vêm do cliente HTTP).
+    """
+    return _ler_pagina_itens(http_client.get(url, params={"pagina": pagina, "tamanhoPagina": tamanho_pagina}, timeout=20))
+
+async def baixar_pagina_itens_async(url, pagina, tamanho_pagina):
+    """Versão assíncrona de baixar_pagina_itens (http_client.get_async)."""
+    return _ler_pagina_itens(await http_client.get_async(url, params={"pagina": pagina, "tamanhoPagina": tamanho_pagina}, timeout=20))
+
+# Maior página de itens já devolvida pela API neste processo. O PNCP pode atender menos
+# itens que o tamanhoPagina pedido, então "página cheia" é medida pelo que o servidor
+# devolve. Corridas entre threads só podem deixar o valor menor que o real: no pior caso,
+# uma requisição a mais, nunca itens truncados.
+_maior_pagina_itens = 0
+
+def _observar_tamanho_pagina(lista):
+    """Registra o tamanho de uma página devolvida pela API. Returns: tamanho efetivo da página"""
+    global _maior_pagina_itens
+    if len(lista) > _maior_pagina_itens:
+        _maior_pagina_itens = len(lista)
+    return _maior_pagina_itens
+
+def _pagina_cheia(lista, tamanho_pagina):
+    """Página do tamanho efetivo: pode haver outras depois dela."""
+    return bool(lista) and len(lista) >= tamanho_pagina
+
+def _proximas_paginas(paginas_baixadas, total_itens, tamanho_pagina):
+    """
+    Próximas páginas a buscar, dadas as já baixadas (contíguas a partir da 1).
+
+    Com o total de itens conhecido, todas as que faltam de uma vez (em paralelo); sem ele,
+    uma por vez até a primeira página incompleta.
+    Returns: range vazio quando não há mais páginas
+    """
+    ultima = max(paginas_baixadas)
+    if not _pagina_cheia(paginas_baixadas[ultima], tamanho_pagina):
+        return range(0)
+    if total_itens is None:
+        return range(ultima + 1, ultima + 2)
+    if sum(len(lista) for lista in paginas_baixadas.values()) >= total_itens:
+        return range(0)
+    # max(): o total pode ter crescido desde a sonda; segue página a página
+    return range(ultima + 1, max(-(-total_itens // tamanho_pagina), ultima + 1) + 1)
+
+def _juntar_paginas(identificador_pncp, paginas_baixadas):
+    """Itens na ordem das páginas."""
+    itens = [item for pag in sorted(paginas_baixadas) for item in paginas_baixadas[pag]]
+    logger.info(f"Coletados {len(itens)} itens de {len(paginas_baixadas)} página(s) para {identificador_pncp}")
+    return itens
+
+def _registrar_pagina(identificador_pncp, paginas_baixadas, pag, resultado):
+    """Guarda uma página baixada ou levanta ErroColetaItens com o erro dela."""
+    if isinstance(resultado, Exception):
+        classe = type(resultado) if isinstance(resultado, ErroColetaItens) else ErroColetaItens
+        raise classe(
+            f"Falha na página {pag} de {identificador_pncp} ({len(paginas_baixadas)} páginas baixadas): {resultado}"
+        ) from resultado
+    paginas_baixadas[pag] = resultado
+    if resultado:
+        logger.info(f"📦 Itens {identificador_pncp} | Pág {pag} | Itens: {len(resultado)}")
+
 def baixar_itens_api(identificador_pncp, cnpj, ano, sequencial):
-    url = f"https://pncp.gov.br/api/pncp/v1/orgaos/{cnpj}/compras/{ano}/{sequencial}/itens"
-    itens_para_inserir = []
-    pagina = 1
-    tamanho_pagina = 50
-    headers = {'User-Agent': 'Crawler-SaaS/1.0', 'Accept': 'application/json'}
+    """
+    Baixa todos os itens (payloads da API, na ordem das páginas) de uma licitação.
+
+    A página 1 vem primeiro; só quando ela está cheia o total (/itens/quantidade) é
+    consultado para buscar as demais em paralelo. Sem o total, segue página a página até a
+    primeira incompleta. Levanta ErroColetaItens se alguma página falhar (coleta parcial
+    não é gravada, para a licitação não ficar COMPLETED com itens faltando).
+    """
+    url = URL_ITENS.format(cnpj=cnpj, ano=ano, sequencial=sequencial)
+    paginas_baixadas = {}
+    try:
+        primeira = baixar_pagina_itens(url, 1, TAMANHO_PAGINA_ITENS)
+    except Exception as e:
+        primeira = e
+    _registrar_pagina(identificador_pncp, paginas_baixadas, 1, primeira)
+
+    tamanho_pagina = _observar_tamanho_pagina(primeira)
+    total_itens = None
+    if _pagina_cheia(primeira, tamanho_pagina):
+        total_itens = consultar_quantidade_itens(cnpj, ano, sequencial)
 
     while True:
-        params = {
-            "pagina": pagina,
-            "tamanhoPagina": tamanho_pagina
-        }
+        paginas = _proximas_paginas(paginas_baixadas, total_itens, tamanho_pagina)
+        if not paginas:
+            break
+        futures = [_executor_paginas.submit(baixar_pagina_itens, url, pag, TAMANHO_PAGINA_ITENS) for pag in paginas]
+        for pag, future in zip(paginas, futures):
+            try:
+                resultado = future.result()
+            except Exception as e:
+                resultado = e
+            _registrar_pagina(identificador_pncp, paginas_baixadas, pag, resultado)
 
-        try:
-            response = requests.get(url, params=params, headers=headers, timeout=20)
-            if response.status_code == 204:
-                break
-            if response.status_code != 200:
-                logger.error(f"Erro na página {pagina} para {identificador_pncp}: Status {response.status_code}")
-                break
+    return _juntar_paginas(identificador_pncp, paginas_baixadas)
 
-            data = response.json()
-            lista = data if isinstance(data, list) else data.get('data', [])
+async def baixar_itens_api_async(identificador_pncp, cnpj, ano, sequencial):
+    """Versão assíncrona de baixar_itens_api (requisições como corrotinas, sem threads)."""
+    url = URL_ITENS.format(cnpj=cnpj, ano=ano, sequencial=sequencial)
+    paginas_baixadas = {}
+    try:
+        primeira = await baixar_pagina_itens_async(url, 1, TAMANHO_PAGINA_ITENS)
+    except Exception as e:
+        primeira = e
+    _registrar_pagina(identificador_pncp, paginas_baixadas, 1, primeira)
 
-            if not lista:
-                break
+    tamanho_pagina = _observar_tamanho_pagina(primeira)
+    total_itens = None
+    if _pagina_cheia(primeira, tamanho_pagina):
+        total_itens = await consultar_quantidade_itens_async(cnpj, ano, sequencial)
 
-            # Adiciona os itens da página atual
-            for item in lista:
-                itens_para_inserir.append(BronzeItem(licitacao_identificador=identificador_pncp, payload=item))
+    while True:
+        paginas = _proximas_paginas(paginas_baixadas, total_itens, tamanho_pagina)
+        if not paginas:
+            break
+        resultados = await asyncio.gather(
+            *(baixar_pagina_itens_async(url, pag, TAMANHO_PAGINA_ITENS) for pag in paginas),
+            return_exceptions=True,
+        )
+        for pag, resultado in zip(paginas, resultados):
+            _registrar_pagina(identificador_pncp, paginas_baixadas, pag, resultado)
 
-            logger.info(f"📦 Itens {identificador_pncp} | Pág {pagina} | Itens: {len(lista)}")
+    return _juntar_paginas(identificador_pncp, paginas_baixadas)
 
-            # Se a página não veio com o tamanho máximo, significa que é a última página
-            if len(lista) < tamanho_pagina:
-                break
+def _itens_por_numero(identificador_pncp, itens):
+    """Um item por numeroItem (o último vence): o ON CONFLICT não aceita a mesma chave duas vezes."""
+    por_numero = {}
+    for item in itens:
+        numero = item.get('numeroItem')
+        if numero is None:
+            logger.warning(f"⚠️ Item sem numeroItem ignorado em {identificador_pncp}")
+            continue
+        por_numero[int(numero)] = item
+    return por_numero
 
-            pagina += 1
-            time.sleep(0.1)  # Pequeno delay para evitar rate limiting
+def registrar_erro_coleta(db_engine, identificador_pncp, dono, cnpj, erro):
+    """
+    Leva ao ledger a falha de coleta de uma licitação. Só erros transitórios (429/5xx,
+    rede) contam para o disjuntor do órgão e para RETRY; 4xx permanentes vão direto
+    para FAILED e, como o órgão respondeu, contam como sucesso no disjuntor (senão a
+    chamada de teste do meio-aberto nunca seria liberada).
+    """
+    permanente = isinstance(erro, ErroPermanenteItens)
+    if permanente:
+        disjuntor_orgaos.registrar_sucesso(cnpj)
+    else:
+        disjuntor_orgaos.registrar_falha(cnpj)
+    resultado = registrar_falha_licitacao(db_engine, identificador_pncp, dono, erro, permanente=permanente)
+    if resultado:
+        logger.warning(f"⏳ {identificador_pncp}: {resultado[0]} (tentativa {resultado[1]}/{MAX_TENTATIVAS}) - {erro}")
 
-        except Exception as e:
-            logger.error(f"Erro crítico na página {pagina} para {identificador_pncp}: {e}")
-            break
+def coletar_licitacao(db_engine, identificador_pncp, payload, dono):
+    """
+    Baixa os itens de uma licitação (sem gravar). Falhas vão para o ledger (RETRY/FAILED).
+
+    Returns: (identificador_pncp, status, itens) para gravar_lote_itens, ou None se nada
+    deve ser gravado agora
+    """
+    cnpj = payload.get('orgaoEntidade', {}).get('cnpj')
+    ano = payload.get('anoCompra')
+    seq = payload.get('sequencialCompra')
+
+    if not all([cnpj, ano, seq]):
+        return identificador_pncp, 'SKIP', None
+
+    if not disjuntor_orgaos.permitir(cnpj):
+        # Órgão com circuito aberto: adia sem gastar requisição nem contar tentativa
+        espera = max(disjuntor_orgaos.segundos_para_liberar(cnpj), 1.0)
+        registrar_falha_licitacao(db_engine, identificador_pncp, dono, f"Circuito aberto para {cnpj}",
+                                  contar=False, adiar_segundos=espera)
+        return None
+
+    try:
+        itens = baixar_itens_api(identificador_pncp, cnpj, ano, seq)
+    except Exception as e:
+        registrar_erro_coleta(db_engine, identificador_pncp, dono, cnpj, e)
+        return None
+    disjuntor_orgaos.registrar_sucesso(cnpj)
+
+    return identificador_pncp, 'COMPLETED', itens
+
+def processar_licitacao_worker(db_engine, identificador_pncp, payload, dono):
+    """Coleta e grava uma única licitação (uso avulso; o coletor grava em lotes)."""
+    try:
+        resultado = coletar_licitacao(db_engine, identificador_pncp, payload, dono)
+        if resultado:
+            gravar_lote_itens(db_engine, dono, [resultado])
+    except Exception as e:
+        logger.error(f"Erro no worker {identificador_pncp}: {e}")
+
+def finalizar_licitacoes(session, dono, resultados):
+    """
+    Versão em lote de finalizar_licitacao: um único UPDATE para todas as licitações.
+
+    Args:
+        resultados: lista de (identificador_pncp, status, itens)
+    Returns: set com os identificadores cujo lease ainda era de `dono`
+    """
+    finalizadas = session.execute(text("""
+        UPDATE bronze_pncp_licitacoes b
+        SET status_itens = v.status, itens_lease_dono = NULL, itens_lease_ate = NULL,
+            itens_coletados_em = now(), itens_sondado_em = now(),
+            itens_hash_coleta = b.payload_hash, itens_quantidade = v.quantidade,
+            itens_tentativas = 0, itens_proxima_tentativa = NULL, itens_ultimo_erro = NULL
+        FROM unnest(CAST(:ids AS text[]), CAST(:status AS text[]), CAST(:quantidades AS integer[]))
+            AS v(identificador_pncp, status, quantidade)
+        WHERE b.identificador_pncp = v.identificador_pncp
+          AND b.status_itens = 'RUNNING' AND b.itens_lease_dono = :dono
+        RETURNING b.identificador_pncp
+    """), {
+        "dono": dono,
+        "ids": [r[0] for r in resultados],
+        "status": [r[1] for r in resultados],
+        "quantidades": [len(r[2]) if r[2] is not None else None for r in resultados],
+    }).fetchall()
+    return {r[0] for r in finalizadas}
+
+def _merge_itens_copy(session, linhas):
+    """COPY das linhas para uma staging temporária e merge com um único INSERT ... SELECT."""
+    # ON COMMIT DROP: a staging vive só nesta transação (compatível com poolers em modo transação)
+    session.execute(text("""
+        CREATE TEMP TABLE tmp_bronze_itens (
+            licitacao_identificador text,
+            numero_item integer,
+            payload jsonb,
+            payload_hash varchar(64)
+        ) ON COMMIT DROP
+    """))
+    copiar_linhas(session, "tmp_bronze_itens", ["licitacao_identificador", "numero_item", "payload", "payload_hash"], linhas)
+
+    inseridos, atualizados = session.execute(text(f"""
+        WITH mesclados AS (
+            INSERT INTO bronze_pncp_itens (
+                licitacao_identificador, numero_item, payload, payload_hash,
+                payload_alterado_em, status_processamento
+            )
+            SELECT licitacao_identificador, numero_item, payload, payload_hash, now(), 'PENDING'
+            FROM tmp_bronze_itens
+            ON CONFLICT (licitacao_identificador, numero_item)
+            DO UPDATE SET
+                payload = EXCLUDED.payload,
+                payload_hash = EXCLUDED.payload_hash,
+                payload_alterado_em = EXCLUDED.payload_alterado_em,
+                status_processamento = 'PENDING'
+            WHERE bronze_pncp_itens.payload_hash IS DISTINCT FROM EXCLUDED.payload_hash
+            RETURNING id, (xmax = 0) AS inserido
+        ){cte_enfileirar("bronze_pncp_itens", "mesclados")}
+        SELECT COUNT(*) FILTER (WHERE inserido), COUNT(*) FILTER (WHERE NOT inserido)
+        FROM mesclados
+    """)).fetchone()
 
-    logger.info(f"Coletados {len(itens_para_inserir)} itens de {pagina} página(s) para {identificador_pncp}")
-    return itens_para_inserir
+    return {"inseridos": inseridos, "atualizados": atualizados, "inalterados": len(linhas) - inseridos - atualizados}
 
-def processar_licitacao_worker(db_engine, identificador_pncp, payload):
-    Session = sessionmaker(bind=db_engine)
+def gravar_lote_itens(engine, dono, lote):
+    """
+    Grava várias licitações numa única transação: um UPDATE finaliza todas (status e
+    lease) e os itens das que ainda eram de `dono` entram por COPY + merge. Se o caminho
+    em lote falhar, regrava licitação por licitação para isolar a que causou o erro.
+
+    Args:
+        lote: lista de (identificador_pncp, status, itens); itens None para SKIP
+    Returns: contagem somada {"inseridos", "atualizados", "inalterados"}
+    """
+    Session = sessionmaker(bind=engine)
     session = Session()
     try:
-        cnpj = payload.get('orgaoEntidade', {}).get('cnpj')
-        ano = payload.get('anoCompra')
-        seq = payload.get('sequencialCompra')
+        finalizadas = finalizar_licitacoes(session, dono, lote)
 
-        if not all([cnpj, ano, seq]):
-            session.execute(text("UPDATE bronze_pncp_licitacoes SET status_itens = 'SKIP' WHERE identificador_pncp = :id"), {"id": identificador_pncp})
-            session.commit()
-            return
+        linhas = []
+        for identificador_pncp, _, itens in lote:
+            if identificador_pncp not in finalizadas:
+                # Lease perdido: outro coletor reivindicou após expirar; itens descartados
+                logger.warning(f"⚠️ Lease perdido para {identificador_pncp}, itens descartados")
+                continue
+            for numero, item in _itens_por_numero(identificador_pncp, itens or []).items():
+                linhas.append((identificador_pncp, numero, json_codec.dumps(item), calcular_hash(item)))
 
-        itens = baixar_itens_api(identificador_pncp, cnpj, ano, seq)
-        
-        if itens:
-            session.bulk_save_objects(itens)
-            logger.info(f"✅ {len(itens)} itens -> {identificador_pncp}")
-        
-        session.execute(text("UPDATE bronze_pncp_licitacoes SET status_itens = 'COMPLETED' WHERE identificador_pncp = :id"), {"id": identificador_pncp})
+        contagem = {"inseridos": 0, "atualizados": 0, "inalterados": 0}
+        if linhas:
+            contagem = _merge_itens_copy(session, linhas)
         session.commit()
+        return contagem
     except Exception as e:
-        logger.error(f"Erro no worker {identificador_pncp}: {e}")
         session.rollback()
+        if len(lote) == 1:
+            raise
+        logger.warning(f"⚠️ Falha no lote de {len(lote)} licitações ({e}), gravando uma a uma")
     finally:
         session.close()
 
-def run_item_collection_process():
-    """Executa coleta de itens sem retornar resposta Flask (para uso em scripts)."""
-    # Otimizado para servidor dedicado (Hetzner)
-    engine = create_engine(DB_CONNECTION_STRING, pool_size=10, max_overflow=20)
-    Base.metadata.create_all(engine)
-    
-    Session = sessionmaker(bind=engine)
-    session = Session()
+    total = {"inseridos": 0, "atualizados": 0, "inalterados": 0}
+    for resultado in lote:
+        try:
+            contagem = gravar_lote_itens(engine, dono, [resultado])
+        except Exception as e:
+            # Continua RUNNING: volta para PENDING no liberar_leases do final
+            logger.error(f"Erro ao gravar itens de {resultado[0]}: {e}")
+            continue
+        for chave in total:
+            total[chave] += contagem[chave]
+    return total
+
+def _gravar_lote_com_log(engine, dono, lote):
+    try:
+        contagem = gravar_lote_itens(engine, dono, lote)
+    except Exception as e:
+        # Continua RUNNING: volta para PENDING no liberar_leases do final
+        logger.error(f"Erro ao gravar lote de {len(lote)} licitação(ões): {e}")
+        return None
+    logger.info(
+        f"✅ Lote de {len(lote)} licitação(ões) gravado "
+        f"(+{contagem['inseridos']} novos, ~{contagem['atualizados']} alterados, ={contagem['inalterados']} iguais)"
+    )
+    return contagem
+
+class _PipelineItens:
+    """
+    Coletor do modo assíncrono:
+
+    - cada licitação reivindicada vira uma corrotina (até `concorrencia` em andamento no
+      mesmo event loop) e suas requisições também (http_client.get_async): não há pool
+      de threads limitando as requisições em voo, quem dita o ritmo é o limitador adaptativo;
+    - os itens baixados vão para uma fila de escrita limitada, drenada por `escritores`
+      workers que gravam até LICITACOES_POR_TRANSACAO licitações por transação.
+
+    Novas reivindicações acontecem conforme as corrotinas terminam, sem barreira entre lotes.
+    """
+
+    def __init__(self, engine, dono, drenar, orcamento, concorrencia, escritores):
+        self.engine = engine
+        self.dono = dono
+        self.drenar = drenar
+        self.orcamento = orcamento
+        self.concorrencia = concorrencia
+        self.escritores = escritores
+        self.fila_escrita = asyncio.Queue(maxsize=TAMANHO_FILA_ESCRITA)
+        self.reivindicadas = 0
+        self.processadas = 0
+
+    async def _coletar(self, identificador_pncp, payload):
+        cnpj = payload.get('orgaoEntidade', {}).get('cnpj')
+        ano = payload.get('anoCompra')
+        seq = payload.get('sequencialCompra')
+
+        if not all([cnpj, ano, seq]):
+            await self.fila_escrita.put((identificador_pncp, 'SKIP', None))
+            return
+
+        if not disjuntor_orgaos.permitir(cnpj):
+            espera = max(disjuntor_orgaos.segundos_para_liberar(cnpj), 1.0)
+            await asyncio.to_thread(
+                registrar_falha_licitacao, self.engine, identificador_pncp, self.dono,
+                f"Circuito aberto para {cnpj}", False, espera
+            )
+            return
+
+        try:
+            itens = await baixar_itens_api_async(identificador_pncp, cnpj, ano, seq)
+        except Exception as e:
+            await asyncio.to_thread(registrar_erro_coleta, self.engine, identificador_pncp, self.dono, cnpj, e)
+            return
+        disjuntor_orgaos.registrar_sucesso(cnpj)
+
+        # Bloqueia quando a fila de escrita está cheia (backpressure do banco)
+        await self.fila_escrita.put((identificador_pncp, 'COMPLETED', itens))
+
+    async def _licitacao(self, identificador_pncp, payload):
+        try:
+            await self._coletar(identificador_pncp, payload)
+        except Exception as e:
+            # Fica RUNNING e volta para PENDING no liberar_leases do final
+            logger.error(f"Erro na coleta de {identificador_pncp}: {e}")
+        finally:
+            self.processadas += 1
+
+    async def worker_escrita(self):
+        while True:
+            lote = [await self.fila_escrita.get()]
+            while len(lote) < LICITACOES_POR_TRANSACAO and not self.fila_escrita.empty():
+                lote.append(self.fila_escrita.get_nowait())
+
+            try:
+                await asyncio.to_thread(_gravar_lote_com_log, self.engine, self.dono, lote)
+            finally:
+                for _ in lote:
+                    self.fila_escrita.task_done()
+
+    def _tamanho_reivindicacao(self, em_andamento):
+        livres = self.concorrencia - em_andamento
+        if not self.drenar:
+            return self.orcamento.restante(self.reivindicadas, min(LIMIT_LOTE, livres))
+        # Evita consultas minúsculas: só reivindica com pelo menos 1/4 das vagas livres
+        if livres < max(self.concorrencia // 4, 1):
+            return 0
+        return self.orcamento.restante(self.reivindicadas, min(LIMIT_LOTE, livres))
+
+    async def executar(self):
+        # Só o banco roda em threads (escritores, reivindicações e ledger); o HTTP é assíncrono
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.escritores + 4))
+        async with http_client.sessao_async():
+            return await self._executar()
+
+    async def _executar(self):
+        escritores = [asyncio.create_task(self.worker_escrita()) for _ in range(self.escritores)]
+        tarefas = set()
+        fila_esgotada = False
+        try:
+            while True:
+                tamanho = 0
+                if not fila_esgotada and not self.orcamento.esgotado(self.reivindicadas):
+                    tamanho = self._tamanho_reivindicacao(len(tarefas))
+                if tamanho > 0:
+                    lote = await asyncio.to_thread(reivindicar_lote, self.engine, self.dono, tamanho)
+                    self.reivindicadas += len(lote)
+                    if lote:
+                        logger.info(f"📦 +{len(lote)} licitações reivindicadas (total {self.reivindicadas}, em andamento {len(tarefas) + len(lote)})")
+                    for identificador_pncp, payload in lote:
+                        tarefas.add(asyncio.create_task(self._licitacao(identificador_pncp, payload)))
+                    fila_esgotada = not self.drenar or len(lote) < tamanho
+
+                if not tarefas:
+                    break
+                _, tarefas = await asyncio.wait(tarefas, return_when=asyncio.FIRST_COMPLETED)
+
+            await self.fila_escrita.join()
+        finally:
+            for tarefa in tarefas:
+                tarefa.cancel()
+            for escritor in escritores:
+                escritor.cancel()
+            await asyncio.gather(*tarefas, *escritores, return_exceptions=True)
+
+        return self.reivindicadas, self.processadas
+
+def coletar_fila_async(engine, dono, drenar, orcamento):
+    """Executa o _PipelineItens num event loop próprio. Returns: (reivindicadas, processadas)"""
+    pipeline = _PipelineItens(engine, dono, drenar, orcamento, CONCORRENCIA_ASYNC, ESCRITORES_ASYNC)
+    with Heartbeat(engine, dono):
+        return asyncio.run(pipeline.executar())
+
+class _Orcamento:
+    """Limites de tempo/quantidade de uma execução (None = sem limite)."""
+
+    def __init__(self, tempo_maximo, limite_licitacoes):
+        self.inicio = time.monotonic()
+        self.tempo_maximo = tempo_maximo or None
+        self.limite_licitacoes = limite_licitacoes or None
+
+    def tempo_esgotado(self):
+        return bool(self.tempo_maximo) and time.monotonic() - self.inicio >= self.tempo_maximo
+
+    def esgotado(self, reivindicadas):
+        if self.tempo_esgotado():
+            return True
+        return bool(self.limite_licitacoes) and reivindicadas >= self.limite_licitacoes
+
+    def restante(self, reivindicadas, tamanho):
+        if not self.limite_licitacoes:
+            return tamanho
+        return min(tamanho, self.limite_licitacoes - reivindicadas)
+
+def coletar_fila(engine, dono, drenar, orcamento):
+    """
+    Mantém MAX_WORKERS licitações sempre em andamento: a cada conclusão (FIRST_COMPLETED)
+    a próxima é submetida, e novos lotes são reivindicados antes do buffer esvaziar, sem
+    barreira entre lotes. Sem drenagem, reivindica um único lote de LIMIT_LOTE.
+
+    Os resultados são gravados por um escritor dedicado em lotes de LICITACOES_POR_TRANSACAO
+    (um lote gravando por vez: se o banco atrasa, a coleta espera).
+
+    Returns: (reivindicadas, processadas)
+    """
+    buffer = deque()
+    em_andamento = set()
+    a_gravar = []
+    gravacao = None
+    reivindicadas = 0
+    processadas = 0
+    fila_esgotada = False
+
+    def gravar(forcar=False):
+        nonlocal a_gravar, gravacao
+        if not a_gravar or (len(a_gravar) < LICITACOES_POR_TRANSACAO and not forcar):
+            return
+        if gravacao is not None:
+            gravacao.result()
+        gravacao = escritor.submit(_gravar_lote_com_log, engine, dono, a_gravar)
+        a_gravar = []
+
+    with Heartbeat(engine, dono), ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor, \
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="itens-escrita") as escritor:
+        while True:
+            sem_orcamento = orcamento.esgotado(reivindicadas)
+
+            if not fila_esgotada and not sem_orcamento and len(buffer) < MAX_WORKERS:
+                tamanho = orcamento.restante(reivindicadas, LOTE_DRENAGEM if drenar else LIMIT_LOTE)
+                lote = reivindicar_lote(engine, dono, tamanho)
+                reivindicadas += len(lote)
+                buffer.extend(lote)
+                if lote:
+                    logger.info(f"📦 +{len(lote)} licitações reivindicadas (total {reivindicadas}, coletor {dono})")
+                # Sem drenagem é um lote só; na drenagem, lote incompleto = fila vazia
+                fila_esgotada = not drenar or len(lote) < tamanho
+
+            # Orçamento de tempo estourado: o que está no buffer é devolvido no final
+            while buffer and len(em_andamento) < MAX_WORKERS and not orcamento.tempo_esgotado():
+                identificador, payload = buffer.popleft()
+                em_andamento.add(executor.submit(coletar_licitacao, engine, identificador, payload, dono))
+
+            if not em_andamento:
+                break
+
+            concluidos, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+            for future in concluidos:
+                processadas += 1
+                try:
+                    resultado = future.result()
+                except Exception as e:
+                    # Fica RUNNING e volta para PENDING no liberar_leases do final
+                    logger.error(f"Erro no worker: {e}")
+                    continue
+                if resultado:
+                    a_gravar.append(resultado)
+            gravar()
+
+        gravar(forcar=True)
+        if gravacao is not None:
+            gravacao.result()
+
+    return reivindicadas, processadas
+
+def run_item_collection_process(drenar=None, tempo_maximo=None, limite_licitacoes=None, recoletar=None):
+    """
+    Executa coleta de itens sem retornar resposta Flask (para uso em scripts).
+
+    Args:
+        drenar: continua reivindicando lotes até a fila esvaziar (padrão: ITENS_DRENAR)
+        tempo_maximo: orçamento em segundos para novas reivindicações (padrão: ITENS_TEMPO_MAXIMO)
+        limite_licitacoes: máximo de licitações por execução (padrão: ITENS_LIMITE_LICITACOES)
+        recoletar: antes de coletar, devolve à fila licitações com itens provavelmente
+            desatualizados (padrão: ITENS_RECOLETAR)
+    """
+    drenar = DRENAR if drenar is None else drenar
+    recoletar = RECOLETAR if recoletar is None else recoletar
+    orcamento = _Orcamento(
+        TEMPO_MAXIMO_SEGUNDOS if tempo_maximo is None else tempo_maximo,
+        LIMITE_LICITACOES if limite_licitacoes is None else limite_licitacoes,
+    )
+    engine = get_engine(DB_CONNECTION_STRING)
+    criar_schema(Base, engine, migrar_schema)
+    modo = MODO_COLETOR
+    if modo == "async" and not http_client.async_disponivel():
+        logger.warning("⚠️ ITENS_MODO=async requer aiohttp (pip install aiohttp); usando o modo threads")
+        modo = "threads"
+    # Sondas da recoleta e modo threads usam o cliente síncrono
+    http_client.configurar_pool(MAX_WORKERS + CONCORRENCIA_PAGINAS)
+    dono = gerar_dono_lease()
     
     try:
-        # Busca apenas o que está PENDING
-        lote = session.execute(
-            text("SELECT identificador_pncp, payload FROM bronze_pncp_licitacoes WHERE status_itens = 'PENDING' LIMIT :limit"),
-            {"limit": LIMIT_LOTE}
-        ).fetchall()
-        session.close()
+        if recoletar:
+            marcar_recoleta(engine)
+
+        if PRIORIZAR:
+            try:
+                atualizar_prioridades(engine)
+            except Exception as e:
+                # Sem notas a fila continua funcionando, só perde a ordem
+                logger.warning(f"⚠️ Falha ao recalcular prioridades: {e}")
+
+        # Reivindica PENDING (e leases vencidos) sem colidir com outros coletores
+        if modo == "async":
+            logger.info(f"⚡ Modo async: até {CONCORRENCIA_ASYNC} licitações em andamento (ritmo do limitador: {http_client.taxa_atual():.1f} req/s)")
+            reivindicadas, processadas = coletar_fila_async(engine, dono, drenar, orcamento)
+        else:
+            reivindicadas, processadas = coletar_fila(engine, dono, drenar, orcamento)
 
-        if not lote:
+        if not reivindicadas:
             logger.info("✅ Nenhuma licitação pendente para coletar itens")
             return {"status": "idle", "message": "Fila vazia", "processed": 0}
 
-        logger.info(f"📦 Coletando itens de {len(lote)} licitações...")
+        duracao = time.monotonic() - orcamento.inicio
+        logger.info(f"🏁 {processadas} licitações em {duracao:.1f}s ({processadas / max(duracao, 1e-9):.2f}/s)")
+        logger.info(f"🚦 Taxa final da API: {http_client.taxa_atual():.1f} req/s")
+        abertos = disjuntor_orgaos.abertos()
+        if abertos:
+            logger.warning(f"🔴 {len(abertos)} órgãos com circuito aberto: {', '.join(abertos[:10])}")
 
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = [executor.submit(processar_licitacao_worker, engine, row[0], row[1]) for row in lote]
-            for future in as_completed(futures):
-                future.result()
-
-        return {"status": "success", "processed": len(lote)}
+        return {"status": "success", "processed": processadas}
 
     except Exception as e:
         logger.error(f"Falha no coletor: {e}")
         return {"status": "error", "message": str(e)}
     finally:
-        engine.dispose()
+        # Workers que falharam (ou buffer não submetido por orçamento) ficam RUNNING:
+        # devolve já em vez de esperar o lease vencer
+        try:
+            liberados = liberar_leases(engine, dono)
+            if liberados:
+                logger.info(f"↩️ {liberados} licitações devolvidas para PENDING")
+        except Exception as e:
+            logger.warning(f"⚠️ Falha ao liberar leases: {e}")
+
+
+def run_backfill_payload_hash_itens():
+    """Preenche payload_hash dos itens antigos (para uso em scripts)."""
+    engine = get_engine(DB_CONNECTION_STRING)
+    criar_schema(Base, engine, migrar_schema)
+    total = backfill_payload_hash(engine, "bronze_pncp_itens")
+    return {"status": "success", "atualizados": total}
 
 def handle_item_collector():
     """Handler Flask para a API (mantido para compatibilidade)."""
@@ -0,0 +1,92 @@
+"""
+Priorização da fila de coleta de itens.
+
+Antes de cada execução do coletor, as licitações PENDING recebem uma nota em
+`bronze_pncp_licitacoes.prioridade_itens` e a reivindicação da fila segue essa nota
+(maior primeiro). A nota combina:
+
+- prazo: quanto mais perto o `dataEncerramentoProposta`, maior (propostas encerradas = 0);
+- demanda: a UF está em `estados_padrao` de algum perfil ativo em `cliente_configs`;
+- valor: `valorTotalEstimado` em escala logarítmica.
+"""
+
+import os
+import logging
+from sqlalchemy import text
+from api import json_codec
+
+logger = logging.getLogger(__name__)
+
+# --- PESOS ---
+PESO_PRAZO = float(os.getenv("ITENS_PESO_PRAZO", "3"))
+PESO_DEMANDA = float(os.getenv("ITENS_PESO_DEMANDA", "2"))
+PESO_VALOR = float(os.getenv("ITENS_PESO_VALOR", "1"))
+# Valor estimado que recebe nota máxima (acima disso satura em 1)
+VALOR_REFERENCIA = 1e9
+
+# Cada componente fica em [0, 1]; datas/valores ausentes ou malformados contam como 0
+SQL_PRIORIDADE = """
+    :peso_prazo * COALESCE(
+        CASE WHEN payload->>'dataEncerramentoProposta' ~ '^\\d{4}-\\d{2}-\\d{2}' THEN
+            CASE WHEN left(payload->>'dataEncerramentoProposta', 19)::timestamp >= now() THEN
+                1.0 / (1.0 + EXTRACT(EPOCH FROM (left(payload->>'dataEncerramentoProposta', 19)::timestamp - now())) / 86400.0)
+            ELSE 0 END
+        END, 0)
+    + :peso_demanda * (CASE WHEN payload->'unidadeOrgao'->>'ufSigla' = ANY(:ufs) THEN 1 ELSE 0 END)
+    + :peso_valor * COALESCE(
+        CASE WHEN jsonb_typeof(payload->'valorTotalEstimado') = 'number' THEN
+            LEAST(ln(1 + GREATEST((payload->>'valorTotalEstimado')::numeric, 0)) / ln(:valor_referencia), 1)
+        END, 0)
+"""
+
+
+def parse_estados(estados_str):
+    """Siglas (2 letras, maiúsculas) de um `estados_padrao` em JSON; inválido = []."""
+    try:
+        estados = json_codec.loads(estados_str)
+    except ValueError:
+        return []
+    if not isinstance(estados, list):
+        return []
+    return [estado.strip().upper() for estado in estados if isinstance(estado, str) and len(estado.strip()) == 2]
+
+
+def ufs_com_demanda(conn):
+    """UFs cobertas por pelo menos um perfil ativo (mesmo critério do serviço de notificações)."""
+    linhas = conn.execute(text("""
+        SELECT cc.estados_padrao
+        FROM cliente_configs cc
+        INNER JOIN usuarios u ON cc.user_id = u.id
+        WHERE cc.palavras_chave IS NOT NULL
+        AND cc.palavras_chave != ''
+        AND cc.estados_padrao IS NOT NULL
+        AND cc.estados_padrao != ''
+        AND cc.estados_padrao != '[]'
+    """)).fetchall()
+    ufs = set()
+    for (estados_padrao,) in linhas:
+        ufs.update(parse_estados(estados_padrao))
+    return sorted(ufs)
+
+
+def atualizar_prioridades(engine):
+    """
+    Recalcula prioridade_itens de todas as licitações PENDING (o prazo muda com o tempo).
+
+    Returns: quantidade de licitações pontuadas
+    """
+    with engine.begin() as conn:
+        ufs = ufs_com_demanda(conn)
+        total = conn.execute(text(f"""
+            UPDATE bronze_pncp_licitacoes
+            SET prioridade_itens = {SQL_PRIORIDADE}
+            WHERE status_itens = 'PENDING'
+        """), {
+            "ufs": ufs,
+            "peso_prazo": PESO_PRAZO,
+            "peso_demanda": PESO_DEMANDA,
+            "peso_valor": PESO_VALOR,
+            "valor_referencia": VALOR_REFERENCIA,
+        }).rowcount
+    logger.info(f"🎯 Prioridades recalculadas: {total} licitações pendentes ({len(ufs)} UFs com perfis ativos)")
+    return total
@@ -0,0 +1,56 @@
+"""
+Codec JSON plugável: usa orjson quando instalado e cai para a stdlib caso contrário.
+
+Usado nos caminhos quentes: corpo das respostas HTTP do PNCP, serialização dos
+payloads Bronze e decodificação do JSONB no Silver. `PNCP_JSON_CODEC=stdlib`
+força a stdlib (útil para comparar resultados).
+"""
+
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # Dependência opcional
+    orjson = None
+
+USAR_ORJSON = orjson is not None and os.getenv("PNCP_JSON_CODEC", "orjson") != "stdlib"
+NOME = "orjson" if USAR_ORJSON else "stdlib"
+
+
+if USAR_ORJSON:
+    def loads(dados):
+        """Decodifica str/bytes JSON."""
+        return orjson.loads(dados)
+
+    def dumps(obj):
+        """Serializa para str JSON."""
+        return orjson.dumps(obj).decode('utf-8')
+else:
+    def loads(dados):
+        """Decodifica str/bytes JSON."""
+        return json.loads(dados)
+
+    def dumps(obj):
+        """Serializa para str JSON."""
+        return json.dumps(obj)
+
+
+def registrar_jsonb(engine):
+    """
+    Faz o psycopg2 decodificar json/jsonb com este codec nas conexões do engine.
+    Sem orjson não altera nada (o psycopg2 já usa json.loads).
+    """
+    if not USAR_ORJSON:
+        return
+
+    from sqlalchemy import event
+    import psycopg2.extras
+
+    @event.listens_for(engine, "connect")
+    def _registrar(dbapi_conn, _):
+        psycopg2.extras.register_default_json(dbapi_conn, loads=loads)
+        psycopg2.extras.register_default_jsonb(dbapi_conn, loads=loads)
@@ -0,0 +1,177 @@
+"""
+Registro de métricas em memória do processo (contadores, gauges e histogramas).
+
+Expõe um snapshot em dicionário (API in-process) e a exportação no formato texto do
+Prometheus, gravada em arquivo ao final dos jobs (textfile collector do node_exporter).
+"""
+
+import os
+import time
+import threading
+
+BUCKETS_LATENCIA = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _chave(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatar_labels(chave, extra=None):
+    pares = list(chave) + (extra or [])
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nome, ajuda):
+        self.nome = nome
+        self.ajuda = ajuda
+        self._valores = {}
+        self._lock = threading.Lock()
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def inc(self, quantidade=1, **labels):
+        chave = _chave(labels)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + quantidade
+
+    def valor(self, **labels):
+        return self._valores.get(_chave(labels), 0)
+
+    def snapshot(self):
+        with self._lock:
+            return {chave: valor for chave, valor in self._valores.items()}
+
+    def linhas_prometheus(self):
+        return [f"{self.nome}{_formatar_labels(chave)} {valor}" for chave, valor in self.snapshot().items()]
+
+
+class Gauge(Contador):
+    tipo = "gauge"
+
+    def definir(self, valor, **labels):
+        with self._lock:
+            self._valores[_chave(labels)] = valor
+
+    def maximo(self, valor, **labels):
+        """Mantém o maior valor observado (ex.: profundidade máxima de fila)."""
+        chave = _chave(labels)
+        with self._lock:
+            if valor > self._valores.get(chave, float('-inf')):
+                self._valores[chave] = valor
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nome, ajuda, buckets=BUCKETS_LATENCIA):
+        super().__init__(nome, ajuda)
+        self.buckets = tuple(sorted(buckets))
+
+    def observar(self, valor, **labels):
+        chave = _chave(labels)
+        with self._lock:
+            atual = self._valores.get(chave)
+            if atual is None:
+                atual = {"buckets": [0] * len(self.buckets), "soma": 0.0, "contagem": 0}
+                self._valores[chave] = atual
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    atual["buckets"][i] += 1
+            atual["soma"] += valor
+            atual["contagem"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                chave: {"buckets": dict(zip(self.buckets, v["buckets"])), "soma": v["soma"], "contagem": v["contagem"]}
+                for chave, v in self._valores.items()
+            }
+
+    def linhas_prometheus(self):
+        linhas = []
+        for chave, v in self.snapshot().items():
+            for limite, quantidade in v["buckets"].items():
+                linhas.append(f"{self.nome}_bucket{_formatar_labels(chave, [('le', limite)])} {quantidade}")
+            linhas.append(f"{self.nome}_bucket{_formatar_labels(chave, [('le', '+Inf')])} {v['contagem']}")
+            linhas.append(f"{self.nome}_sum{_formatar_labels(chave)} {v['soma']}")
+            linhas.append(f"{self.nome}_count{_formatar_labels(chave)} {v['contagem']}")
+        return linhas
+
+
+class RegistroMetricas:
+    """Conjunto de métricas nomeadas; criar a mesma métrica duas vezes devolve a existente."""
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _obter(self, classe, nome, ajuda, **kwargs):
+        with self._lock:
+            metrica = self._metricas.get(nome)
+            if metrica is None:
+                metrica = classe(nome, ajuda, **kwargs)
+                self._metricas[nome] = metrica
+            return metrica
+
+    def contador(self, nome, ajuda):
+        return self._obter(Contador, nome, ajuda)
+
+    def gauge(self, nome, ajuda):
+        return self._obter(Gauge, nome, ajuda)
+
+    def histograma(self, nome, ajuda, buckets=BUCKETS_LATENCIA):
+        return self._obter(Histograma, nome, ajuda, buckets=buckets)
+
+    def snapshot(self):
+        """Estado atual: {nome: {labels (tupla de pares): valor}}."""
+        with self._lock:
+            metricas = list(self._metricas.values())
+        return {m.nome: m.snapshot() for m in metricas}
+
+    def exportar_prometheus(self):
+        with self._lock:
+            metricas = list(self._metricas.values())
+        linhas = []
+        for m in metricas:
+            linhas.append(f"# HELP {m.nome} {m.ajuda}")
+            linhas.append(f"# TYPE {m.nome} {m.tipo}")
+            linhas.extend(m.linhas_prometheus())
+        return "\n".join(linhas) + "\n"
+
+    def gravar_arquivo(self, caminho):
+        """Grava o formato texto do Prometheus de forma atômica (o collector nunca lê arquivo pela metade)."""
+        caminho = str(caminho)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "w") as arquivo:
+            arquivo.write(self.exportar_prometheus())
+        os.replace(temporario, caminho)
+
+
+# Registro único do processo
+registro = RegistroMetricas()
+
+
+class Cronometro:
+    """Context manager que soma o tempo decorrido em um contador (ex.: tempo ocupado de workers)."""
+
+    def __init__(self, contador, **labels):
+        self.contador = contador
+        self.labels = labels
+
+    def __enter__(self):
+        self.inicio = time.monotonic()
+        return self
+
+    def __exit__(self, *_):
+        self.contador.inc(time.monotonic() - self.inicio, **self.labels)
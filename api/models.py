@@ -2,12 +2,12 @@
 Modelos de banco de dados para o sistema de notificações por e-mail.
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Text, TIMESTAMP, ForeignKey, UniqueConstraint, Index
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.sql import func
-import os
 from dotenv import load_dotenv
+from api.database import get_engine, criar_schema
 
 load_dotenv()
 
@@ -49,17 +49,11 @@ def init_db():
     """
     Inicializa o banco de dados criando as tabelas necessárias.
     """
-    db_url = os.getenv("DATABASE_URL")
+    # Engine compartilhado pelo processo (api/database.py)
+    engine = get_engine()
     
-    # Tratamento para URL do Supabase/PostgreSQL
-    if db_url and db_url.startswith("postgres://"):
-        db_url = db_url.replace("postgres://", "postgresql://", 1)
-    
-    # Otimizado para servidor dedicado (Hetzner)
-    engine = create_engine(db_url, pool_size=10, max_overflow=20)
-    
-    # Cria a tabela se não existir
-    Base.metadata.create_all(engine)
+    # Cria a tabela se não existir (uma vez por processo)
+    criar_schema(Base, engine)
     
     return engine
 
@@ -74,7 +68,7 @@ def get_session():
 
 
 if __name__ == "__main__":
-    # Para criar a tabela manualmente, execute: python api/models.py
+    # Para criar a tabela manualmente, execute na raiz do projeto: python -m api.models
     print("🔧 Criando tabelas no banco de dados...")
     init_db()
     print("✅ Tabela email_notifications criada com sucesso!")
@@ -3,14 +3,14 @@ Serviço de notificações por e-mail para licitações.
 Busca licitações que correspondem aos perfis dos usuários e envia notificações.
 """
 
-import os
 import re
 import logging
 from datetime import datetime
 from typing import List, Dict, Any, Optional
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from api.database import get_engine
 
 load_dotenv()
 
@@ -31,15 +31,8 @@ class NotificationService:
         Args:
             db_url: URL de conexão com o banco de dados
         """
-        if not db_url:
-            db_url = os.getenv("DATABASE_URL")
-        
-        # Tratamento para URL do Supabase/PostgreSQL
-        if db_url and db_url.startswith("postgres://"):
-            db_url = db_url.replace("postgres://", "postgresql://", 1)
-        
-        # Otimizado para servidor dedicado (Hetzner)
-        self.engine = create_engine(db_url, pool_size=10, max_overflow=20)
+        # Engine compartilhado pelo processo (api/database.py); sem db_url usa DATABASE_URL
+        self.engine = get_engine(db_url)
         self.Session = sessionmaker(bind=self.engine)
     
     def parse_keywords(self, keywords_str: str) -> List[str]:
@@ -434,7 +427,7 @@ class NotificationService:
 
 
 if __name__ == "__main__":
-    # Teste do serviço
+    # Teste do serviço (na raiz do projeto: python -m api.notification_service)
     service = NotificationService()
     
     print("🧪 Testando busca de perfis ativos...")
@@ -0,0 +1,23 @@
+"""
+Hash de conteúdo dos payloads do PNCP.
+
+O hash é calculado no cliente sobre o JSON canonicalizado (chaves ordenadas, sem
+espaços), então a mesma licitação/item gera o mesmo hash independente da ordem das
+chaves devolvida pela API ou pelo JSONB do Postgres.
+"""
+
+import hashlib
+import json
+
+
+def canonicalizar(payload):
+    """
+    Serializa o payload de forma determinística.
+    Sempre via stdlib (não api/json_codec): o hash não pode mudar com o codec instalado.
+    """
+    return json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def calcular_hash(payload):
+    """SHA-256 (hex, 64 caracteres) do payload canonicalizado."""
+    return hashlib.sha256(canonicalizar(payload).encode('utf-8')).hexdigest()
@@ -0,0 +1,108 @@
+"""
+Limitador de taxa adaptativo (token bucket + AIMD) para as chamadas à API do PNCP.
+
+A taxa sobe aditivamente enquanto as respostas chegam saudáveis e cai
+multiplicativamente em 429/5xx, timeouts ou picos de latência. Assim o crawler e o
+coletor de itens rodam na maior taxa que a API tolera, em vez de um valor fixo.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURAÇÕES ---
+TAXA_INICIAL = float(os.getenv("PNCP_TAXA_INICIAL", "10"))  # requisições/segundo
+TAXA_MINIMA = float(os.getenv("PNCP_TAXA_MINIMA", "1"))
+TAXA_MAXIMA = float(os.getenv("PNCP_TAXA_MAXIMA", "100"))
+INCREMENTO = float(os.getenv("PNCP_TAXA_INCREMENTO", "1"))  # req/s ganhos por segundo saudável
+FATOR_REDUCAO = float(os.getenv("PNCP_TAXA_FATOR_REDUCAO", "0.5"))
+LATENCIA_MAXIMA = float(os.getenv("PNCP_LATENCIA_MAXIMA", "10"))  # segundos
+
+STATUS_SOBRECARGA = (429, 500, 502, 503, 504)
+
+
+class LimitadorAdaptativo:
+    """Token bucket thread-safe cuja taxa é ajustada por AIMD."""
+
+    def __init__(self, taxa_inicial=TAXA_INICIAL, taxa_minima=TAXA_MINIMA, taxa_maxima=TAXA_MAXIMA,
+                 incremento=INCREMENTO, fator_reducao=FATOR_REDUCAO, latencia_maxima=LATENCIA_MAXIMA):
+        self.taxa_minima = taxa_minima
+        self.taxa_maxima = taxa_maxima
+        self.incremento = incremento
+        self.fator_reducao = fator_reducao
+        self.latencia_maxima = latencia_maxima
+
+        self._taxa = min(max(taxa_inicial, taxa_minima), taxa_maxima)
+        self._tokens = 1.0
+        self._ultimo_refill = time.monotonic()
+        self._ultima_reducao = 0.0
+        self._latencia_media = None
+        self._lock = threading.Lock()
+
+    @property
+    def taxa(self):
+        """Taxa atual em requisições por segundo."""
+        return self._taxa
+
+    def _refill(self, agora):
+        # Capacidade de 1 segundo de taxa: permite pequenas rajadas sem acumular crédito
+        capacidade = max(1.0, self._taxa)
+        self._tokens = min(capacidade, self._tokens + (agora - self._ultimo_refill) * self._taxa)
+        self._ultimo_refill = agora
+
+    def _tentar_adquirir(self):
+        """Consome um token se houver. Returns: 0 se adquiriu, senão segundos até o próximo token"""
+        with self._lock:
+            agora = time.monotonic()
+            self._refill(agora)
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / self._taxa
+
+    def adquirir(self):
+        """Bloqueia até haver um token disponível."""
+        while True:
+            espera = self._tentar_adquirir()
+            if not espera:
+                return
+            time.sleep(espera)
+
+    async def adquirir_async(self):
+        """Como adquirir(), mas espera no event loop em vez de bloquear a thread."""
+        while True:
+            espera = self._tentar_adquirir()
+            if not espera:
+                return
+            await asyncio.sleep(espera)
+
+    def registrar(self, status_code, latencia):
+        """
+        Ajusta a taxa a partir do resultado de uma requisição.
+
+        Args:
+            status_code: status HTTP, ou None para timeout/erro de conexão
+            latencia: duração da requisição em segundos
+        """
+        with self._lock:
+            pico = latencia > self.latencia_maxima or (
+                self._latencia_media is not None and latencia > 1.0 and latencia > 3 * self._latencia_media
+            )
+            if status_code is not None and not pico:
+                media = self._latencia_media
+                self._latencia_media = latencia if media is None else 0.9 * media + 0.1 * latencia
+
+            if status_code is None or status_code in STATUS_SOBRECARGA or pico:
+                agora = time.monotonic()
+                # Requisições em voo falham juntas: no máximo uma redução por janela de latência
+                if agora - self._ultima_reducao >= max(1.0, self._latencia_media or 0):
+                    self._ultima_reducao = agora
+                    self._taxa = max(self.taxa_minima, self._taxa * self.fator_reducao)
+                    logger.warning(f"🐢 PNCP sobrecarregado (status {status_code}, {latencia:.2f}s): taxa reduzida para {self._taxa:.1f} req/s")
+            else:
+                # Aumento aditivo: ~`incremento` req/s a cada segundo de respostas saudáveis
+                self._taxa = min(self.taxa_maxima, self._taxa + self.incremento / self._taxa)
@@ -0,0 +1,109 @@
+"""
+Gravação/reprodução offline das respostas brutas da API do PNCP.
+
+- record: toda resposta com status terminal (PNCP_CACHE_STATUS, padrão 200/204/404 — no
+  endpoint de itens, 404 é "sem itens") obtida da API é gravada em disco;
+- replay: as respostas gravadas são servidas sem acessar pncp.gov.br.
+
+O armazenamento é endereçado por conteúdo: o corpo comprimido (gzip) fica em
+`objetos/<sha256 do corpo>.gz` e cada requisição (URL + params) tem um índice em
+`requisicoes/<sha256 da requisição>.json` apontando para o corpo. Respostas iguais
+(ex.: páginas vazias) são gravadas uma única vez.
+
+Serve para reprocessar o Silver após correções de parser sem recrawl e para
+benchmarks repetíveis dos estágios seguintes em máquinas sem rede.
+"""
+
+import os
+import gzip
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MODOS = ("off", "record", "replay")
+
+# --- CONFIGURAÇÕES ---
+MODO = os.getenv("PNCP_CACHE_MODO", "off")
+DIRETORIO = Path(os.getenv("PNCP_CACHE_DIR", str(Path(__file__).resolve().parent.parent / "cache_respostas")))
+# Status gravados: respostas definitivas; 429/5xx são transitórios e não entram no cache
+STATUS_GRAVADOS = tuple(int(s) for s in os.getenv("PNCP_CACHE_STATUS", "200,204,404").split(","))
+
+
+class RespostaNaoGravada(LookupError):
+    """Requisição sem resposta gravada no modo replay."""
+
+
+def configurar(modo, diretorio=None):
+    """Altera o modo (off/record/replay) e, opcionalmente, o diretório do cache."""
+    global MODO, DIRETORIO
+    if modo not in MODOS:
+        raise ValueError(f"Modo de cache inválido: {modo} (use {', '.join(MODOS)})")
+    MODO = modo
+    if diretorio:
+        DIRETORIO = Path(diretorio)
+    logger.info(f"💾 Cache de respostas PNCP: modo {MODO} em {DIRETORIO}")
+
+
+def gravando():
+    return MODO == "record"
+
+
+def reproduzindo():
+    return MODO == "replay"
+
+
+def deve_gravar(status_code):
+    """True se a resposta deve ir para o cache (modo record e status em STATUS_GRAVADOS)."""
+    return MODO == "record" and status_code in STATUS_GRAVADOS
+
+
+def chave_requisicao(url, params=None):
+    """Chave determinística da requisição (URL + params ordenados)."""
+    base = json.dumps({"url": url, "params": params or {}}, sort_keys=True, default=str)
+    return hashlib.sha256(base.encode('utf-8')).hexdigest()
+
+
+def _caminho_indice(chave):
+    return DIRETORIO / "requisicoes" / chave[:2] / f"{chave}.json"
+
+
+def _caminho_objeto(hash_corpo):
+    return DIRETORIO / "objetos" / hash_corpo[:2] / f"{hash_corpo}.gz"
+
+
+def _escrever_atomico(caminho, dados):
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(f"{caminho.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    temporario.write_bytes(dados)
+    os.replace(temporario, caminho)
+
+
+def gravar(url, params, status_code, corpo):
+    """Grava o corpo (bytes) e o índice da requisição."""
+    hash_corpo = hashlib.sha256(corpo).hexdigest()
+    objeto = _caminho_objeto(hash_corpo)
+    if not objeto.exists():
+        _escrever_atomico(objeto, gzip.compress(corpo))
+
+    indice = {"url": url, "params": params or {}, "status": status_code, "corpo": hash_corpo}
+    _escrever_atomico(_caminho_indice(chave_requisicao(url, params)), json.dumps(indice).encode('utf-8'))
+
+
+def ler(url, params):
+    """
+    Retorna (status_code, corpo_bytes) gravados para a requisição.
+
+    Raises:
+        RespostaNaoGravada: se a requisição não estiver no cache
+    """
+    caminho = _caminho_indice(chave_requisicao(url, params))
+    if not caminho.exists():
+        raise RespostaNaoGravada(f"Sem resposta gravada para {url} {params}")
+
+    indice = json.loads(caminho.read_text())
+    corpo = gzip.decompress(_caminho_objeto(indice["corpo"]).read_bytes())
+    return indice["status"], corpo
@@ -1,11 +1,16 @@
 import os
+import re
 import logging
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker
 from flask import jsonify
 from pathlib import Path
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from api.database import get_engine
+from api import json_codec
+from api.change_queue import FILAS, FONTE, criar_fila, remover_da_fila, tamanho_fila, truncar_se_vazia
 
 # --- CARREGAMENTO DE CONFIGURAÇÕES ---
 base_dir = Path(__file__).resolve().parent
@@ -22,6 +27,290 @@ DB_CONNECTION_STRING = os.getenv("DATABASE_URL")
 if DB_CONNECTION_STRING and DB_CONNECTION_STRING.startswith("postgres://"):
     DB_CONNECTION_STRING = DB_CONNECTION_STRING.replace("postgres://", "postgresql://", 1)
 
+# Workers paralelos do processar_tudo (ajuste baseado na CPU/memória disponível)
+SILVER_WORKERS = int(os.getenv("SILVER_WORKERS", "4"))
+
+# "python": normaliza os payloads em Python (implementação de referência);
+# "sql": INSERT ... SELECT com extração JSONB no próprio banco (payloads não trafegam)
+MODO_TRANSFORMACAO = os.getenv("SILVER_MODO_TRANSFORMACAO", "python").lower()
+
+# "threads": a normalização Python roda nos SILVER_WORKERS threads (serializada pelo GIL);
+# "processos": os payloads vão em texto, em chunks, para um pool de SILVER_PROCESSOS processos
+# e um único carregador grava as tuplas devolvidas (só no modo de transformação "python")
+EXECUCAO = os.getenv("SILVER_EXECUCAO", "threads").lower()
+SILVER_PROCESSOS = int(os.getenv("SILVER_PROCESSOS", "0")) or os.cpu_count() or 1
+TAMANHO_CHUNK_PROCESSOS = 1000
+
+# De onde vem o trabalho (SILVER_FONTE, "status" ou "fila"): FONTE vem de api/change_queue.py,
+# que os merges do crawler/coletor também leem para decidir se enfileiram
+
+# Colunas Bronze lidas pelas consultas abaixo (placeholder {colunas}), conforme quem normaliza:
+# "payload" - Python nos threads; "texto" - Python nos processos (o JSON só é decodificado no
+# pool); "ids" - SQL no banco (o payload não sai do banco)
+COLUNAS_LICITACOES = {
+    "payload": "T1.id, T1.payload",
+    "texto": "T1.id, T1.payload::text",
+    "ids": "T1.id",
+}
+COLUNAS_ITENS = {
+    "payload": "T1.id, T1.licitacao_identificador, T1.payload",
+    "texto": "T1.id, T1.licitacao_identificador, T1.payload::text",
+    "ids": "T1.id",
+}
+
+# Reivindicação dos lotes: cada worker trava as próprias linhas (FOR UPDATE SKIP LOCKED) na
+# transação em que as processa, então N workers pegam N lotes disjuntos; se o worker cair, a
+# transação é desfeita e as linhas voltam a ficar disponíveis.
+SQL_REIVINDICAR_LICITACOES = """
+    SELECT {colunas} FROM bronze_pncp_licitacoes T1
+    WHERE T1.status_processamento = 'PENDING'
+    ORDER BY T1.id
+    LIMIT :limite
+    FOR UPDATE SKIP LOCKED
+"""
+
+SQL_REIVINDICAR_ITENS = """
+    SELECT {colunas}
+    FROM bronze_pncp_itens T1
+    WHERE T1.status_processamento = 'PENDING'
+    AND EXISTS (SELECT 1 FROM silver_licitacoes T2 WHERE T2.identificador_pncp = T1.licitacao_identificador)
+    ORDER BY T1.id
+    LIMIT :limite
+    FOR UPDATE SKIP LOCKED
+"""
+
+# processar_apenas_itens: leitura sem trava, em keyset por id, de cada fonte (SILVER_FONTE):
+# "status" sobre ix_bronze_pncp_itens_pendentes, "fila" sobre a chave de fila_silver_itens.
+# Cada janela é uma consulta com cursor do lado do servidor; com :limite NULL vira a contagem.
+JANELA_LEITURA_ITENS = 100000
+SQL_LER_ITENS_PENDENTES = {
+    "status": """
+    SELECT {colunas}
+    FROM bronze_pncp_itens T1
+    WHERE T1.status_processamento = 'PENDING'
+    AND T1.id > :ultimo_id
+    AND EXISTS (SELECT 1 FROM silver_licitacoes T2 WHERE T2.identificador_pncp = T1.licitacao_identificador)
+    ORDER BY T1.id
+    LIMIT :limite
+""",
+    "fila": """
+    SELECT {colunas}
+    FROM fila_silver_itens F
+    JOIN bronze_pncp_itens T1 ON T1.id = F.bronze_id
+    WHERE F.bronze_id > :ultimo_id
+    AND EXISTS (SELECT 1 FROM silver_licitacoes T2 WHERE T2.identificador_pncp = T1.licitacao_identificador)
+    ORDER BY F.bronze_id
+    LIMIT :limite
+""",
+}
+
+# Consumo das filas (SILVER_FONTE=fila): o lote sai da fila na mesma transação que grava o
+# Silver; se o worker cair, o DELETE é desfeito e os ids voltam para a fila.
+SQL_CONSUMIR_LICITACOES = """
+    WITH lote AS (
+        DELETE FROM fila_silver_licitacoes
+        WHERE bronze_id IN (
+            SELECT bronze_id FROM fila_silver_licitacoes
+            ORDER BY bronze_id
+            LIMIT :limite
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING bronze_id
+    )
+    SELECT {colunas} FROM bronze_pncp_licitacoes T1
+    WHERE T1.id IN (SELECT bronze_id FROM lote)
+    ORDER BY T1.id
+"""
+
+# Itens cuja licitação ainda não está no Silver continuam na fila
+SQL_CONSUMIR_ITENS = """
+    WITH lote AS (
+        DELETE FROM fila_silver_itens
+        WHERE bronze_id IN (
+            SELECT F.bronze_id
+            FROM fila_silver_itens F
+            JOIN bronze_pncp_itens T1 ON T1.id = F.bronze_id
+            WHERE EXISTS (SELECT 1 FROM silver_licitacoes T2 WHERE T2.identificador_pncp = T1.licitacao_identificador)
+            ORDER BY F.bronze_id
+            LIMIT :limite
+            FOR UPDATE OF F SKIP LOCKED
+        )
+        RETURNING bronze_id
+    )
+    SELECT {colunas}
+    FROM bronze_pncp_itens T1
+    WHERE T1.id IN (SELECT bronze_id FROM lote)
+    ORDER BY T1.id
+"""
+
+# --- NORMALIZAÇÃO EM PYTHON (referência; também roda nos processos do modo "processos") ---
+
+# Número em texto aceito nos campos numéricos (a API às vezes manda "12.5"); mesma regra de _sql_numero
+PADRAO_NUMERO = r"^\s*-?[0-9]+(\.[0-9]+)?([eE][-+]?[0-9]+)?\s*$"
+_RE_NUMERO = re.compile(PADRAO_NUMERO)
+
+def numero(valor):
+    """Valor numérico de um campo do payload: números e números em texto; None para o resto."""
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return valor
+    if isinstance(valor, str) and _RE_NUMERO.match(valor):
+        return float(valor)
+    return None
+
+CHAVES_LICITACAO = ("id", "objeto", "ano", "data_p", "data_e", "muni", "uf", "razao", "cnpj", "v_est", "v_hom", "situ", "mod")
+CHAVES_ITEM = ("licit_id", "num", "desc", "qtd", "v_uni", "v_tot", "und", "situ", "cat")
+
+SQL_UPSERT_LICITACOES = """
+    INSERT INTO silver_licitacoes (
+        identificador_pncp, objeto_compra, ano_compra, data_publicacao,
+        data_encerramento, municipio_nome, uf_sigla, orgao_razao_social, orgao_cnpj,
+        valor_total_estimado, valor_total_homologado, situacao_nome, modalidade_nome
+    ) VALUES (
+        :id, :objeto, :ano, :data_p, :data_e, :muni, :uf, :razao, :cnpj, :v_est, :v_hom, :situ, :mod
+    ) ON CONFLICT (identificador_pncp) DO UPDATE SET
+        data_encerramento = EXCLUDED.data_encerramento,
+        valor_total_homologado = EXCLUDED.valor_total_homologado,
+        situacao_nome = EXCLUDED.situacao_nome,
+        objeto_compra = EXCLUDED.objeto_compra;
+"""
+
+SQL_UPSERT_ITENS = """
+    INSERT INTO silver_itens (
+        licitacao_identificador, numero_item, descricao, quantidade,
+        valor_unitario_estimado, valor_total_estimado, unidade_medida,
+        situacao_item_nome, categoria_item_nome
+    ) VALUES (
+        :licit_id, :num, :desc, :qtd, :v_uni, :v_tot, :und, :situ, :cat
+    ) ON CONFLICT (licitacao_identificador, numero_item) DO UPDATE SET
+        descricao = EXCLUDED.descricao,
+        quantidade = EXCLUDED.quantidade,
+        valor_unitario_estimado = EXCLUDED.valor_unitario_estimado,
+        valor_total_estimado = EXCLUDED.valor_total_estimado,
+        unidade_medida = EXCLUDED.unidade_medida,
+        situacao_item_nome = EXCLUDED.situacao_item_nome,
+        categoria_item_nome = EXCLUDED.categoria_item_nome;
+"""
+
+def linha_silver_licitacao(payload):
+    """Licitação normalizada como tupla na ordem de CHAVES_LICITACAO."""
+    orgao = payload.get('orgaoEntidade', {}) or {}
+    unidade = payload.get('unidadeOrgao', {}) or {}
+    objeto = (payload.get('objetoCompra', '') or '').replace('\t', ' ').replace('\n', ' ').strip()
+
+    return (
+        payload.get('numeroControlePNCP'),
+        objeto,
+        payload.get('anoCompra'),
+        payload.get('dataPublicacaoPncp'),
+        payload.get('dataEncerramentoProposta'),
+        unidade.get('municipioNome'),
+        unidade.get('ufSigla'),
+        orgao.get('razaoSocial'),
+        orgao.get('cnpj'),
+        numero(payload.get('valorTotalEstimado')) or 0,
+        numero(payload.get('valorTotalHomologado')),
+        payload.get('situacaoCompraNome'),
+        payload.get('modalidadeNome'),
+    )
+
+def linha_silver_item(identificador_licit, payload):
+    """Item normalizado como tupla na ordem de CHAVES_ITEM."""
+    qtd = numero(payload.get('quantidade')) or 0
+
+    # Tentar diferentes nomes para valor unitário
+    v_uni = (numero(payload.get('valorUnitarioEstimado')) or
+            numero(payload.get('valorUnitario')) or
+            numero(payload.get('valor_unitario')) or 0)
+
+    v_tot_api = numero(payload.get('valorTotal')) or 0
+    v_tot_final = v_tot_api if v_tot_api > 0 else (qtd * v_uni)
+
+    # Tentar diferentes nomes para unidade de medida
+    und_raw = (payload.get('unidadeMedida') or
+              payload.get('unidadeFornecimento') or
+              payload.get('unidade_medida') or '')
+
+    # Truncate de segurança para unidade_medida (limite de 50 caracteres)
+    und_clean = str(und_raw)[:50]
+
+    return (
+        identificador_licit,
+        payload.get('numeroItem'),
+        payload.get('descricao'),
+        qtd,
+        v_uni,
+        v_tot_final,
+        und_clean,
+        payload.get('situacaoCompraItemNome'),
+        payload.get('materialOuServicoNome'),
+    )
+
+def transformar_chunk_licitacoes(linhas):
+    """(id, payload em texto) -> tuplas de linha_silver_licitacao (executa nos processos do pool)."""
+    return [linha_silver_licitacao(json_codec.loads(payload)) for _, payload in linhas]
+
+def transformar_chunk_itens(linhas):
+    """(id, licitacao_identificador, payload em texto) -> tuplas de linha_silver_item (executa nos processos do pool)."""
+    return [linha_silver_item(identificador, json_codec.loads(payload)) for _, identificador, payload in linhas]
+
+# --- TRANSFORMAÇÃO NO BANCO (equivalente a _normalizar_licitacoes/_normalizar_itens) ---
+
+def _sql_numero(campo):
+    """Valor numérico do payload: números e números em texto (PADRAO_NUMERO); NULL para o resto."""
+    return (
+        f"(CASE jsonb_typeof(b.payload->'{campo}') "
+        f"WHEN 'number' THEN (b.payload->>'{campo}')::numeric "
+        f"WHEN 'string' THEN CASE WHEN b.payload->>'{campo}' ~ '{PADRAO_NUMERO}' THEN (b.payload->>'{campo}')::numeric END "
+        f"END)"
+    )
+
+def _sql_primeiro_numero(*campos):
+    """Primeiro campo numérico não-zero, senão 0 (equivale a `a or b or c or 0`)."""
+    return "COALESCE(" + ", ".join(f"NULLIF({_sql_numero(c)}, 0)" for c in campos) + ", 0)"
+
+def _sql_primeiro_texto(*campos):
+    """Primeiro campo texto não-vazio, senão '' (equivale a `a or b or c or ''`)."""
+    return "COALESCE(" + ", ".join(f"NULLIF(b.payload->>'{c}', '')" for c in campos) + ", '')"
+
+_SQL_QTD = f"COALESCE({_sql_numero('quantidade')}, 0)"
+_SQL_V_UNI = _sql_primeiro_numero('valorUnitarioEstimado', 'valorUnitario', 'valor_unitario')
+
+# Coluna Silver -> expressão sobre a linha Bronze `b`
+CAMPOS_SQL_LICITACOES = {
+    "identificador_pncp": "b.payload->>'numeroControlePNCP'",
+    "objeto_compra": r"btrim(translate(COALESCE(b.payload->>'objetoCompra', ''), E'\t\n', '  '), E' \t\n\r\f\v')",
+    "ano_compra": "b.payload->>'anoCompra'",
+    "data_publicacao": "b.payload->>'dataPublicacaoPncp'",
+    "data_encerramento": "b.payload->>'dataEncerramentoProposta'",
+    "municipio_nome": "b.payload->'unidadeOrgao'->>'municipioNome'",
+    "uf_sigla": "b.payload->'unidadeOrgao'->>'ufSigla'",
+    "orgao_razao_social": "b.payload->'orgaoEntidade'->>'razaoSocial'",
+    "orgao_cnpj": "b.payload->'orgaoEntidade'->>'cnpj'",
+    "valor_total_estimado": f"COALESCE({_sql_numero('valorTotalEstimado')}, 0)",
+    "valor_total_homologado": _sql_numero('valorTotalHomologado'),
+    "situacao_nome": "b.payload->>'situacaoCompraNome'",
+    "modalidade_nome": "b.payload->>'modalidadeNome'",
+}
+
+CAMPOS_SQL_ITENS = {
+    "licitacao_identificador": "b.licitacao_identificador",
+    "numero_item": "b.payload->>'numeroItem'",
+    "descricao": "b.payload->>'descricao'",
+    "quantidade": _SQL_QTD,
+    "valor_unitario_estimado": _SQL_V_UNI,
+    # Valor total da API quando positivo, senão quantidade x valor unitário
+    "valor_total_estimado": (
+        f"CASE WHEN COALESCE({_sql_numero('valorTotal')}, 0) > 0 THEN {_sql_numero('valorTotal')} "
+        f"ELSE {_SQL_QTD} * {_SQL_V_UNI} END"
+    ),
+    # Truncate de segurança para unidade_medida (limite de 50 caracteres)
+    "unidade_medida": f"left({_sql_primeiro_texto('unidadeMedida', 'unidadeFornecimento', 'unidade_medida')}, 50)",
+    "situacao_item_nome": "b.payload->>'situacaoCompraItemNome'",
+    "categoria_item_nome": "b.payload->>'materialOuServicoNome'",
+}
+
 # --- FUNÇÕES DE TRANSFORMAÇÃO ---
 
 def transformar_licitacao(session, bronze_id, payload):
@@ -122,69 +411,44 @@ def transformar_item(session, bronze_item_id, identificador_licit, payload):
 
 class SilverProcessor:
     def __init__(self, db_string):
-        # Otimizado para servidor dedicado (Hetzner)
-        pool_size = 10
-        max_overflow = 20
-        self.engine = create_engine(db_string, pool_size=pool_size, max_overflow=max_overflow)
+        # Engine compartilhado pelo processo (api/database.py); o JSONB dos payloads
+        # chega já decodificado pelo codec de api/json_codec.py
+        self.engine = get_engine(db_string)
         self.Session = sessionmaker(bind=self.engine)
+        self._tipos = {}
+        # SILVER_FONTE=fila (api/change_queue.py): garante as filas mesmo antes das migrações do crawler/coletor
+        if FONTE == "fila":
+            with self.engine.begin() as conn:
+                for tabela in FILAS:
+                    criar_fila(conn, tabela)
+        logger.info(f"🧩 Codec JSON: {json_codec.NOME} | Transformação: {MODO_TRANSFORMACAO} | Fonte: {FONTE}")
+
+    def _marcar_processados(self, session, tabela, ids):
+        """Marca os ids Bronze como PROCESSED; com a fila o consumo já os retirou e o Bronze não é tocado."""
+        if FONTE == "fila" or not ids:
+            return
+        session.execute(text(f"UPDATE {tabela} SET status_processamento = 'PROCESSED' WHERE id = ANY(:ids)"), {"ids": ids})
+
+    def _normalizar_licitacoes(self, session, pendentes):
+        """Upsert das linhas (id, payload) em silver_licitacoes e marca o Bronze como PROCESSED (sem commit)."""
+        linhas = [linha_silver_licitacao(r[1]) for r in pendentes]
+        self._gravar_licitacoes(session, [r[0] for r in pendentes], linhas)
+
+    def _gravar_licitacoes(self, session, ids_para_update, linhas):
+        """Grava as tuplas de linha_silver_licitacao e marca os ids Bronze como PROCESSED (sem commit)."""
+        # Bulk insert licitações
+        if linhas:
+            session.execute(text(SQL_UPSERT_LICITACOES), [dict(zip(CHAVES_LICITACAO, linha)) for linha in linhas])
+
+            # Bulk update status
+            self._marcar_processados(session, "bronze_pncp_licitacoes", ids_para_update)
 
     def processar_batch_licitacoes(self, batch_data):
         """Processa um lote de licitações em paralelo."""
         session = self.Session()
         try:
             pendentes, offset = batch_data
-
-            # BULK INSERT: preparar dados para inserção em lote
-            licitacoes_data = []
-            ids_para_update = []
-
-            for r in pendentes:
-                bronze_id, payload = r[0], r[1]
-                ids_para_update.append(bronze_id)
-
-                # Preparar dados para bulk insert
-                orgao = payload.get('orgaoEntidade', {}) or {}
-                unidade = payload.get('unidadeOrgao', {}) or {}
-                objeto = (payload.get('objetoCompra', '') or '').replace('\t', ' ').replace('\n', ' ').strip()
-
-                licitacoes_data.append({
-                    "id": payload.get('numeroControlePNCP'),
-                    "objeto": objeto,
-                    "ano": payload.get('anoCompra'),
-                    "data_p": payload.get('dataPublicacaoPncp'),
-                    "data_e": payload.get('dataEncerramentoProposta'),
-                    "muni": unidade.get('municipioNome'),
-                    "uf": unidade.get('ufSigla'),
-                    "razao": orgao.get('razaoSocial'),
-                    "cnpj": orgao.get('cnpj'),
-                    "v_est": payload.get('valorTotalEstimado') or 0,
-                    "v_hom": payload.get('valorTotalHomologado'),
-                    "situ": payload.get('situacaoCompraNome'),
-                    "mod": payload.get('modalidadeNome')
-                })
-
-            # Bulk insert licitações
-            if licitacoes_data:
-                stmt_licit = text("""
-                    INSERT INTO silver_licitacoes (
-                        identificador_pncp, objeto_compra, ano_compra, data_publicacao,
-                        data_encerramento, municipio_nome, uf_sigla, orgao_razao_social, orgao_cnpj,
-                        valor_total_estimado, valor_total_homologado, situacao_nome, modalidade_nome
-                    ) VALUES (
-                        :id, :objeto, :ano, :data_p, :data_e, :muni, :uf, :razao, :cnpj, :v_est, :v_hom, :situ, :mod
-                    ) ON CONFLICT (identificador_pncp) DO UPDATE SET
-                        data_encerramento = EXCLUDED.data_encerramento,
-                        valor_total_homologado = EXCLUDED.valor_total_homologado,
-                        situacao_nome = EXCLUDED.situacao_nome,
-                        objeto_compra = EXCLUDED.objeto_compra;
-                """)
-                session.execute(stmt_licit, licitacoes_data)
-
-                # Bulk update status
-                if ids_para_update:
-                    stmt_update = text("UPDATE bronze_pncp_licitacoes SET status_processamento = 'PROCESSED' WHERE id = ANY(:ids)")
-                    session.execute(stmt_update, {"ids": ids_para_update})
-
+            self._normalizar_licitacoes(session, pendentes)
             session.commit()
             return len(pendentes)
         except Exception as e:
@@ -194,71 +458,33 @@ class SilverProcessor:
         finally:
             session.close()
 
+    def _normalizar_itens(self, session, pendentes_itens):
+        """Upsert das linhas (id, licitacao_identificador, payload) em silver_itens e marca o Bronze como PROCESSED (sem commit)."""
+        linhas = [linha_silver_item(r[1], r[2]) for r in pendentes_itens]
+        self._gravar_itens(session, [r[0] for r in pendentes_itens], linhas)
+
+    def _gravar_itens(self, session, ids_para_update, linhas):
+        """Grava as tuplas de linha_silver_item e marca os ids Bronze como PROCESSED (sem commit)."""
+        # Bulk insert itens
+        if linhas:
+            session.execute(text(SQL_UPSERT_ITENS), [dict(zip(CHAVES_ITEM, linha)) for linha in linhas])
+
+            # Bulk update status
+            self._marcar_processados(session, "bronze_pncp_itens", ids_para_update)
+
     def processar_batch_itens(self, batch_data):
         """Processa um lote de itens em paralelo."""
         session = self.Session()
         try:
-            pendentes_itens, offset = batch_data
+            pendentes_itens, primeiro_id = batch_data
 
             # Log de progresso do lote
-            logger.info(f"📦 Processando lote de {len(pendentes_itens)} itens (offset: {offset})")
-
-            # BULK INSERT: preparar dados para inserção em lote
-            itens_data = []
-            ids_para_update = []
-
-            for r in pendentes_itens:
-                bronze_item_id, identificador_licit, payload = r[0], r[1], r[2]
-                ids_para_update.append(bronze_item_id)
-
-                # Preparar dados para bulk insert
-                qtd = payload.get('quantidade') or 0
-
-                # Tentar diferentes nomes para valor unitário
-                v_uni = (payload.get('valorUnitarioEstimado') or
-                        payload.get('valorUnitario') or
-                        payload.get('valor_unitario') or 0)
-
-                v_tot_api = payload.get('valorTotal') or 0
-                v_tot_final = v_tot_api if v_tot_api > 0 else (qtd * v_uni)
-
-                # Tentar diferentes nomes para unidade de medida
-                und_raw = (payload.get('unidadeMedida') or
-                          payload.get('unidadeFornecimento') or
-                          payload.get('unidade_medida') or '')
-
-                und_clean = str(und_raw)[:50]
-
-                itens_data.append({
-                    "licit_id": identificador_licit,
-                    "num": payload.get('numeroItem'),
-                    "desc": payload.get('descricao'),
-                    "qtd": qtd,
-                    "v_uni": v_uni,
-                    "v_tot": v_tot_final,
-                    "und": und_clean,
-                    "situ": payload.get('situacaoCompraItemNome'),
-                    "cat": payload.get('materialOuServicoNome')
-                })
-
-            # Bulk insert itens
-            if itens_data:
-                stmt_itens = text("""
-                    INSERT INTO silver_itens (
-                        licitacao_identificador, numero_item, descricao, quantidade,
-                        valor_unitario_estimado, valor_total_estimado, unidade_medida,
-                        situacao_item_nome, categoria_item_nome
-                    ) VALUES (
-                        :licit_id, :num, :desc, :qtd, :v_uni, :v_tot, :und, :situ, :cat
-                    ) ON CONFLICT (licitacao_identificador, numero_item) DO NOTHING;
-                """)
-                session.execute(stmt_itens, itens_data)
-
-                # Bulk update status
-                if ids_para_update:
-                    stmt_update = text("UPDATE bronze_pncp_itens SET status_processamento = 'PROCESSED' WHERE id = ANY(:ids)")
-                    session.execute(stmt_update, {"ids": ids_para_update})
+            logger.info(f"📦 Processando lote de {len(pendentes_itens)} itens (a partir do id {primeiro_id})")
 
+            self._normalizar_itens(session, pendentes_itens)
+            if FONTE == "fila":
+                # Lidos da fila sem consumir (ver _ler_itens_pendentes): saem dela com o lote
+                remover_da_fila(session, "bronze_pncp_itens", [r[0] for r in pendentes_itens])
             session.commit()
             logger.info(f"✅ Lote processado: {len(pendentes_itens)} itens inseridos/atualizados")
             return len(pendentes_itens)
@@ -269,6 +495,226 @@ class SilverProcessor:
         finally:
             session.close()
 
+    def _tipos_colunas(self, session, tabela):
+        """Tipos SQL das colunas de `tabela` (cache por processador), para os CASTs do modo SQL."""
+        if tabela not in self._tipos:
+            linhas = session.execute(text("""
+                SELECT attname, format_type(atttypid, atttypmod)
+                FROM pg_attribute
+                WHERE attrelid = CAST(:tabela AS regclass) AND attnum > 0 AND NOT attisdropped
+            """), {"tabela": tabela}).fetchall()
+            self._tipos[tabela] = dict(linhas)
+        return self._tipos[tabela]
+
+    def _select_transformacao(self, session, tabela, campos):
+        """Lista do SELECT com cada expressão convertida para o tipo da coluna Silver."""
+        tipos = self._tipos_colunas(session, tabela)
+        return ",\n".join(f"CAST({expr} AS {tipos[coluna]})" for coluna, expr in campos.items())
+
+    def _normalizar_licitacoes_sql(self, session, pendentes):
+        """Mesmo resultado de _normalizar_licitacoes, calculado no banco para os ids de `pendentes`."""
+        ids = [r[0] for r in pendentes]
+        select = self._select_transformacao(session, "silver_licitacoes", CAMPOS_SQL_LICITACOES)
+        session.execute(text(f"""
+            INSERT INTO silver_licitacoes ({", ".join(CAMPOS_SQL_LICITACOES)})
+            SELECT DISTINCT ON (b.payload->>'numeroControlePNCP') {select}
+            FROM bronze_pncp_licitacoes b
+            WHERE b.id = ANY(:ids)
+            ORDER BY b.payload->>'numeroControlePNCP', b.id DESC
+            ON CONFLICT (identificador_pncp) DO UPDATE SET
+                data_encerramento = EXCLUDED.data_encerramento,
+                valor_total_homologado = EXCLUDED.valor_total_homologado,
+                situacao_nome = EXCLUDED.situacao_nome,
+                objeto_compra = EXCLUDED.objeto_compra
+        """), {"ids": ids})
+        self._marcar_processados(session, "bronze_pncp_licitacoes", ids)
+
+    def _normalizar_itens_sql(self, session, pendentes_itens):
+        """Mesmo resultado de _normalizar_itens, calculado no banco para os ids de `pendentes_itens`."""
+        ids = [r[0] for r in pendentes_itens]
+        select = self._select_transformacao(session, "silver_itens", CAMPOS_SQL_ITENS)
+        # DISTINCT ON: o ON CONFLICT não aceita a mesma chave duas vezes no mesmo comando;
+        # fica a linha de maior id, como no executemany da versão Python
+        session.execute(text(f"""
+            INSERT INTO silver_itens ({", ".join(CAMPOS_SQL_ITENS)})
+            SELECT DISTINCT ON (b.licitacao_identificador, b.payload->>'numeroItem') {select}
+            FROM bronze_pncp_itens b
+            WHERE b.id = ANY(:ids)
+            ORDER BY b.licitacao_identificador, b.payload->>'numeroItem', b.id DESC
+            ON CONFLICT (licitacao_identificador, numero_item) DO UPDATE SET
+                descricao = EXCLUDED.descricao,
+                quantidade = EXCLUDED.quantidade,
+                valor_unitario_estimado = EXCLUDED.valor_unitario_estimado,
+                valor_total_estimado = EXCLUDED.valor_total_estimado,
+                unidade_medida = EXCLUDED.unidade_medida,
+                situacao_item_nome = EXCLUDED.situacao_item_nome,
+                categoria_item_nome = EXCLUDED.categoria_item_nome
+        """), {"ids": ids})
+        self._marcar_processados(session, "bronze_pncp_itens", ids)
+
+    def _linhas_silver(self, session, normalizar, linhas, tabela, chaves, licitacoes):
+        """Aplica `normalizar` num savepoint, lê as linhas Silver das `licitacoes` e desfaz o savepoint."""
+        savepoint = session.begin_nested()
+        try:
+            normalizar(session, linhas)
+            resultado = session.execute(
+                text(f"SELECT * FROM {tabela} WHERE {chaves[0]} = ANY(:licitacoes)"), {"licitacoes": licitacoes}
+            ).mappings().fetchall()
+        finally:
+            savepoint.rollback()
+        return {tuple(str(r[c]) for c in chaves): dict(r) for r in resultado}
+
+    def comparar_transformacoes(self, amostra=500):
+        """
+        Roda as transformações Python (referência) e SQL sobre as mesmas linhas Bronze e compara
+        as linhas Silver geradas. Nada é gravado: cada lado roda num savepoint desfeito.
+
+        Returns: {"licitacoes": [diferenças], "itens": [diferenças]} (listas vazias = equivalentes)
+        """
+        session = self.Session()
+        try:
+            licitacoes = session.execute(
+                text("SELECT id, payload FROM bronze_pncp_licitacoes ORDER BY id DESC LIMIT :n"), {"n": amostra}
+            ).fetchall()
+            itens = session.execute(text("""
+                SELECT T1.id, T1.licitacao_identificador, T1.payload FROM bronze_pncp_itens T1
+                WHERE EXISTS (SELECT 1 FROM silver_licitacoes T2 WHERE T2.identificador_pncp = T1.licitacao_identificador)
+                ORDER BY T1.id DESC LIMIT :n
+            """), {"n": amostra}).fetchall()
+
+            diferencas = {}
+            for rotulo, linhas, licitacoes_afetadas, tabela, chaves, python, sql in (
+                ("licitacoes", licitacoes, [r[1].get('numeroControlePNCP') for r in licitacoes],
+                 "silver_licitacoes", ["identificador_pncp"],
+                 self._normalizar_licitacoes, self._normalizar_licitacoes_sql),
+                ("itens", itens, [r[1] for r in itens],
+                 "silver_itens", ["licitacao_identificador", "numero_item"],
+                 self._normalizar_itens, self._normalizar_itens_sql),
+            ):
+                if not linhas:
+                    diferencas[rotulo] = []
+                    continue
+                # Mesma ordem da reivindicação (id crescente): em chaves repetidas vence a última linha
+                linhas = sorted(linhas, key=lambda r: r[0])
+                afetadas = list(set(licitacoes_afetadas))
+                esperado = self._linhas_silver(session, python, linhas, tabela, chaves, afetadas)
+                obtido = self._linhas_silver(session, sql, linhas, tabela, chaves, afetadas)
+                diferencas[rotulo] = [
+                    {"chave": chave, "python": esperado.get(chave), "sql": obtido.get(chave)}
+                    for chave in sorted(set(esperado) | set(obtido))
+                    if esperado.get(chave) != obtido.get(chave)
+                ]
+                logger.info(f"🔬 {rotulo}: {len(linhas)} linhas Bronze comparadas, {len(diferencas[rotulo])} diferenças")
+            return diferencas
+        finally:
+            session.rollback()
+            session.close()
+
+    def _processar_lote_reivindicado(self, sql_reivindicar, normalizar, tamanho):
+        """
+        Reivindica até `tamanho` linhas com SKIP LOCKED e normaliza na mesma transação.
+        Returns: quantidade processada (0 = nada disponível). Erros sobem para o chamador.
+        """
+        session = self.Session()
+        try:
+            pendentes = session.execute(text(sql_reivindicar), {"limite": tamanho}).fetchall()
+            if not pendentes:
+                session.rollback()
+                return 0
+            normalizar(session, pendentes)
+            session.commit()
+            return len(pendentes)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _drenar_em_paralelo(self, sql_reivindicar, normalizar, tamanho, num_workers, rotulo):
+        """
+        Cada worker reivindica e processa lotes próprios até não sobrar nada disponível.
+        Um worker que falha para (as linhas do lote voltam a PENDING e ficam para os demais
+        ou para a próxima execução), evitando repetir o mesmo erro em loop.
+        """
+        def worker(numero):
+            total = 0
+            while True:
+                try:
+                    processados = self._processar_lote_reivindicado(sql_reivindicar, normalizar, tamanho)
+                except Exception as e:
+                    logger.error(f"❌ Worker {numero}: erro no processamento de {rotulo}: {e}")
+                    break
+                if processados == 0:
+                    break
+                total += processados
+                logger.info(f"✅ Silver: worker {numero} processou lote de {processados} {rotulo} (bulk).")
+            return total
+
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            futures = [executor.submit(worker, i + 1) for i in range(num_workers)]
+            return sum(future.result() for future in as_completed(futures))
+
+    def _reivindicar_para_processos(self, pool, sql_reivindicar, transformar, tamanho):
+        """
+        Reivindica um lote (a sessão fica aberta segurando as travas) e envia os chunks ao pool.
+
+        Returns: (session, ids Bronze, futures) ou None se não há pendentes
+        """
+        session = self.Session()
+        try:
+            linhas = [tuple(r) for r in session.execute(text(sql_reivindicar), {"limite": tamanho}).fetchall()]
+        except Exception:
+            session.close()
+            raise
+        if not linhas:
+            session.close()
+            return None
+        futures = [
+            pool.submit(transformar, linhas[i:i + TAMANHO_CHUNK_PROCESSOS])
+            for i in range(0, len(linhas), TAMANHO_CHUNK_PROCESSOS)
+        ]
+        return session, [r[0] for r in linhas], futures
+
+    def _drenar_em_processos(self, sql_reivindicar, transformar, gravar, tamanho, rotulo):
+        """
+        Modo "processos": este processo reivindica os lotes e é o único carregador; a
+        normalização (decode do JSON + montagem das tuplas) roda em SILVER_PROCESSOS processos.
+
+        Dois lotes ficam em andamento: enquanto um é gravado, o seguinte já está no pool.
+        Se um lote falha, a drenagem para (as linhas voltam a PENDING), como nos workers em thread.
+        """
+        total = 0
+        em_andamento = deque()
+        with ProcessPoolExecutor(max_workers=SILVER_PROCESSOS) as pool:
+            try:
+                while True:
+                    lote = self._reivindicar_para_processos(pool, sql_reivindicar, transformar, tamanho)
+                    if lote is not None:
+                        em_andamento.append(lote)
+                    elif not em_andamento:
+                        break
+                    if len(em_andamento) < 2 and lote is not None:
+                        continue
+
+                    session, ids, futures = em_andamento.popleft()
+                    try:
+                        linhas = [linha for future in futures for linha in future.result()]
+                        gravar(session, ids, linhas)
+                        session.commit()
+                    finally:
+                        session.close()
+                    total += len(ids)
+                    logger.info(f"✅ Silver: lote de {len(ids)} {rotulo} gravado ({SILVER_PROCESSOS} processos).")
+            except Exception as e:
+                logger.error(f"❌ Erro no processamento de {rotulo} em processos: {e}")
+            finally:
+                # Lotes não gravados: fechar a sessão desfaz a transação e libera as travas
+                for session, _, futures in em_andamento:
+                    for future in futures:
+                        future.cancel()
+                    session.close()
+        return total
+
     def limpar_licitacoes_vencidas(self):
         """Remove licitações cuja data de encerramento já passou."""
         session = self.Session()
@@ -295,170 +741,135 @@ class SilverProcessor:
         """Executa a drenagem das tabelas Bronze em loop até esgotar os pendentes com processamento paralelo."""
 
         # Número de workers paralelos (ajuste baseado na CPU/memória disponível)
-        num_workers = 4  # Pode ser ajustado: 2-8 dependendo do hardware
-
-        # 1. PROCESSAR LICITAÇÕES COM PARALELISMO
-        total_licitacoes_processadas = 0
+        num_workers = SILVER_WORKERS
+
+        if FONTE == "fila":
+            modelo_licitacoes, modelo_itens = SQL_CONSUMIR_LICITACOES, SQL_CONSUMIR_ITENS
+            logger.info(
+                f"📥 Filas de mudanças: {tamanho_fila(self.engine, 'bronze_pncp_licitacoes')} licitações, "
+                f"{tamanho_fila(self.engine, 'bronze_pncp_itens')} itens"
+            )
+        else:
+            modelo_licitacoes, modelo_itens = SQL_REIVINDICAR_LICITACOES, SQL_REIVINDICAR_ITENS
+
+        # Modo "processos": normalização Python fora do GIL (o modo SQL não usa CPU do processo)
+        em_processos = EXECUCAO == "processos" and MODO_TRANSFORMACAO != "sql"
+        if em_processos:
+            logger.info(f"🧮 Normalização em {SILVER_PROCESSOS} processos")
+
+        colunas = "ids" if MODO_TRANSFORMACAO == "sql" else ("texto" if em_processos else "payload")
+        sql_licitacoes = modelo_licitacoes.format(colunas=COLUNAS_LICITACOES[colunas])
+        sql_itens = modelo_itens.format(colunas=COLUNAS_ITENS[colunas])
+        if MODO_TRANSFORMACAO == "sql":
+            licitacoes = (sql_licitacoes, self._normalizar_licitacoes_sql)
+            itens = (sql_itens, self._normalizar_itens_sql)
+        else:
+            licitacoes = (sql_licitacoes, self._normalizar_licitacoes)
+            itens = (sql_itens, self._normalizar_itens)
+
+        # 1. PROCESSAR LICITAÇÕES COM PARALELISMO (cada worker reivindica lotes disjuntos)
         batch_size_licit = 5000
-
-        with ThreadPoolExecutor(max_workers=num_workers) as executor:
-            while True:
-                # Coletar múltiplos lotes para processamento paralelo
-                batches = []
-                session = self.Session()
-                try:
-                    for i in range(num_workers):
-                        sql = text(f"SELECT id, payload FROM bronze_pncp_licitacoes WHERE status_processamento = 'PENDING' LIMIT {batch_size_licit}")
-                        pendentes = session.execute(sql).fetchall()
-                        if not pendentes:
-                            break
-                        batches.append((pendentes, i * batch_size_licit))
-                finally:
-                    session.close()
-
-                if not batches:
-                    break
-
-                # Processar lotes em paralelo
-                futures = [executor.submit(self.processar_batch_licitacoes, batch) for batch in batches]
-                batch_results = []
-                for future in as_completed(futures):
-                    result = future.result()
-                    batch_results.append(result)
-                    total_licitacoes_processadas += result
-
-                logger.info(f"✅ Silver: {len(batch_results)} lotes paralelos processados - {sum(batch_results)} licitações (bulk).")
-
+        if em_processos:
+            total_licitacoes_processadas = self._drenar_em_processos(
+                sql_licitacoes, transformar_chunk_licitacoes, self._gravar_licitacoes, batch_size_licit, "licitações"
+            )
+        else:
+            total_licitacoes_processadas = self._drenar_em_paralelo(*licitacoes, batch_size_licit, num_workers, "licitações")
         logger.info(f"✅ Total licitações processadas: {total_licitacoes_processadas}")
 
         # 2. PROCESSAR ITENS COM PARALELISMO
-        total_itens_processados = 0
         batch_size_itens = 10000
-
-        with ThreadPoolExecutor(max_workers=num_workers) as executor:
-            while True:
-                # Coletar múltiplos lotes para processamento paralelo
-                batches = []
-                session = self.Session()
-                try:
-                    for i in range(num_workers):
-                        sql_itens = text(f"""
-                            SELECT T1.id, T1.licitacao_identificador, T1.payload
-                            FROM bronze_pncp_itens T1
-                            INNER JOIN silver_licitacoes T2 ON T2.identificador_pncp = T1.licitacao_identificador
-                            WHERE T1.status_processamento = 'PENDING'
-                            LIMIT {batch_size_itens}
-                        """)
-                        pendentes_itens = session.execute(sql_itens).fetchall()
-                        if not pendentes_itens:
-                            break
-                        batches.append((pendentes_itens, i * batch_size_itens))
-                finally:
-                    session.close()
-
-                if not batches:
-                    break
-
-                # Processar lotes em paralelo
-                futures = [executor.submit(self.processar_batch_itens, batch) for batch in batches]
-                batch_results = []
-                for future in as_completed(futures):
-                    result = future.result()
-                    batch_results.append(result)
-                    total_itens_processados += result
-
-                logger.info(f"✅ Silver: {len(batch_results)} lotes paralelos processados - {sum(batch_results)} itens (bulk).")
-
+        if em_processos:
+            total_itens_processados = self._drenar_em_processos(
+                sql_itens, transformar_chunk_itens, self._gravar_itens, batch_size_itens, "itens"
+            )
+        else:
+            total_itens_processados = self._drenar_em_paralelo(*itens, batch_size_itens, num_workers, "itens")
         logger.info(f"✅ Total itens processados: {total_itens_processados}")
         logger.info("🎉 Sincronização Bronze -> Silver finalizada com sucesso.")
+
+        # Filas consumidas: o TRUNCATE descarta as versões mortas deixadas pelos DELETEs
+        if FONTE == "fila":
+            for tabela in FILAS:
+                if truncar_se_vazia(self.engine, tabela):
+                    logger.info(f"🧹 Fila de {tabela} truncada")
         
         # LIMPEZA: Remover licitações vencidas
         self.limpar_licitacoes_vencidas()
 
+    def _ler_itens_pendentes(self, tamanho_chunk):
+        """
+        Lê os itens pendentes da fonte (PENDING no Bronze ou na fila, com licitação já no Silver)
+        em ordem de id, em chunks de `tamanho_chunk`. Nada é travado nem removido aqui: quem
+        processa o chunk marca o Bronze ou tira os ids da fila (processar_batch_itens).
+
+        Cada janela de JANELA_LEITURA_ITENS linhas é uma consulta keyset (id > último id lido)
+        sobre o índice da fonte, lida por cursor do lado do servidor; entre janelas a
+        transação de leitura é encerrada para não segurar o snapshot.
+        """
+        sql = SQL_LER_ITENS_PENDENTES[FONTE].format(colunas=COLUNAS_ITENS["payload"])
+        ultimo_id = 0
+        while True:
+            lidos = 0
+            with self.engine.connect() as conn:
+                resultado = conn.execution_options(stream_results=True, max_row_buffer=tamanho_chunk).execute(
+                    text(sql), {"ultimo_id": ultimo_id, "limite": JANELA_LEITURA_ITENS}
+                )
+                while True:
+                    chunk = resultado.fetchmany(tamanho_chunk)
+                    if not chunk:
+                        break
+                    lidos += len(chunk)
+                    ultimo_id = chunk[-1][0]
+                    yield chunk
+            if lidos < JANELA_LEITURA_ITENS:
+                return
+
     def processar_apenas_itens(self):
         """Processa apenas os itens Silver (assume licitações já processadas)."""
         logger.info("🔄 Iniciando processamento APENAS de itens Silver...")
 
-        # Verificar total inicial de itens pendentes
-        session = self.Session()
-        try:
-            total_pendentes_inicial = session.execute(text("""
-                SELECT COUNT(*) FROM bronze_pncp_itens
-                WHERE status_processamento = 'PENDING'
-                AND EXISTS (SELECT 1 FROM silver_licitacoes WHERE identificador_pncp = bronze_pncp_itens.licitacao_identificador)
-            """)).scalar()
-            logger.info(f"📊 Total de itens PENDING para processar: {total_pendentes_inicial}")
-        finally:
-            session.close()
+        # Contagem única, só para o progresso (a leitura não depende dela); mesma consulta do leitor
+        with self.engine.connect() as conn:
+            total_pendentes_inicial = conn.execute(
+                text(f"SELECT COUNT(*) FROM ({SQL_LER_ITENS_PENDENTES[FONTE].format(colunas='T1.id')}) T"),
+                {"ultimo_id": 0, "limite": None},
+            ).scalar()
+        logger.info(f"📊 Total de itens pendentes ({FONTE}) para processar: {total_pendentes_inicial}")
 
         # Número de workers paralelos
-        num_workers = 4
+        num_workers = SILVER_WORKERS
 
-        # PROCESSAR APENAS ITENS COM PARALELISMO
+        # Os chunks são lidos de um único cursor e entregues aos workers; no máximo
+        # 2 chunks por worker ficam em memória (o leitor espera quando a fila enche)
+        batch_size_itens = 1000
+        max_em_voo = num_workers * 2
         total_itens_processados = 0
-        batch_size_itens = 1000  # Lotes menores para melhor controle de progresso
         lote_count = 0
 
         with ThreadPoolExecutor(max_workers=num_workers) as executor:
-            while True:
-                # Coletar múltiplos lotes para processamento paralelo REAL
-                batches = []
-                session = self.Session()
-                try:
-                    # Verificar se ainda há itens pendentes
-                    total_pendentes_atual = session.execute(text("""
-                        SELECT COUNT(*) FROM bronze_pncp_itens
-                        WHERE status_processamento = 'PENDING'
-                        AND EXISTS (SELECT 1 FROM silver_licitacoes WHERE identificador_pncp = bronze_pncp_itens.licitacao_identificador)
-                    """)).scalar()
-
-                    if total_pendentes_atual == 0:
-                        break
-
-                    # Cada worker pega um lote diferente usando OFFSET
-                    for i in range(num_workers):
-                        offset = i * batch_size_itens
-                        sql_itens = text(f"""
-                            SELECT T1.id, T1.licitacao_identificador, T1.payload
-                            FROM bronze_pncp_itens T1
-                            INNER JOIN silver_licitacoes T2 ON T2.identificador_pncp = T1.licitacao_identificador
-                            WHERE T1.status_processamento = 'PENDING'
-                            ORDER BY T1.id  -- Ordenação consistente para OFFSET
-                            LIMIT {batch_size_itens} OFFSET {offset}
-                        """)
-                        pendentes_itens = session.execute(sql_itens).fetchall()
-                        if pendentes_itens:  # Só adiciona se há itens
-                            batches.append((pendentes_itens, offset))
-                finally:
-                    session.close()
-
-                if not batches:
-                    break
-
+            em_voo = set()
+            for chunk in self._ler_itens_pendentes(batch_size_itens):
+                if len(em_voo) >= max_em_voo:
+                    concluidos, em_voo = wait(em_voo, return_when=FIRST_COMPLETED)
+                    total_itens_processados += sum(future.result() for future in concluidos)
+                em_voo.add(executor.submit(self.processar_batch_itens, (chunk, chunk[0][0])))
                 lote_count += 1
-                # Contar itens únicos (não somar workers)
-                itens_no_lote = sum(len(batch[0]) for batch in batches)
-                logger.info(f"🔄 Lote {lote_count}: Processando {itens_no_lote} itens únicos em {len(batches)} workers")
-
-                # Processar lotes em paralelo
-                futures = [executor.submit(self.processar_batch_itens, batch) for batch in batches]
-                batch_results = []
-                for future in as_completed(futures):
-                    result = future.result()
-                    batch_results.append(result)
-                    total_itens_processados += result
-
-                logger.info(f"✅ Lote {lote_count} concluído: {sum(batch_results)} itens processados por {len(batch_results)} workers")
-
-                # Log de progresso a cada 5 lotes (mais frequente com lotes menores)
-                if lote_count % 5 == 0:
+
+                # Log de progresso a cada 20 lotes
+                if lote_count % 20 == 0:
                     progresso_percentual_atual = (total_itens_processados / total_pendentes_inicial * 100) if total_pendentes_inicial > 0 else 0
                     logger.info(f"📊 Progresso geral: {total_itens_processados}/{total_pendentes_inicial} itens ({progresso_percentual_atual:.1f}%)")
 
+            total_itens_processados += sum(future.result() for future in em_voo)
+
         # Calcular progresso final
         progresso_final = (total_itens_processados / total_pendentes_inicial * 100) if total_pendentes_inicial > 0 else 100
         logger.info(f"✅ Total itens processados: {total_itens_processados}/{total_pendentes_inicial} ({progresso_final:.1f}%)")
         logger.info("🎉 Processamento de itens Silver finalizado com sucesso!")
+
+        if FONTE == "fila" and truncar_se_vazia(self.engine, "bronze_pncp_itens"):
+            logger.info("🧹 Fila de bronze_pncp_itens truncada")
         
         # LIMPEZA: Remover licitações vencidas
         self.limpar_licitacoes_vencidas()
@@ -471,6 +882,18 @@ def run_silver_processor(db_url=None):
     processor = SilverProcessor(db_url)
     processor.processar_tudo()
 
+def run_comparacao_transformacoes(amostra=500, db_url=None):
+    """Compara as transformações Python e SQL sobre uma amostra do Bronze (nada é gravado)."""
+    if db_url is None:
+        db_url = DB_CONNECTION_STRING
+
+    processor = SilverProcessor(db_url)
+    diferencas = processor.comparar_transformacoes(amostra)
+    for rotulo, lista in diferencas.items():
+        for diferenca in lista[:20]:
+            logger.warning(f"⚠️ {rotulo} {diferenca['chave']}: python={diferenca['python']} sql={diferenca['sql']}")
+    return {rotulo: len(lista) for rotulo, lista in diferencas.items()}
+
 # def run_silver_itens_only(db_url=None):
 #     """Processa apenas os itens Silver (assume licitações já processadas)."""
 #     if db_url is None:
@@ -569,9 +992,6 @@ def handle_silver_processor():
         # LIMPEZA: Remover licitações vencidas
         licitacoes_removidas = processor.limpar_licitacoes_vencidas()
         
-        # Cleanup
-        processor.engine.dispose()
-        
         logger.info(f"🎉 Processamento Silver concluído: {licitacoes_processadas} licitações, {itens_processados} itens, {licitacoes_removidas} licitações vencidas removidas")
         
         return {
@@ -7,6 +7,7 @@ Usado pelos cron jobs no Hetzner para coletar licitações.
 import sys
 import os
 import logging
+import argparse
 from datetime import datetime
 from pathlib import Path
 
@@ -14,11 +15,14 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from api.crawler import run_crawler_process
+from api.metrics import registro
 
 # Configuração de logging
 LOG_DIR = Path("/var/log/pncp-jobs")
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 log_file = LOG_DIR / "crawler.log"
+# Métricas no formato texto do Prometheus (ex.: diretório do textfile collector do node_exporter)
+METRICS_FILE = Path(os.getenv("CRAWLER_METRICS_FILE", str(LOG_DIR / "crawler.prom")))
 
 logging.basicConfig(
     level=logging.INFO,
@@ -32,8 +36,19 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Crawler PNCP")
+    parser.add_argument(
+        "--desde",
+        type=lambda valor: datetime.strptime(valor, "%Y-%m-%d").date(),
+        help="Backfill a partir desta data (AAAA-MM-DD); shards já concluídos são pulados"
+    )
+    return parser.parse_args()
+
+
 def main():
     """Executa o job de crawler com tratamento de erros."""
+    args = parse_args()
     inicio = datetime.now()
     logger.info("=" * 80)
     logger.info(f"🚀 INICIANDO JOB: Crawler PNCP - {inicio.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -41,7 +56,7 @@ def main():
     
     try:
         # Executa o crawler
-        resultado = run_crawler_process()
+        resultado = run_crawler_process(data_inicial=args.desde)
         
         duracao = (datetime.now() - inicio).total_seconds()
         logger.info("=" * 80)
@@ -62,6 +77,13 @@ def main():
         
         return 1  # Código de erro
 
+    finally:
+        try:
+            registro.gravar_arquivo(METRICS_FILE)
+            logger.info(f"📈 Métricas gravadas em {METRICS_FILE}")
+        except OSError as e:
+            logger.warning(f"⚠️ Não foi possível gravar as métricas em {METRICS_FILE}: {e}")
+
 
 if __name__ == "__main__":
     exit_code = main()
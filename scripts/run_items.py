@@ -7,6 +7,7 @@ Usado pelos cron jobs no Hetzner para coletar itens das licitações.
 import sys
 import os
 import logging
+import argparse
 from datetime import datetime
 from pathlib import Path
 
@@ -32,8 +33,20 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Coletor de itens PNCP")
+    parser.add_argument("--drenar", action="store_true", default=None,
+                        help="Continua reivindicando lotes até a fila de pendentes esvaziar")
+    parser.add_argument("--tempo-maximo", type=int, help="Orçamento de tempo em segundos (drenagem)")
+    parser.add_argument("--limite", type=int, help="Máximo de licitações nesta execução")
+    parser.add_argument("--recoletar", action="store_true", default=None,
+                        help="Devolve à fila licitações com itens desatualizados (payload alterado ou contagem diferente)")
+    return parser.parse_args()
+
+
 def main():
     """Executa o job de coleta de itens com tratamento de erros."""
+    args = parse_args()
     inicio = datetime.now()
     logger.info("=" * 80)
     logger.info(f"🚀 INICIANDO JOB: Coletor de Itens - {inicio.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -41,7 +54,10 @@ def main():
     
     try:
         # Executa o coletor de itens
-        resultado = run_item_collection_process()
+        resultado = run_item_collection_process(
+            drenar=args.drenar, tempo_maximo=args.tempo_maximo, limite_licitacoes=args.limite,
+            recoletar=args.recoletar
+        )
         
         duracao = (datetime.now() - inicio).total_seconds()
         logger.info("=" * 80)
@@ -63,7 +63,9 @@ def executar_pipeline():
     
     inicio_items = datetime.now()
     try:
-        resultado_items = run_item_collection_process()
+        # Drena a fila inteira (orçamento opcional via ITENS_TEMPO_MAXIMO/ITENS_LIMITE_LICITACOES),
+        # incluindo licitações que o crawler atualizou desde a última coleta de itens
+        resultado_items = run_item_collection_process(drenar=True, recoletar=True)
         duracao_items = (datetime.now() - inicio_items).total_seconds()
         logger.info(f"✅ Item Collector concluído em {duracao_items:.2f}s ({duracao_items/60:.2f}min)")
         logger.info(f"📊 Resultado: {resultado_items}")
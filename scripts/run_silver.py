@@ -7,13 +7,14 @@ Usado pelos cron jobs no Hetzner para transformar dados Bronze -> Silver.
 import sys
 import os
 import logging
+import argparse
 from datetime import datetime
 from pathlib import Path
 
 # Adiciona o diretório pai ao PYTHONPATH
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from api.silver_processor import run_silver_processor
+from api.silver_processor import run_silver_processor, run_comparacao_transformacoes
 
 # Configuração de logging
 LOG_DIR = Path("/var/log/pncp-jobs")
@@ -32,8 +33,16 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Processador Silver")
+    parser.add_argument("--comparar", type=int, metavar="AMOSTRA",
+                        help="Não processa: compara as transformações Python e SQL em AMOSTRA linhas Bronze")
+    return parser.parse_args()
+
+
 def main():
     """Executa o job de processamento Silver com tratamento de erros."""
+    args = parse_args()
     inicio = datetime.now()
     logger.info("=" * 80)
     logger.info(f"🚀 INICIANDO JOB: Silver Processor - {inicio.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -41,7 +50,10 @@ def main():
     
     try:
         # Executa o processador silver
-        resultado = run_silver_processor()
+        if args.comparar:
+            resultado = run_comparacao_transformacoes(args.comparar)
+        else:
+            resultado = run_silver_processor()
         
         duracao = (datetime.now() - inicio).total_seconds()
         logger.info("=" * 80)
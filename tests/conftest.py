@@ -0,0 +1,33 @@
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Adiciona o diretório raiz ao PYTHONPATH (mesmo esquema dos scripts/)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def esquema_postgres():
+    """
+    Schema descartável num Postgres de teste (TEST_DATABASE_URL), removido no fim.
+    Returns: URL com search_path apontando para o schema
+    """
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL não configurada")
+    sqlalchemy = pytest.importorskip("sqlalchemy")
+
+    esquema = f"teste_{uuid.uuid4().hex[:8]}"
+    admin = sqlalchemy.create_engine(url)
+    with admin.begin() as conn:
+        conn.execute(sqlalchemy.text(f"CREATE SCHEMA {esquema}"))
+    separador = "&" if "?" in url else "?"
+    try:
+        yield f"{url}{separador}options=-csearch_path%3D{esquema}"
+    finally:
+        with admin.begin() as conn:
+            conn.execute(sqlalchemy.text(f"DROP SCHEMA {esquema} CASCADE"))
+        admin.dispose()
@@ -0,0 +1,45 @@
+"""Backfill do payload_hash compartilhado por licitações e itens (Postgres via TEST_DATABASE_URL)."""
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from api import json_codec  # noqa: E402
+from api.backfill_hash import backfill_payload_hash  # noqa: E402
+from api.payload_hash import calcular_hash  # noqa: E402
+
+PAYLOADS = [{"numeroItem": n, "descricao": f"Item {n}"} for n in range(1, 6)]
+
+
+@pytest.fixture
+def engine(esquema_postgres):
+    engine = create_engine(esquema_postgres)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE bronze_teste (
+                id serial PRIMARY KEY, payload jsonb NOT NULL, payload_hash varchar(64),
+                payload_alterado_em timestamp, ingested_at timestamp DEFAULT '2024-01-02'
+            )
+        """))
+        for payload in PAYLOADS:
+            conn.execute(text("INSERT INTO bronze_teste (payload) VALUES (CAST(:p AS jsonb))"), {"p": json_codec.dumps(payload)})
+        # Linha já com hash: não é recalculada
+        conn.execute(text("UPDATE bronze_teste SET payload_hash = 'x', payload_alterado_em = '2025-01-01' WHERE id = 3"))
+    yield engine
+    engine.dispose()
+
+
+def test_backfill_em_lotes(engine):
+    assert backfill_payload_hash(engine, "bronze_teste", tamanho_lote=2) == 4
+
+    with engine.connect() as conn:
+        linhas = conn.execute(text("SELECT id, payload, payload_hash, payload_alterado_em FROM bronze_teste ORDER BY id")).fetchall()
+    for id_, payload, hash_, alterado_em in linhas:
+        if id_ == 3:
+            assert (hash_, str(alterado_em)) == ("x", "2025-01-01 00:00:00")
+        else:
+            assert (hash_, str(alterado_em)) == (calcular_hash(payload), "2024-01-02 00:00:00")
+
+    assert backfill_payload_hash(engine, "bronze_teste") == 0
@@ -0,0 +1,54 @@
+"""Fila de mudanças: só os merges com SILVER_FONTE=fila enfileiram (Postgres via TEST_DATABASE_URL)."""
+
+import pytest
+
+for modulo in ("sqlalchemy", "requests", "flask", "dotenv"):
+    pytest.importorskip(modulo)
+
+from sqlalchemy import text  # noqa: E402
+
+from api import change_queue  # noqa: E402
+from api.crawler import PNCPCrawler  # noqa: E402
+
+
+def test_cte_so_com_a_fila_ativa(monkeypatch):
+    monkeypatch.setattr(change_queue, "FONTE", "status")
+    assert change_queue.cte_enfileirar("bronze_pncp_itens", "mesclados") == ""
+
+    monkeypatch.setattr(change_queue, "FONTE", "fila")
+    assert "INSERT INTO fila_silver_itens (bronze_id)" in change_queue.cte_enfileirar("bronze_pncp_itens", "mesclados")
+
+
+def licitacao(objeto):
+    return {"numeroControlePNCP": "L-1", "dataPublicacaoPncp": "2024-03-01T10:00:00", "objetoCompra": objeto}
+
+
+def gravar(crawler, item):
+    session = crawler.Session()
+    try:
+        return crawler.salvar_paginas_bronze(session, [(6, [item])])[1]
+    finally:
+        session.close()
+
+
+@pytest.mark.parametrize("fonte", ["status", "fila"])
+def test_merge_da_licitacao(esquema_postgres, monkeypatch, fonte):
+    monkeypatch.setattr(change_queue, "FONTE", fonte)
+    crawler = PNCPCrawler(esquema_postgres)
+
+    gravar(crawler, licitacao("Papel"))
+    with crawler.engine.begin() as conn:
+        conn.execute(text("UPDATE bronze_pncp_licitacoes SET status_processamento = 'PROCESSED'"))
+        if fonte == "fila":
+            conn.execute(text("DELETE FROM fila_silver_licitacoes"))
+
+    assert gravar(crawler, licitacao("Papel"))["inalterados"] == 1
+    assert gravar(crawler, licitacao("Papel A4"))["atualizados"] == 1
+
+    with crawler.engine.connect() as conn:
+        status = conn.execute(text("SELECT status_processamento FROM bronze_pncp_licitacoes")).scalar()
+        fila = conn.execute(text("SELECT to_regclass('fila_silver_licitacoes')")).scalar()
+        enfileirados = conn.execute(text("SELECT COUNT(*) FROM fila_silver_licitacoes")).scalar() if fila else None
+    # Payload alterado volta a PENDING (fonte "status") e, só com a fila ativa, entra nela
+    assert status == "PENDING"
+    assert enfileirados == (1 if fonte == "fila" else None)
@@ -0,0 +1,64 @@
+"""Máquina de estados do DisjuntorPorChave (fechado -> aberto -> meio-aberto)."""
+
+import pytest
+
+from api import circuit_breaker
+from api.circuit_breaker import DisjuntorPorChave
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    """Relógio controlado para time.monotonic() do módulo."""
+    estado = {"agora": 1000.0}
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: estado["agora"])
+    return estado
+
+
+def test_abre_apos_falhas_consecutivas(relogio):
+    disjuntor = DisjuntorPorChave(limite_falhas=3, resfriamento=60)
+    for _ in range(2):
+        disjuntor.registrar_falha("orgao")
+    assert disjuntor.permitir("orgao")
+
+    disjuntor.registrar_falha("orgao")
+    assert not disjuntor.permitir("orgao")
+    assert disjuntor.abertos() == ["orgao"]
+    assert disjuntor.segundos_para_liberar("orgao") == 60
+    # Outras chaves não são afetadas
+    assert disjuntor.permitir("outro")
+
+
+def test_sucesso_zera_as_falhas(relogio):
+    disjuntor = DisjuntorPorChave(limite_falhas=2, resfriamento=60)
+    disjuntor.registrar_falha("orgao")
+    disjuntor.registrar_sucesso("orgao")
+    disjuntor.registrar_falha("orgao")
+    assert disjuntor.permitir("orgao")
+
+
+def test_meio_aberto_libera_uma_unica_chamada_de_teste(relogio):
+    disjuntor = DisjuntorPorChave(limite_falhas=1, resfriamento=60)
+    disjuntor.registrar_falha("orgao")
+
+    relogio["agora"] += 60
+    assert disjuntor.segundos_para_liberar("orgao") == 0
+    assert disjuntor.permitir("orgao")
+    assert not disjuntor.permitir("orgao")
+
+    disjuntor.registrar_sucesso("orgao")
+    assert disjuntor.permitir("orgao")
+    assert disjuntor.abertos() == []
+
+
+def test_teste_falho_reabre_com_resfriamento_dobrado(relogio):
+    disjuntor = DisjuntorPorChave(limite_falhas=1, resfriamento=60, resfriamento_maximo=100)
+    disjuntor.registrar_falha("orgao")
+
+    relogio["agora"] += 60
+    assert disjuntor.permitir("orgao")
+    disjuntor.registrar_falha("orgao")
+    assert not disjuntor.permitir("orgao")
+    assert disjuntor.segundos_para_liberar("orgao") == 100  # 120, limitado ao máximo
+
+    relogio["agora"] += 100
+    assert disjuntor.permitir("orgao")
@@ -0,0 +1,24 @@
+"""Escape do formato texto do COPY."""
+
+import pytest
+
+from api.copy_utils import formatar_linha, formatar_valor
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    (None, "\\N"),
+    ("simples", "simples"),
+    ("a\\b", "a\\\\b"),
+    ("a\tb", "a\\tb"),
+    ("linha 1\nlinha 2", "linha 1\\nlinha 2"),
+    ("fim\r\n", "fim\\r\\n"),
+    ("\\N", "\\\\N"),  # o texto "\N" não pode virar NULL
+    (12.5, "12.5"),
+    ("", ""),
+])
+def test_formatar_valor(valor, esperado):
+    assert formatar_valor(valor) == esperado
+
+
+def test_formatar_linha():
+    assert formatar_linha(["id-1", None, "x\ty", 3]) == "id-1\t\\N\tx\\ty\t3\n"
@@ -0,0 +1,85 @@
+"""Modo threads do crawler: downloads entregam páginas a uma fila limitada, escritores gravam em lote."""
+
+import threading
+from datetime import datetime
+
+import pytest
+
+for modulo in ("sqlalchemy", "requests", "flask", "dotenv"):
+    pytest.importorskip(modulo)
+
+from api import crawler as crawler_mod  # noqa: E402
+
+
+class SessaoFalsa:
+    def close(self):
+        pass
+
+
+class CrawlerFalso(crawler_mod.PNCPCrawler):
+    """PNCPCrawler sem banco: as páginas da API vêm de `paginas` e as transações ficam registradas."""
+
+    def __init__(self, paginas, total_paginas, falhar_gravacao=False):
+        self.paginas = paginas
+        self.total_paginas = total_paginas
+        self.falhar_gravacao = falhar_gravacao
+        self.transacoes = []
+        self.threads_gravacao = set()
+        self.Session = SessaoFalsa
+
+    def requisitar_pagina(self, data_inicial, data_final, codigo_modalidade, pagina):
+        return {"totalPaginas": self.total_paginas, "data": self.paginas[pagina - 1]}
+
+    def salvar_paginas_bronze(self, session, paginas):
+        self.threads_gravacao.add(threading.current_thread().name)
+        if self.falhar_gravacao:
+            raise RuntimeError("banco fora")
+        self.transacoes.append(len(paginas))
+        return None, {"inseridos": sum(len(r) for _, r in paginas), "atualizados": 0, "inalterados": 0}
+
+
+def pagina(dia, quantidade=2):
+    return [{"numeroControlePNCP": f"{dia}-{n}", "dataPublicacaoPncp": f"2024-03-{dia:02d}T10:00:00"} for n in range(quantidade)]
+
+
+def test_paginas_gravadas_pelos_escritores_em_lote(monkeypatch):
+    monkeypatch.setattr(crawler_mod, "PAGINAS_POR_TRANSACAO", 10)
+    crawler = CrawlerFalso([pagina(d) for d in range(1, 8)], total_paginas=7)
+
+    with crawler_mod._EscritaEmLote(crawler, 1) as escrita:
+        sucesso, data_max, gravadas = crawler.buscar_dados("20240301", "20240307", 6, escrita)
+
+    assert (sucesso, data_max, gravadas) == (True, datetime(2024, 3, 7, 10, 0), 7)
+    assert sum(crawler.transacoes) == 7
+    # Só as threads de escrita tocam no banco
+    assert crawler.threads_gravacao == {"escritor-0"}
+
+
+def test_fila_cheia_agrupa_paginas_por_transacao(monkeypatch):
+    monkeypatch.setattr(crawler_mod, "PAGINAS_POR_TRANSACAO", 3)
+    crawler = CrawlerFalso([], total_paginas=1)
+    liberar = threading.Event()
+    salvar = crawler.salvar_paginas_bronze
+
+    def salvar_devagar(session, paginas):
+        liberar.wait()
+        return salvar(session, paginas)
+
+    crawler.salvar_paginas_bronze = salvar_devagar
+    with crawler_mod._EscritaEmLote(crawler, 1) as escrita:
+        gravacoes = [escrita.enviar(6, pagina(d)) for d in range(1, 8)]
+        liberar.set()
+        datas = [g.result() for g in gravacoes]
+
+    assert datas == [datetime(2024, 3, d, 10, 0) for d in range(1, 8)]
+    assert max(crawler.transacoes) == 3
+    assert sum(crawler.transacoes) == 7
+
+
+def test_falha_na_gravacao_nao_conclui_o_shard():
+    crawler = CrawlerFalso([pagina(1), pagina(2)], total_paginas=2, falhar_gravacao=True)
+
+    with crawler_mod._EscritaEmLote(crawler, 2) as escrita:
+        sucesso, data_max, gravadas = crawler.buscar_dados("20240301", "20240302", 6, escrita)
+
+    assert (sucesso, data_max, gravadas) == (False, None, 0)
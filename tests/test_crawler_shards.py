@@ -0,0 +1,73 @@
+"""Poda dos checkpoints de shards já cobertos pela coleta incremental (Postgres via TEST_DATABASE_URL)."""
+
+from datetime import date
+
+import pytest
+
+for modulo in ("sqlalchemy", "requests", "flask", "dotenv"):
+    pytest.importorskip(modulo)
+
+from sqlalchemy import text  # noqa: E402
+
+from api.crawler import PNCPCrawler, consolidar_progresso  # noqa: E402
+
+
+def test_podar_shards(esquema_postgres):
+    crawler = PNCPCrawler(esquema_postgres)
+    with crawler.engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO progresso_coleta (codigo_modalidade, ultima_data_publicacao)
+            VALUES (6, '2024-03-10 15:00'), (8, NULL)
+        """))
+        conn.execute(text("""
+            INSERT INTO progresso_coleta_shards (codigo_modalidade, data_inicio, data_fim, status) VALUES
+                (6, '2024-03-01', '2024-03-05', 'COMPLETED'),
+                (6, '2024-03-06', '2024-03-09', 'FAILED'),
+                (6, '2024-03-06', '2024-03-10', 'COMPLETED'),
+                (8, '2024-03-01', '2024-03-05', 'COMPLETED')
+        """))
+
+    assert crawler.podar_shards([6, 8]) == 1
+
+    with crawler.engine.connect() as conn:
+        restantes = conn.execute(text(
+            "SELECT codigo_modalidade, CAST(data_fim AS text), status FROM progresso_coleta_shards ORDER BY 1, 2, 3"
+        )).fetchall()
+    # Fica o FAILED, o shard que contém a última data e a modalidade sem progresso
+    assert [tuple(r) for r in restantes] == [
+        (6, "2024-03-09", "FAILED"), (6, "2024-03-10", "COMPLETED"), (8, "2024-03-05", "COMPLETED"),
+    ]
+
+
+def shards_da_modalidade(crawler, codigo_modalidade):
+    with crawler.engine.connect() as conn:
+        return [tuple(r) for r in conn.execute(text(
+            "SELECT CAST(data_inicio AS text), status FROM progresso_coleta_shards WHERE codigo_modalidade = :c ORDER BY 1"
+        ), {"c": codigo_modalidade})]
+
+
+def test_backfill_com_falha_mantem_checkpoints(esquema_postgres):
+    crawler = PNCPCrawler(esquema_postgres)
+    with crawler.engine.begin() as conn:
+        conn.execute(text("INSERT INTO progresso_coleta (codigo_modalidade, ultima_data_publicacao) VALUES (6, '2024-03-10')"))
+        conn.execute(text("""
+            INSERT INTO progresso_coleta_shards (codigo_modalidade, data_inicio, data_fim, status) VALUES
+                (6, '2024-02-01', '2024-02-05', 'COMPLETED'),
+                (6, '2024-02-06', '2024-02-10', 'FAILED'),
+                (6, '2024-02-11', '2024-02-15', 'COMPLETED'),
+                (6, '2024-03-01', '2024-03-05', 'COMPLETED')
+        """))
+    todos = shards_da_modalidade(crawler, 6)
+
+    # Execução com falha: nada é podado, a retomada só refaz o shard FAILED
+    consolidar_progresso(crawler, {6: {"data_max": None, "falhas": 1}})
+    assert shards_da_modalidade(crawler, 6) == todos
+
+    # Sem falhas nesta execução, mas com um FAILED antigo: só o que termina antes dele sai
+    consolidar_progresso(crawler, {6: {"data_max": None, "falhas": 0}})
+    assert shards_da_modalidade(crawler, 6) == todos[1:]
+
+    # Shard refeito com sucesso: os anteriores à última data coletada são podados
+    crawler.marcar_shard(6, date(2024, 2, 6), date(2024, 2, 10), True, 3)
+    assert crawler.podar_shards([6]) == 3
+    assert shards_da_modalidade(crawler, 6) == []
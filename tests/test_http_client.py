@@ -0,0 +1,36 @@
+"""Pool da sessão HTTP compartilhada."""
+
+import pytest
+
+pytest.importorskip("requests")
+
+from api import http_client  # noqa: E402
+
+
+@pytest.fixture
+def sessao_nova(monkeypatch):
+    monkeypatch.setattr(http_client, "_sessao", None)
+    monkeypatch.setattr(http_client, "_pool_atual", 0)
+
+
+def test_aumentar_pool_fecha_o_adapter_anterior(sessao_nova, monkeypatch):
+    sessao = http_client.configurar_pool(10)
+    antigo = sessao.get_adapter("https://pncp.gov.br")
+    fechados = []
+    monkeypatch.setattr(antigo, "close", lambda: fechados.append(antigo))
+
+    assert http_client.configurar_pool(20) is sessao
+    novo = sessao.get_adapter("https://pncp.gov.br")
+
+    assert novo is not antigo and novo is sessao.get_adapter("http://pncp.gov.br")
+    assert novo._pool_maxsize == 20
+    assert fechados == [antigo]  # fechado uma vez, mesmo montado nos dois prefixos
+
+
+def test_pool_menor_reaproveita_o_adapter(sessao_nova):
+    sessao = http_client.configurar_pool(20)
+    adapter = sessao.get_adapter("https://pncp.gov.br")
+
+    http_client.configurar_pool(5)
+
+    assert sessao.get_adapter("https://pncp.gov.br") is adapter
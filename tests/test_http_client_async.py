@@ -0,0 +1,77 @@
+"""get_async(): retries, limitador e cache compartilhados com get(), sobre aiohttp."""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("aiohttp")
+
+from aiohttp import web  # noqa: E402
+
+from api import http_client, response_cache  # noqa: E402
+
+
+async def com_servidor(respostas, consulta):
+    """Sobe um servidor local que devolve `respostas` (status, corpo) em sequência e roda `consulta(url)`."""
+    recebidas = []
+
+    async def tratar(request):
+        recebidas.append(dict(request.query))
+        status, corpo = respostas[min(len(recebidas), len(respostas)) - 1]
+        return web.Response(status=status, body=corpo, headers={"Retry-After": "0"})
+
+    app = web.Application()
+    app.router.add_get("/itens", tratar)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    porta = site._server.sockets[0].getsockname()[1]
+    try:
+        async with http_client.sessao_async():
+            resultado = await consulta(f"http://127.0.0.1:{porta}/itens")
+    finally:
+        await runner.cleanup()
+    return resultado, recebidas
+
+
+def test_repete_em_5xx_e_devolve_resposta(monkeypatch):
+    monkeypatch.setattr(http_client, "HTTP_MAX_RETRIES", 2)
+    adquiridos = []
+    original = http_client.limitador.adquirir_async
+
+    async def adquirir_async():
+        adquiridos.append(1)
+        await original()
+
+    monkeypatch.setattr(http_client.limitador, "adquirir_async", adquirir_async)
+
+    response, recebidas = asyncio.run(com_servidor(
+        [(503, b""), (200, b"[1, 2]")],
+        lambda url: http_client.get_async(url, params={"pagina": 1}),
+    ))
+
+    assert response.status_code == 200
+    assert response.content == b"[1, 2]"
+    assert recebidas == [{"pagina": "1"}, {"pagina": "1"}]
+    assert len(adquiridos) == 2
+
+
+def test_grava_e_reproduz_pelo_cache(tmp_path):
+    modo_original, diretorio_original = response_cache.MODO, response_cache.DIRETORIO
+
+    async def consulta(url):
+        return url, await http_client.get_async(url, params={"pagina": 2})
+
+    try:
+        response_cache.configurar("record", tmp_path)
+        (url, gravada), _ = asyncio.run(com_servidor([(200, b"[3]")], consulta))
+
+        # Replay não acessa a rede: o servidor já foi encerrado
+        response_cache.configurar("replay", tmp_path)
+        reproduzida = asyncio.run(http_client.get_async(url, params={"pagina": 2}))
+    finally:
+        response_cache.configurar(modo_original, diretorio_original)
+
+    assert (reproduzida.status_code, reproduzida.content) == (gravada.status_code, gravada.content) == (200, b"[3]")
@@ -0,0 +1,124 @@
+"""Classificação das respostas de itens: 404 sem itens, 4xx permanente, 429/5xx transitório."""
+
+import pytest
+
+for modulo in ("sqlalchemy", "requests", "flask", "dotenv"):
+    pytest.importorskip(modulo)
+
+from api import item_collector  # noqa: E402
+from api.circuit_breaker import DisjuntorPorChave  # noqa: E402
+
+
+class RespostaFalsa:
+    def __init__(self, status_code, content=b"[]"):
+        self.status_code = status_code
+        self.content = content
+
+
+def baixar_com_status(monkeypatch, status_code, content=b"[]"):
+    monkeypatch.setattr(item_collector.http_client, "get", lambda *a, **k: RespostaFalsa(status_code, content))
+    return item_collector.baixar_pagina_itens("url", 1, 50)
+
+
+def test_200_devolve_itens(monkeypatch):
+    assert baixar_com_status(monkeypatch, 200, b'[{"numeroItem": 1}]') == [{"numeroItem": 1}]
+
+
+@pytest.mark.parametrize("status_code", [204, 404])
+def test_sem_itens(monkeypatch, status_code):
+    assert baixar_com_status(monkeypatch, status_code) == []
+
+
+def test_404_gravado_reproduz_sem_itens(monkeypatch, tmp_path):
+    from api import http_client, response_cache
+
+    monkeypatch.setattr(response_cache, "MODO", response_cache.MODO)
+    monkeypatch.setattr(response_cache, "DIRETORIO", response_cache.DIRETORIO)
+    chamadas = []
+
+    def get_rede(url, params, timeout):
+        chamadas.append(params)
+        return http_client._montar_resposta(url, 404, b"")
+
+    monkeypatch.setattr(http_client, "_get_rede", get_rede)
+    response_cache.configurar("record", tmp_path)
+    assert item_collector.baixar_pagina_itens("https://pncp/itens", 1, 50) == []
+
+    # Replay: mesmo resultado da execução gravada, sem rede nem RespostaNaoGravada
+    response_cache.configurar("replay")
+    assert item_collector.baixar_pagina_itens("https://pncp/itens", 1, 50) == []
+    assert len(chamadas) == 1
+
+
+@pytest.mark.parametrize("status_code", [400, 403, 422])
+def test_4xx_permanente(monkeypatch, status_code):
+    with pytest.raises(item_collector.ErroPermanenteItens):
+        baixar_com_status(monkeypatch, status_code)
+
+
+@pytest.mark.parametrize("status_code", [429, 500, 503])
+def test_429_e_5xx_transitorios(monkeypatch, status_code):
+    with pytest.raises(item_collector.ErroColetaItens) as erro:
+        baixar_com_status(monkeypatch, status_code)
+    assert not isinstance(erro.value, item_collector.ErroPermanenteItens)
+
+
+@pytest.fixture
+def ledger(monkeypatch):
+    monkeypatch.setattr(item_collector, "disjuntor_orgaos", DisjuntorPorChave(limite_falhas=1))
+    chamadas = []
+
+    def registrar_falha_licitacao(engine, identificador_pncp, dono, erro, contar=True, adiar_segundos=None, permanente=False):
+        chamadas.append(permanente)
+        return ("FAILED" if permanente else "RETRY", 1)
+
+    monkeypatch.setattr(item_collector, "registrar_falha_licitacao", registrar_falha_licitacao)
+    return chamadas
+
+
+def test_erro_permanente_nao_conta_no_disjuntor(ledger):
+    item_collector.registrar_erro_coleta(None, "id", "dono", "orgao", item_collector.ErroPermanenteItens("Status 400"))
+
+    assert ledger == [True]
+    assert item_collector.disjuntor_orgaos.permitir("orgao")
+
+
+def test_erro_transitorio_conta_no_disjuntor(ledger):
+    item_collector.registrar_erro_coleta(None, "id", "dono", "orgao", item_collector.ErroColetaItens("Status 503"))
+
+    assert ledger == [False]
+    assert not item_collector.disjuntor_orgaos.permitir("orgao")
+
+
+def test_teste_do_meio_aberto_com_4xx_permanente_libera_o_orgao(ledger, monkeypatch):
+    monkeypatch.setattr(item_collector, "disjuntor_orgaos", DisjuntorPorChave(limite_falhas=1, resfriamento=0))
+    item_collector.disjuntor_orgaos.registrar_falha("00000000000191")
+    respostas = [item_collector.ErroPermanenteItens("Status 400"), [{"numeroItem": 1}]]
+    baixados = []
+
+    def baixar_itens_api(identificador_pncp, cnpj, ano, seq):
+        baixados.append(identificador_pncp)
+        resposta = respostas.pop(0)
+        if isinstance(resposta, Exception):
+            raise resposta
+        return resposta
+
+    monkeypatch.setattr(item_collector, "baixar_itens_api", baixar_itens_api)
+    payload = {"orgaoEntidade": {"cnpj": "00000000000191"}, "anoCompra": 2024, "sequencialCompra": 1}
+
+    # Chamada de teste do meio-aberto recebe 400: FAILED, mas o órgão não fica travado
+    assert item_collector.coletar_licitacao(None, "id-1", payload, "dono") is None
+    assert item_collector.coletar_licitacao(None, "id-2", payload, "dono") == ("id-2", "COMPLETED", [{"numeroItem": 1}])
+    assert baixados == ["id-1", "id-2"]
+    assert ledger == [True]
+
+
+def test_erro_permanente_preservado_na_coleta(monkeypatch):
+    monkeypatch.setattr(item_collector, "_maior_pagina_itens", 0)
+
+    def baixar_pagina_itens(url, pagina, tamanho):
+        raise item_collector.ErroPermanenteItens("Status 400")
+
+    monkeypatch.setattr(item_collector, "baixar_pagina_itens", baixar_pagina_itens)
+    with pytest.raises(item_collector.ErroPermanenteItens):
+        item_collector.baixar_itens_api("id", "00000000000191", 2024, 1)
@@ -0,0 +1,143 @@
+"""Paginação dos itens: página 1 primeiro, tamanho efetivo medido, total só com página cheia."""
+
+import asyncio
+
+import pytest
+
+for modulo in ("sqlalchemy", "requests", "flask", "dotenv"):
+    pytest.importorskip(modulo)
+
+from api import item_collector  # noqa: E402
+
+
+def itens(inicio, fim):
+    return [{"numeroItem": n} for n in range(inicio, fim + 1)]
+
+
+@pytest.fixture
+def servidor(monkeypatch):
+    """API falsa: `total` itens, no máximo `limite` por página. Registra as chamadas."""
+    monkeypatch.setattr(item_collector, "_maior_pagina_itens", 0)
+    monkeypatch.setattr(item_collector, "TAMANHO_PAGINA_ITENS", 50)
+    estado = {"total": 0, "limite": 1000, "chamadas": []}
+
+    def baixar_pagina_itens(url, pagina, tamanho):
+        estado["chamadas"].append(("pagina", pagina))
+        tamanho = min(tamanho, estado["limite"])
+        inicio = (pagina - 1) * tamanho
+        return itens(inicio + 1, min(estado["total"], inicio + tamanho))
+
+    def consultar_quantidade_itens(cnpj, ano, sequencial):
+        estado["chamadas"].append(("quantidade",))
+        return estado["total"]
+
+    monkeypatch.setattr(item_collector, "baixar_pagina_itens", baixar_pagina_itens)
+    monkeypatch.setattr(item_collector, "consultar_quantidade_itens", consultar_quantidade_itens)
+    return estado
+
+
+def coletar(total):
+    return item_collector.baixar_itens_api(f"id-{total}", "00000000000191", 2024, total)
+
+
+def test_pagina_unica_nao_consulta_quantidade(servidor, monkeypatch):
+    monkeypatch.setattr(item_collector, "_maior_pagina_itens", 50)
+    servidor["total"] = 7
+
+    assert coletar(7) == itens(1, 7)
+    assert servidor["chamadas"] == [("pagina", 1)]
+
+
+def test_uma_chamada_por_licitacao_pequena(servidor, monkeypatch):
+    monkeypatch.setattr(item_collector, "_maior_pagina_itens", 50)
+    for total in (1, 3, 10, 20, 49):
+        servidor["total"] = total
+        assert len(coletar(total)) == total
+    assert len(servidor["chamadas"]) == 5
+
+
+def test_pagina_cheia_busca_restantes_pelo_total(servidor):
+    servidor["total"] = 120
+
+    assert coletar(120) == itens(1, 120)
+    assert servidor["chamadas"][:2] == [("pagina", 1), ("quantidade",)]
+    assert sorted(servidor["chamadas"][2:]) == [("pagina", 2), ("pagina", 3)]
+
+
+def test_servidor_limita_tamanho_da_pagina(servidor):
+    # Pede 50, o servidor devolve no máximo 20: nenhum item pode ser perdido
+    servidor["limite"] = 20
+    servidor["total"] = 45
+
+    assert coletar(45) == itens(1, 45)
+    assert ("pagina", 4) not in servidor["chamadas"]
+
+
+def test_sem_total_segue_pagina_a_pagina(servidor, monkeypatch):
+    monkeypatch.setattr(item_collector, "TAMANHO_PAGINA_ITENS", 10)
+    monkeypatch.setattr(item_collector, "consultar_quantidade_itens", lambda *_: None)
+    servidor["limite"] = 10
+    servidor["total"] = 25
+
+    assert coletar(25) == itens(1, 25)
+    assert servidor["chamadas"] == [("pagina", 1), ("pagina", 2), ("pagina", 3)]
+
+
+def test_falha_em_pagina_levanta_erro_coleta(servidor, monkeypatch):
+    monkeypatch.setattr(item_collector, "TAMANHO_PAGINA_ITENS", 10)
+    servidor["total"] = 30
+
+    def baixar_pagina_itens(url, pagina, tamanho):
+        if pagina == 2:
+            raise RuntimeError("Status 500")
+        return itens((pagina - 1) * 10 + 1, pagina * 10)
+
+    monkeypatch.setattr(item_collector, "baixar_pagina_itens", baixar_pagina_itens)
+    with pytest.raises(item_collector.ErroColetaItens):
+        coletar(30)
+
+
+def test_proximas_paginas():
+    proximas = item_collector._proximas_paginas
+
+    assert proximas({1: itens(1, 7)}, None, 10) == range(0)
+    assert proximas({1: []}, None, 10) == range(0)
+    assert proximas({1: itens(1, 10)}, None, 10) == range(2, 3)
+    assert proximas({1: itens(1, 10)}, 35, 10) == range(2, 5)
+    assert proximas({1: itens(1, 10), 2: itens(11, 20)}, 20, 10) == range(0)
+    # Total cresceu desde a sonda: continua depois da última página cheia
+    assert proximas({1: itens(1, 10), 2: itens(11, 20)}, 25, 10) == range(3, 4)
+
+
+def test_observar_tamanho_pagina(monkeypatch):
+    monkeypatch.setattr(item_collector, "_maior_pagina_itens", 0)
+
+    assert item_collector._observar_tamanho_pagina(itens(1, 20)) == 20
+    assert item_collector._observar_tamanho_pagina(itens(1, 5)) == 20
+    assert item_collector._pagina_cheia(itens(1, 20), 20)
+    assert not item_collector._pagina_cheia(itens(1, 5), 20)
+    assert not item_collector._pagina_cheia([], 0)
+
+
+def test_juntar_paginas_na_ordem():
+    paginas = {2: itens(3, 4), 1: itens(1, 2), 3: itens(5, 5)}
+    assert item_collector._juntar_paginas("id", paginas) == itens(1, 5)
+
+
+def test_versao_async_segue_o_mesmo_plano(servidor, monkeypatch):
+    async def baixar_pagina_itens_async(url, pagina, tamanho):
+        return item_collector.baixar_pagina_itens(url, pagina, tamanho)
+
+    async def consultar_quantidade_itens_async(cnpj, ano, sequencial):
+        return item_collector.consultar_quantidade_itens(cnpj, ano, sequencial)
+
+    monkeypatch.setattr(item_collector, "baixar_pagina_itens_async", baixar_pagina_itens_async)
+    monkeypatch.setattr(item_collector, "consultar_quantidade_itens_async", consultar_quantidade_itens_async)
+    servidor["limite"] = 20
+    servidor["total"] = 45
+
+    itens_async = asyncio.run(item_collector.baixar_itens_api_async("id", "00000000000191", 2024, 45))
+
+    assert itens_async == itens(1, 45)
+    assert servidor["chamadas"][:2] == [("pagina", 1), ("quantidade",)]
+    assert sorted(servidor["chamadas"][2:]) == [("pagina", 2), ("pagina", 3)]
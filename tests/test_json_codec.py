@@ -0,0 +1,20 @@
+"""Codec JSON: mesmo resultado com orjson ou stdlib."""
+
+import json
+
+from api import json_codec
+
+
+def test_ida_e_volta():
+    payload = {"objeto": "Aquisição", "valor": 12.5, "itens": [1, None, True], "vazio": {}}
+
+    assert json_codec.loads(json_codec.dumps(payload)) == payload
+    assert json_codec.loads(json_codec.dumps(payload).encode("utf-8")) == payload
+
+
+def test_compativel_com_stdlib():
+    texto = '{"a": [1, 2.5, "x"], "b": null}'
+
+    assert json_codec.loads(texto) == json.loads(texto)
+    assert json.loads(json_codec.dumps({"c": "é"})) == {"c": "é"}
+    assert isinstance(json_codec.dumps({}), str)
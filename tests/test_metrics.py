@@ -0,0 +1,62 @@
+"""Registro de métricas: contadores, gauges, histogramas e exportação Prometheus."""
+
+from api.metrics import Cronometro, RegistroMetricas
+
+
+def test_contador_por_labels():
+    registro = RegistroMetricas()
+    paginas = registro.contador("pncp_paginas_total", "Páginas baixadas")
+    paginas.inc(modalidade=6)
+    paginas.inc(2, modalidade=6)
+    paginas.inc(modalidade=8)
+
+    assert paginas.valor(modalidade=6) == 3
+    assert paginas.valor(modalidade=1) == 0
+    assert registro.contador("pncp_paginas_total", "outra ajuda") is paginas
+
+
+def test_gauge_maximo():
+    gauge = RegistroMetricas().gauge("fila", "Profundidade")
+    gauge.maximo(3)
+    gauge.maximo(1)
+    assert gauge.valor() == 3
+    gauge.definir(0)
+    assert gauge.valor() == 0
+
+
+def test_histograma_acumulado():
+    histograma = RegistroMetricas().histograma("latencia", "Latência", buckets=(1.0, 0.5))
+    for valor in (0.2, 0.7, 3.0):
+        histograma.observar(valor)
+
+    assert histograma.snapshot()[()] == {"buckets": {0.5: 1, 1.0: 2}, "soma": 3.9, "contagem": 3}
+
+
+def test_exportar_prometheus(tmp_path):
+    registro = RegistroMetricas()
+    registro.contador("erros_total", "Erros").inc(orgao='a"b')
+    registro.histograma("latencia", "Latência", buckets=(1.0,)).observar(0.5)
+
+    texto = registro.exportar_prometheus()
+
+    assert texto.splitlines() == [
+        "# HELP erros_total Erros",
+        "# TYPE erros_total counter",
+        'erros_total{orgao="a\\"b"} 1',
+        "# HELP latencia Latência",
+        "# TYPE latencia histogram",
+        'latencia_bucket{le="1.0"} 1',
+        'latencia_bucket{le="+Inf"} 1',
+        "latencia_sum 0.5",
+        "latencia_count 1",
+    ]
+    registro.gravar_arquivo(tmp_path / "pncp.prom")
+    assert (tmp_path / "pncp.prom").read_text() == texto
+
+
+def test_cronometro_soma_no_contador():
+    ocupado = RegistroMetricas().contador("ocupado_segundos", "Tempo ocupado")
+    with Cronometro(ocupado, worker="escritor"):
+        pass
+    assert ocupado.valor(worker="escritor") >= 0
+    assert list(ocupado.snapshot()) == [(("worker", "escritor"),)]
@@ -0,0 +1,28 @@
+"""Canonicalização do payload: o hash não depende da ordem das chaves nem de espaços."""
+
+import hashlib
+
+from api.payload_hash import calcular_hash, canonicalizar
+
+
+def test_ordem_das_chaves_nao_altera_o_hash():
+    a = {"numeroItem": 1, "descricao": "Papel", "extra": {"b": 2, "a": 1}}
+    b = {"extra": {"a": 1, "b": 2}, "descricao": "Papel", "numeroItem": 1}
+
+    assert canonicalizar(a) == canonicalizar(b) == '{"descricao":"Papel","extra":{"a":1,"b":2},"numeroItem":1}'
+    assert calcular_hash(a) == calcular_hash(b)
+
+
+def test_texto_unicode_sem_escape():
+    payload = {"objeto": "Aquisição de café"}
+
+    assert canonicalizar(payload) == '{"objeto":"Aquisição de café"}'
+    assert calcular_hash(payload) == hashlib.sha256('{"objeto":"Aquisição de café"}'.encode("utf-8")).hexdigest()
+
+
+def test_hash_hex_de_64_caracteres():
+    digest = calcular_hash({"a": 1})
+
+    assert len(digest) == 64
+    assert int(digest, 16) >= 0
+    assert calcular_hash({"a": 2}) != digest
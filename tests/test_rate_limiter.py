@@ -0,0 +1,109 @@
+"""AIMD do LimitadorAdaptativo: aumento aditivo, redução multiplicativa uma vez por janela."""
+
+import asyncio
+
+import pytest
+
+from api import rate_limiter
+from api.rate_limiter import LimitadorAdaptativo
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    """Relógio controlado para time.monotonic() do módulo."""
+    estado = {"agora": 1000.0}
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: estado["agora"])
+    return estado
+
+
+def limitador(**kwargs):
+    opcoes = dict(taxa_inicial=10, taxa_minima=1, taxa_maxima=100, incremento=1, fator_reducao=0.5, latencia_maxima=10)
+    opcoes.update(kwargs)
+    return LimitadorAdaptativo(**opcoes)
+
+
+def test_taxa_inicial_limitada_ao_intervalo(relogio):
+    assert limitador(taxa_inicial=500).taxa == 100
+    assert limitador(taxa_inicial=0.1).taxa == 1
+
+
+def test_aumento_aditivo(relogio):
+    lim = limitador()
+    lim.registrar(200, 0.2)
+    assert lim.taxa == pytest.approx(10.1)  # incremento / taxa por resposta saudável
+
+    # ~taxa respostas por segundo: +incremento req/s por segundo
+    for _ in range(10):
+        lim.registrar(200, 0.2)
+    assert 10.9 < lim.taxa < 11.2
+
+
+def test_aumento_respeita_o_maximo(relogio):
+    lim = limitador(taxa_inicial=100)
+    lim.registrar(200, 0.2)
+    assert lim.taxa == 100
+
+
+@pytest.mark.parametrize("status_code", [429, 503, None])
+def test_sobrecarga_reduz_pela_metade(relogio, status_code):
+    lim = limitador()
+    lim.registrar(status_code, 0.2)
+    assert lim.taxa == 5
+
+
+def test_uma_reducao_por_janela(relogio):
+    lim = limitador(taxa_inicial=40)
+    for _ in range(5):
+        lim.registrar(429, 0.2)
+    assert lim.taxa == 20
+
+    relogio["agora"] += 1
+    lim.registrar(429, 0.2)
+    assert lim.taxa == 10
+
+
+def test_reducao_respeita_o_minimo(relogio):
+    lim = limitador(taxa_inicial=1.5)
+    lim.registrar(429, 0.2)
+    assert lim.taxa == 1
+
+
+def test_pico_de_latencia_reduz(relogio):
+    lim = limitador()
+    for _ in range(5):
+        lim.registrar(200, 0.5)
+    taxa = lim.taxa
+
+    lim.registrar(200, 2.0)  # > 3x a média e > 1s
+    assert lim.taxa == pytest.approx(taxa * 0.5)
+
+    relogio["agora"] += 1
+    lim.registrar(200, 11)  # acima da latência máxima
+    assert lim.taxa == pytest.approx(taxa * 0.25)
+
+
+def test_token_bucket(relogio):
+    lim = limitador()
+    assert lim._tentar_adquirir() == 0
+    assert lim._tentar_adquirir() == pytest.approx(0.1)  # 1 token a 10 req/s
+
+    relogio["agora"] += 0.1
+    assert lim._tentar_adquirir() == 0
+
+
+def test_adquirir_async_espera_no_event_loop(relogio, monkeypatch):
+    lim = limitador()
+    esperas = []
+
+    async def sleep(segundos):
+        esperas.append(segundos)
+        relogio["agora"] += segundos
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", sleep)
+
+    async def adquirir_duas_vezes():
+        await lim.adquirir_async()
+        await lim.adquirir_async()
+
+    asyncio.run(adquirir_duas_vezes())
+    assert esperas == [pytest.approx(0.1)]
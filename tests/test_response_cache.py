@@ -0,0 +1,56 @@
+"""Cache de respostas: gravação e reprodução endereçadas por conteúdo."""
+
+import pytest
+
+from api import response_cache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    modo_original, diretorio_original = response_cache.MODO, response_cache.DIRETORIO
+    response_cache.configurar("record", tmp_path)
+    yield tmp_path
+    response_cache.configurar(modo_original, diretorio_original)
+
+
+def test_grava_e_le(cache):
+    response_cache.gravar("https://pncp/itens", {"pagina": 1}, 200, b'[{"numeroItem": 1}]')
+    response_cache.configurar("replay")
+
+    assert response_cache.ler("https://pncp/itens", {"pagina": 1}) == (200, b'[{"numeroItem": 1}]')
+
+
+def test_chave_independe_da_ordem_dos_params(cache):
+    response_cache.gravar("u", {"pagina": 1, "tamanhoPagina": 50}, 200, b"[]")
+
+    assert response_cache.ler("u", {"tamanhoPagina": 50, "pagina": 1}) == (200, b"[]")
+
+
+def test_corpos_iguais_gravados_uma_vez(cache):
+    for pagina in (1, 2, 3):
+        response_cache.gravar("u", {"pagina": pagina}, 204, b"")
+
+    assert len(list((cache / "objetos").rglob("*.gz"))) == 1
+    assert len(list((cache / "requisicoes").rglob("*.json"))) == 3
+    assert response_cache.ler("u", {"pagina": 3}) == (204, b"")
+
+
+def test_requisicao_nao_gravada(cache):
+    response_cache.gravar("u", {"pagina": 1}, 200, b"[]")
+
+    with pytest.raises(response_cache.RespostaNaoGravada):
+        response_cache.ler("u", {"pagina": 2})
+
+
+def test_modo_invalido(cache):
+    with pytest.raises(ValueError):
+        response_cache.configurar("gravar")
+    assert response_cache.gravando()
+
+
+def test_status_gravados(cache):
+    assert all(response_cache.deve_gravar(status) for status in (200, 204, 404))
+    assert not any(response_cache.deve_gravar(status) for status in (400, 429, 500, 503))
+
+    response_cache.configurar("replay")
+    assert not response_cache.deve_gravar(200)
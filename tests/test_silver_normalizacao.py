@@ -0,0 +1,188 @@
+"""Normalização Silver: Python (referência) e SQL concordam, inclusive em números vindos como texto."""
+
+import pytest
+
+for modulo in ("sqlalchemy", "flask", "dotenv"):
+    pytest.importorskip(modulo)
+
+from api import json_codec  # noqa: E402
+from api import silver_processor as sp  # noqa: E402
+
+LICITACOES = [
+    {"numeroControlePNCP": "L-1", "objetoCompra": " Papel\tA4\n", "anoCompra": 2024,
+     "valorTotalEstimado": 1500.5, "valorTotalHomologado": None,
+     "orgaoEntidade": {"cnpj": "00000000000191", "razaoSocial": "Órgão"},
+     "unidadeOrgao": {"municipioNome": "Recife", "ufSigla": "PE"}},
+    {"numeroControlePNCP": "L-2", "objetoCompra": "Toner", "valorTotalEstimado": "2500.75",
+     "valorTotalHomologado": " 100 "},
+    {"numeroControlePNCP": "L-3", "objetoCompra": None, "valorTotalEstimado": "não informado",
+     "valorTotalHomologado": True},
+]
+
+ITENS = [
+    ("L-1", {"numeroItem": 1, "descricao": "Número", "quantidade": 2, "valorUnitarioEstimado": 12.5,
+             "valorTotal": 0, "unidadeMedida": "UN", "situacaoCompraItemNome": "Em andamento"}),
+    ("L-1", {"numeroItem": 2, "descricao": "Texto", "quantidade": "4", "valorUnitarioEstimado": "2.5",
+             "valorTotal": "0", "unidadeFornecimento": "CX"}),
+    ("L-1", {"numeroItem": 3, "descricao": "Expoente", "quantidade": "1e2", "valorUnitario": "-1.5",
+             "valorTotal": "250"}),
+    ("L-2", {"numeroItem": 1, "descricao": "Inválidos", "quantidade": "dez", "valorUnitarioEstimado": False,
+             "valor_unitario": "3", "valorTotal": "abc", "unidadeMedida": "X" * 60}),
+    ("L-2", {"numeroItem": 2, "descricao": "Ausentes"}),
+]
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    (12, 12), (12.5, 12.5), ("12.5", 12.5), (" -3 ", -3.0), ("1e2", 100.0),
+    ("abc", None), ("", None), ("1.", None), (True, None), (None, None), ({"v": 1}, None),
+])
+def test_numero(valor, esperado):
+    assert sp.numero(valor) == esperado
+
+
+def test_item_com_numeros_em_texto():
+    linha = dict(zip(sp.CHAVES_ITEM, sp.linha_silver_item("L-1", ITENS[1][1])))
+    assert (linha["qtd"], linha["v_uni"], linha["v_tot"], linha["und"]) == (4.0, 2.5, 10.0, "CX")
+
+
+def test_item_com_valores_invalidos():
+    linha = dict(zip(sp.CHAVES_ITEM, sp.linha_silver_item("L-2", ITENS[3][1])))
+    assert (linha["qtd"], linha["v_uni"], linha["v_tot"], len(linha["und"])) == (0, 3.0, 0, 50)
+
+
+def test_licitacao_com_numeros_em_texto():
+    linha = dict(zip(sp.CHAVES_LICITACAO, sp.linha_silver_licitacao(LICITACOES[1])))
+    assert (linha["v_est"], linha["v_hom"]) == (2500.75, 100.0)
+    linha = dict(zip(sp.CHAVES_LICITACAO, sp.linha_silver_licitacao(LICITACOES[2])))
+    assert (linha["v_est"], linha["v_hom"], linha["objeto"]) == (0, None, "")
+
+
+def test_chunks_dos_processos_igual_a_referencia():
+    textos = [(i, json_codec.dumps(p)) for i, p in enumerate(LICITACOES)]
+    assert sp.transformar_chunk_licitacoes(textos) == [sp.linha_silver_licitacao(p) for p in LICITACOES]
+    textos = [(i, ident, json_codec.dumps(p)) for i, (ident, p) in enumerate(ITENS)]
+    assert sp.transformar_chunk_itens(textos) == [sp.linha_silver_item(ident, p) for ident, p in ITENS]
+
+
+@pytest.mark.parametrize("modelo", [sp.SQL_REIVINDICAR_LICITACOES, sp.SQL_CONSUMIR_LICITACOES])
+def test_variantes_de_colunas_licitacoes(modelo):
+    assert "SELECT T1.id, T1.payload::text FROM" in modelo.format(colunas=sp.COLUNAS_LICITACOES["texto"])
+    assert "SELECT T1.id FROM" in modelo.format(colunas=sp.COLUNAS_LICITACOES["ids"])
+
+
+@pytest.mark.parametrize("modelo", [sp.SQL_REIVINDICAR_ITENS, sp.SQL_CONSUMIR_ITENS, *sp.SQL_LER_ITENS_PENDENTES.values()])
+def test_variantes_de_colunas_itens(modelo):
+    for colunas in sp.COLUNAS_ITENS.values():
+        assert f"SELECT {colunas}\n" in modelo.format(colunas=colunas)
+
+
+# --- No banco (opcional: TEST_DATABASE_URL aponta para um Postgres descartável, ver conftest.py) ---
+
+DDL = """
+    CREATE TABLE bronze_pncp_licitacoes (
+        id bigserial PRIMARY KEY, payload jsonb NOT NULL, status_processamento varchar DEFAULT 'PENDING'
+    );
+    CREATE TABLE bronze_pncp_itens (
+        id bigserial PRIMARY KEY, licitacao_identificador varchar, payload jsonb NOT NULL,
+        status_processamento varchar DEFAULT 'PENDING'
+    );
+    CREATE TABLE silver_licitacoes (
+        identificador_pncp varchar PRIMARY KEY, objeto_compra text, ano_compra integer,
+        data_publicacao timestamp, data_encerramento timestamp, municipio_nome varchar, uf_sigla varchar(2),
+        orgao_razao_social varchar, orgao_cnpj varchar, valor_total_estimado numeric,
+        valor_total_homologado numeric, situacao_nome varchar, modalidade_nome varchar
+    );
+    CREATE TABLE silver_itens (
+        licitacao_identificador varchar, numero_item integer, descricao text, quantidade numeric,
+        valor_unitario_estimado numeric, valor_total_estimado numeric, unidade_medida varchar(50),
+        situacao_item_nome varchar, categoria_item_nome varchar,
+        UNIQUE (licitacao_identificador, numero_item)
+    );
+"""
+
+
+@pytest.fixture
+def banco(esquema_postgres):
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(esquema_postgres)
+    with engine.begin() as conn:
+        conn.execute(text(DDL))
+        for payload in LICITACOES:
+            conn.execute(text("INSERT INTO bronze_pncp_licitacoes (payload) VALUES (CAST(:p AS jsonb))"),
+                         {"p": json_codec.dumps(payload)})
+        for identificador, payload in ITENS:
+            conn.execute(text("INSERT INTO bronze_pncp_itens (licitacao_identificador, payload) VALUES (:i, CAST(:p AS jsonb))"),
+                         {"i": identificador, "p": json_codec.dumps(payload)})
+    engine.dispose()
+    return esquema_postgres
+
+
+def test_transformacoes_python_e_sql_equivalentes(banco):
+    from sqlalchemy import text
+
+    processor = sp.SilverProcessor(banco)
+    with processor.engine.begin() as conn:
+        # Itens só são comparados com a licitação já no Silver
+        conn.execute(text("INSERT INTO silver_licitacoes (identificador_pncp) VALUES ('L-1'), ('L-2')"))
+
+    diferencas = processor.comparar_transformacoes(amostra=100)
+
+    assert diferencas == {"licitacoes": [], "itens": []}
+
+
+def contar(engine, *consultas):
+    """Executa COUNT(*) de cada consulta; None para tabela inexistente (fila desativada)."""
+    from sqlalchemy import text
+
+    resultado = []
+    with engine.connect() as conn:
+        for tabela, filtro in consultas:
+            if not conn.execute(text("SELECT to_regclass(:t)"), {"t": tabela}).scalar():
+                resultado.append(None)
+                continue
+            resultado.append(conn.execute(text(f"SELECT COUNT(*) FROM {tabela} WHERE {filtro}")).scalar())
+    return tuple(resultado)
+
+
+PENDENTES = (
+    ("bronze_pncp_licitacoes", "status_processamento = 'PENDING'"),
+    ("bronze_pncp_itens", "status_processamento = 'PENDING'"),
+    ("fila_silver_licitacoes", "TRUE"),
+    ("fila_silver_itens", "TRUE"),
+    ("silver_itens", "TRUE"),
+)
+
+
+@pytest.mark.parametrize("fonte, esperado", [
+    # status: marca o Bronze e não cria filas
+    ("status", (0, 0, None, None, len(ITENS))),
+    # fila: consome as filas e não toca no status do Bronze
+    ("fila", (len(LICITACOES), len(ITENS), 0, 0, len(ITENS))),
+])
+def test_cada_fonte_so_mexe_no_proprio_marcador(banco, monkeypatch, fonte, esperado):
+    monkeypatch.setattr(sp, "FONTE", fonte)
+    processor = sp.SilverProcessor(banco)
+    processor.processar_tudo()
+
+    assert contar(processor.engine, *PENDENTES) == esperado
+
+
+@pytest.mark.parametrize("fonte, esperado", [
+    # Os itens de L-2 (fora do Silver) continuam pendentes na fonte
+    ("status", (3, None, 2)),
+    ("fila", (3, 2, len(ITENS))),
+])
+def test_apenas_itens_usa_o_mesmo_leitor_nas_duas_fontes(banco, monkeypatch, fonte, esperado):
+    from sqlalchemy import text
+
+    monkeypatch.setattr(sp, "FONTE", fonte)
+    monkeypatch.setattr(sp, "JANELA_LEITURA_ITENS", 2)
+    processor = sp.SilverProcessor(banco)
+    with processor.engine.begin() as conn:
+        conn.execute(text("INSERT INTO silver_licitacoes (identificador_pncp) VALUES ('L-1')"))
+
+    assert [len(chunk) for chunk in processor._ler_itens_pendentes(1)] == [1, 1, 1]
+    processor.processar_apenas_itens()
+
+    assert contar(processor.engine, PENDENTES[4], PENDENTES[3], PENDENTES[1]) == esperado